@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+throughput of put, get and mark and memory per item of an ArgsContainer (in memory) with N items
+for the hash functions (see hash_arg)
+
+    - 'sha256': hex digest (64 characters), the former and default one
+    - 'blake2b': raw 16 byte digest
+    - None: no deduplication
+
+put is put_many with all items, get is get_jobs in chunks of 100, mark is mark_id of all
+items (by id) and mark of all items (by item, hashing them again, not possible for None).
+The memory is the memory allocated by put_many (the items themselves exist before).
+
+each item is a tuple of an int and a string of 20 characters
+
+usage: python bench_arg_hash.py [N, ...]   (default 100000 1000000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import tracemalloc
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from jobmanager.jobmanager import ArgsContainer
+
+def make_items(n):
+    return [(i, "{:020d}".format(i)) for i in range(n)]
+
+def get_all(ac):
+    jobs = []
+    while ac.qsize() > 0:
+        jobs += ac.get_jobs(100)
+    return jobs
+
+def run(items, hash_func):
+    n = len(items)
+    ac = ArgsContainer(hash_func=hash_func)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    ac.put_many(items)
+    t_put = time.perf_counter() - t0
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    jobs = get_all(ac)
+    t_get = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for job_id, item in jobs:
+        ac.mark_id(job_id)
+    t_mark_id = time.perf_counter() - t0
+
+    if hash_func is None:
+        t_mark = None
+    else:
+        ac = ArgsContainer(hash_func=hash_func)
+        ac.put_many(items)
+        get_all(ac)
+        t0 = time.perf_counter()
+        for item in items:
+            ac.mark(item)
+        t_mark = time.perf_counter() - t0
+    return n/t_put, n/t_get, n/t_mark_id, None if t_mark is None else n/t_mark, mem/n
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [10**5, 10**6]
+
+    print("{:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10}".format("N", "hash", "put/s", "get/s",
+                                                                 "mark_id/s", "mark/s", "mem/item"))
+    for n in ns:
+        items = make_items(n)
+        for hash_func in ['sha256', 'blake2b', None]:
+            put, get, mark_id, mark, mem = run(items, hash_func)
+            print("{:>8} {:>8} {:>10.0f} {:>10.0f} {:>10.0f} {:>10} {:>9.0f}B".format(
+                n, str(hash_func), put, get, mark_id, '-' if mark is None else "{:.0f}".format(mark), mem))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+time to fill the job_q of a JobManager_Server with N arguments
+
+    - put_arg called for each argument (the former args_from_list)
+    - args_from_list hashing in the server process (nproc=1)
+    - args_from_list hashing with a pool of nproc processes
+
+each argument is a tuple of an int and a numpy array of 64 floats
+
+usage: python bench_args_from_list.py [N, ...]   (default 10000 100000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import multiprocessing as mp
+import numpy as np
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import jobmanager
+
+def make_args(n):
+    return [(i, np.full(64, i/3)) for i in range(n)]
+
+def run(args, how, port):
+    with jobmanager.JobManager_Server(authkey         = 'bench_args_from_list',
+                                      port            = port,
+                                      fname_dump      = None,
+                                      hide_progress   = True,
+                                      show_statistics = False) as jm_server:
+        t0 = time.perf_counter()
+        if how == 'put_arg':
+            for a in args:
+                jm_server.put_arg(a)
+        else:
+            jm_server.args_from_list(args, nproc=how)
+        t = time.perf_counter() - t0
+        assert jm_server.number_of_jobs() == len(args)
+        jm_server.job_q.clear()
+    return t
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [10**4, 10**5]
+
+    port = 42700
+    print("{} cpu cores".format(mp.cpu_count()))
+    print("{:>8} {:>10} {:>10}".format("N", "method", "time"))
+    for n in ns:
+        args = make_args(n)
+        for how in ['put_arg'] + sorted({1, 4, mp.cpu_count()}):
+            port += 1
+            t = run(args, how, port)
+            label = how if how == 'put_arg' else "nproc={}".format(how)
+            print("{:>8} {:>10} {:>9.2f}s".format(n, label, t))
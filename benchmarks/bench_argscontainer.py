@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compare the storage backends of the ArgsContainer: dict (in memory), shelve and sqlite (on disk)
+
+For each number of arguments N the time is measured for
+
+    - put_many of N arguments (tuples of an int and a float)
+    - 1000 x put_items (called in every iteration of JobManager_Server.join)
+    - get_jobs and mark_id of all N arguments in chunks of 100
+    - pickle (dump the state) and unpickle (restore the state, reopen the storage)
+
+usage: python bench_argscontainer.py [N, ...]   (default 100000 1000000, 10**7 takes a while)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import pickle
+import shutil
+import tempfile
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from jobmanager.jobmanager import ArgsContainer
+
+
+def run(n, backend, tmp_dir):
+    if backend == 'dict':
+        ac = ArgsContainer()
+    else:
+        ac = ArgsContainer(path='{}/{}_{}'.format(tmp_dir, backend, n), backend=backend)
+
+    t0 = time.perf_counter()
+    ac.put_many((i, i/3) for i in range(n))
+    t1 = time.perf_counter()
+
+    for i in range(1000):
+        ac.put_items()
+    t2 = time.perf_counter()
+
+    while ac.qsize() > 0:
+        for job_id, item in ac.get_jobs(100):
+            ac.mark_id(job_id)
+    t3 = time.perf_counter()
+
+    state = pickle.dumps(ac)
+    if backend != 'dict':
+        ac.close_shelve()
+    ac2 = pickle.loads(state)
+    t4 = time.perf_counter()
+    assert ac2.put_items() == n
+    if backend != 'dict':
+        ac2.close_shelve()
+    return t1-t0, t2-t1, t3-t2, t4-t3
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [10**5, 10**6]
+
+    tmp_dir = tempfile.mkdtemp(prefix='bench_argscontainer_')
+    try:
+        print("{:>9} {:>7} {:>10} {:>14} {:>10} {:>16}".format("N", "backend", "put_many", "1000 put_items",
+                                                                "get+mark", "dump+restore"))
+        for n in ns:
+            for backend in ['dict', 'shelve', 'sqlite']:
+                t_put, t_put_items, t_get_mark, t_restore = run(n, backend, tmp_dir)
+                print("{:>9} {:>7} {:>9.2f}s {:>13.4f}s {:>9.2f}s {:>15.2f}s".format(n, backend, t_put, t_put_items,
+                                                                                     t_get_mark, t_restore))
+    finally:
+        shutil.rmtree(tmp_dir)
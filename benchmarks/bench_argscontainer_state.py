@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+memory, dump size and restore time of the job states of an ArgsContainer with N ids,
+half of them marked
+
+    - 'sets': the former representation, the sets _not_gotten_ids and _marked_ids,
+              restored as set(range(N)) - marked_ids
+    - 'table': the ArgsStateTable, a byte per id
+
+usage: python bench_argscontainer_state.py [N, ...]   (default 1000000 10000000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import pickle
+import tracemalloc
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from jobmanager.jobmanager import ArgsStateTable
+
+
+def make_sets(n):
+    return set(range(n//2, n)), set(range(n//2))
+
+def restore_sets(dump):
+    not_gotten_ids, marked_ids, n = pickle.loads(dump)
+    return set(range(n)) - marked_ids, marked_ids
+
+def make_table(n):
+    t = ArgsStateTable()
+    for i in range(n):
+        t.add()
+    for i in range(n//2):
+        t.mark(t.pop())
+    return t
+
+def run(n, kind):
+    tracemalloc.start()
+    if kind == 'sets':
+        state = make_sets(n)
+    else:
+        state = make_table(n)
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    if kind == 'sets':
+        dump = pickle.dumps(state + (n,), protocol=pickle.HIGHEST_PROTOCOL)
+        t0 = time.perf_counter()
+        restore_sets(dump)
+    else:
+        dump = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        t0 = time.perf_counter()
+        pickle.loads(dump)
+    t_restore = time.perf_counter() - t0
+    return mem, len(dump), t_restore
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [10**6, 10**7]
+
+    MB = 2**20
+    print("{:>9} {:>6} {:>10} {:>10} {:>9}".format("N", "kind", "memory", "dump", "restore"))
+    for n in ns:
+        for kind in ['sets', 'table']:
+            mem, size, t_restore = run(n, kind)
+            print("{:>9} {:>6} {:>8.1f}MB {:>8.3f}MB {:>8.3f}s".format(n, kind, mem/MB, size/MB, t_restore))
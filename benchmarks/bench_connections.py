@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+load test of the JobManager_Server transports 'manager' and 'eventloop'
+
+For each number of connections N, N client threads (each with its own connection)
+fetch arguments from the job_q and put a small result to the result_q. Reported are
+
+    - the number of threads of the server process serving the connections
+    - the time to establish all connections (one after another)
+    - the throughput of job_q.get + result_q.put pairs
+
+usage: python bench_connections.py [N, ...]   (default 10 100 500 1000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import pickle
+import resource
+import threading
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import jobmanager
+from jobmanager.jobmanager import ServerQueueManager, EventLoopProxy
+
+AUTHKEY = 'bench_connections'
+OPS_PER_CONNECTION = 20
+
+def num_threads(pid):
+    with open('/proc/{}/status'.format(pid)) as f:
+        for l in f:
+            if l.startswith('Threads:'):
+                return int(l.split()[1])
+
+def client_proxies(transport, port):
+    address = ('localhost', port)
+    authkey = bytearray(AUTHKEY, encoding='utf8')
+    if transport == 'manager':
+        m = ServerQueueManager(address=address, authkey=authkey)
+        m.connect()
+        return m.get_job_q(), m.get_result_q()
+    else:
+        return EventLoopProxy(address, authkey, 'job_q'), EventLoopProxy(address, authkey, 'result_q')
+
+def run(transport, n_conn, port):
+    with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                      port          = port,
+                                      fname_dump    = None,
+                                      hide_progress = True,
+                                      show_statistics = False,
+                                      jm_ready_callback = lambda: None,
+                                      transport     = transport) as jm_server:
+        jm_server.args_from_list(range(n_conn * OPS_PER_CONNECTION))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+        if transport == 'manager':
+            server_pid = jm_server.manager._process.pid
+        else:
+            server_pid = jm_server.eventloop_proc.pid
+        threads_idle = num_threads(server_pid)
+
+        job_q, result_q = client_proxies(transport, port)
+        go = threading.Event()
+        def client(connected):
+            # the first call establishes the connection of this thread
+            result_q.qsize()
+            connected.set()
+            go.wait()
+            for i in range(OPS_PER_CONNECTION):
+                arg = job_q.get()
+                result_q.put(pickle.dumps({'arg': arg, 'res': None, 'time': 0.}))
+
+        # connect one after another (the listen backlog of the manager is small)
+        t0 = time.perf_counter()
+        thrs = []
+        for i in range(n_conn):
+            connected = threading.Event()
+            t = threading.Thread(target=client, args=(connected,))
+            t.start()
+            connected.wait()
+            thrs.append(t)
+        t_connect = time.perf_counter() - t0
+        threads_busy = num_threads(server_pid)
+
+        t0 = time.perf_counter()
+        go.set()
+        for t in thrs:
+            t.join()
+        t_ops = time.perf_counter() - t0
+
+        # do not let the server wait for the results
+        jm_server.job_q.clear()
+    return threads_idle, threads_busy, t_connect, n_conn * OPS_PER_CONNECTION / t_ops
+
+if __name__ == "__main__":
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    threading.stack_size(256*1024)
+
+    if len(sys.argv) > 1:
+        conns = [int(a) for a in sys.argv[1:]]
+    else:
+        conns = [10, 100, 500, 1000]
+
+    port = 42600
+    print("{:>6} {:>10} {:>16} {:>10} {:>12}".format("conn", "transport", "server threads", "connect", "ops/s"))
+    for n_conn in conns:
+        for transport in ['manager', 'eventloop']:
+            port += 1
+            threads_idle, threads_busy, t_connect, ops = run(transport, n_conn, port)
+            print("{:>6} {:>10} {:>7} -> {:>5} {:>9.3f}s {:>12.1f}".format(n_conn, transport, threads_idle, threads_busy,
+                                                                            t_connect, ops))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+latency of job_q.get_job with N concurrent connections (manager transport) for a job_q
+with a single shard (ArgsContainer) and with several shards (ShardedArgsContainer)
+
+N client threads (each with its own connection) call job_q.get_job OPS_PER_CONNECTION
+times. Reported are the mean and the 99th percentile of the latency and the throughput.
+
+usage: python bench_job_q_shards.py [N, ...]   (default 1 10 50)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import threading
+import multiprocessing as mp
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import jobmanager
+from jobmanager.jobmanager import ServerQueueManager
+
+AUTHKEY = 'bench_job_q_shards'
+OPS_PER_CONNECTION = 200
+
+def run(n_shards, n_conn, port):
+    with jobmanager.JobManager_Server(authkey         = AUTHKEY,
+                                      port            = port,
+                                      fname_dump      = None,
+                                      hide_progress   = True,
+                                      show_statistics = False,
+                                      jm_ready_callback = lambda: None,
+                                      job_q_shards    = n_shards) as jm_server:
+        jm_server.args_from_list(range(n_conn * OPS_PER_CONNECTION))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+
+        m = ServerQueueManager(address=('localhost', port), authkey=bytearray(AUTHKEY, encoding='utf8'))
+        m.connect()
+        job_q = m.get_job_q()
+        go = threading.Event()
+        latencies = []
+        def client(connected):
+            # the first call establishes the connection of this thread
+            job_q.get_job()
+            connected.set()
+            go.wait()
+            lat = []
+            for i in range(OPS_PER_CONNECTION - 1):
+                t0 = time.perf_counter()
+                job_q.get_job()
+                lat.append(time.perf_counter() - t0)
+            latencies.extend(lat)
+
+        thrs = []
+        for i in range(n_conn):
+            connected = threading.Event()
+            t = threading.Thread(target=client, args=(connected,))
+            t.start()
+            connected.wait()
+            thrs.append(t)
+
+        t0 = time.perf_counter()
+        go.set()
+        for t in thrs:
+            t.join()
+        t_ops = time.perf_counter() - t0
+
+        # do not let the server wait for the results
+        jm_server.job_q.clear()
+    latencies.sort()
+    return (sum(latencies) / len(latencies), latencies[int(0.99*len(latencies))], len(latencies) / t_ops)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        conns = [int(a) for a in sys.argv[1:]]
+    else:
+        conns = [1, 10, 50]
+
+    port = 42800
+    print("{} cpu cores".format(mp.cpu_count()))
+    print("{:>6} {:>7} {:>12} {:>12} {:>10}".format("conn", "shards", "mean", "p99", "ops/s"))
+    for n_conn in conns:
+        for n_shards in [1, 4]:
+            port += 1
+            mean, p99, ops = run(n_shards, n_conn, port)
+            print("{:>6} {:>7} {:>10.3f}ms {:>10.3f}ms {:>10.1f}".format(n_conn, n_shards, mean*1000, p99*1000, ops))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+update throughput and memory of the reducers (see jobmanager.reducers) for N results, each
+a numpy array of 1000 floats, compared to keeping the results in a list (final_result)
+
+usage: python bench_reducers.py [N, ...]   (default 10000 100000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import operator
+import tracemalloc
+import numpy as np
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from jobmanager.reducers import Sum, MeanVar, MinMax, Histogram, TopK
+
+REDUCERS = {'list'     : None,
+            'Sum'      : Sum,
+            'MeanVar'  : MeanVar,
+            'MinMax'   : MinMax,
+            'Histogram': lambda: Histogram(100, (-5, 5)),
+            'TopK'     : lambda: TopK(10, key=operator.itemgetter(0))}
+
+def run(n, kind):
+    rng = np.random.default_rng(0)
+    results = [rng.normal(size=1000) for i in range(100)]
+    tracemalloc.start()
+    final_result = []
+    reducer = None if REDUCERS[kind] is None else REDUCERS[kind]()
+    t0 = time.perf_counter()
+    for i in range(n):
+        # a new array per result as received from a client
+        res = results[i % 100].copy()
+        if reducer is None:
+            final_result.append((i, res))
+        elif kind == 'TopK':
+            reducer.update((res[0], i))
+        else:
+            reducer.update(res)
+    t = time.perf_counter() - t0
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return n/t, mem
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [10**4, 10**5]
+
+    MB = 2**20
+    print("{:>7} {:>10} {:>10} {:>10}".format("N", "reducer", "updates/s", "memory"))
+    for n in ns:
+        for kind in REDUCERS:
+            ups, mem = run(n, kind)
+            print("{:>7} {:>10} {:>10.0f} {:>8.2f}MB".format(n, kind, ups, mem/MB))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+time of JobManager_Server.join to ingest N results, without (serial) and with the
+ResultPipeline (result_pipeline, 1 and 4 callback workers)
+
+The result_q is filled beforehand with zlib compressed batches of 10 results (as send by a
+client with result_compression='zlib'), each result holds a numpy array of 1000 floats.
+process_new_result takes about 0.5ms waiting (e.g. writing to disk).
+
+usage: python bench_result_pipeline.py [N, ...]   (default 2000 10000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import pickle
+import numpy as np
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import jobmanager
+from jobmanager.jobmanager import pack_result_batch, compress_result
+
+BATCH = 10
+
+class Server(jobmanager.JobManager_Server):
+    def process_new_result(self, arg, result):
+        time.sleep(0.0005)
+
+def run(n, how, port):
+    kwargs = {}
+    if how != 'serial':
+        kwargs = {'result_pipeline': True, 'result_callback_workers': how}
+    with Server(authkey         = 'bench_result_pipeline',
+                port            = port,
+                fname_dump      = None,
+                hide_progress   = True,
+                show_statistics = False,
+                **kwargs) as jm_server:
+        jm_server.args_from_list(range(n))
+        jobs = jm_server.job_q.get_jobs(n)
+        for i in range(0, n, BATCH):
+            batch = [pickle.dumps({'arg': arg, 'res': np.full(1000, arg/3), 'time': 0.01, 'id': job_id})
+                     for job_id, arg in jobs[i:i+BATCH]]
+            jm_server.result_q.put(compress_result(pack_result_batch(batch)))
+        # do not wait before the clean up
+        jm_server._JobManager_Server__wait_before_stop = 0
+        t0 = time.perf_counter()
+        jm_server.join()
+        t = time.perf_counter() - t0
+        assert jm_server.job_q.marked_items() == n
+    return t
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [2000, 10000]
+
+    port = 42900
+    print("{:>7} {:>10} {:>9} {:>12}".format("N", "mode", "time", "results/s"))
+    for n in ns:
+        for how in ['serial', 1, 4]:
+            port += 1
+            t = run(n, how, port)
+            label = how if how == 'serial' else "pipe({})".format(how)
+            print("{:>7} {:>10} {:>8.2f}s {:>12.0f}".format(n, label, t, n/t))
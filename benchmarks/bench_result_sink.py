@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+write N results (a numpy array of 1000 floats each) to a ResultSink and read them back
+
+    - memory held by the results kept in a list (final_result) compared to the sink
+    - append throughput of the sink for the fsync policies None, 'segment' and 1 (second)
+    - ResultSinkReader: iterating over all results and random access by argument
+
+usage: python bench_result_sink.py [N, ...]   (default 10000 100000)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+import numpy as np
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from jobmanager.jobmanager import ResultSink, ResultSinkReader
+
+def result(i):
+    return np.full(1000, i/3)
+
+def mem_list(n):
+    tracemalloc.start()
+    final_result = []
+    for i in range(n):
+        final_result.append((i, result(i)))
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return mem
+
+def write(name, n, fsync):
+    tracemalloc.start()
+    sink = ResultSink(name, max_segment_size=2**28, fsync=fsync)
+    t0 = time.perf_counter()
+    for i in range(n):
+        sink.append(i, result(i))
+    sink.close()
+    t = time.perf_counter() - t0
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return t, mem
+
+def read(name, n):
+    reader = ResultSinkReader(name)
+    t0 = time.perf_counter()
+    for arg, res in reader:
+        pass
+    t_iter = time.perf_counter() - t0
+    args = random.sample(range(n), min(n, 10000))
+    t0 = time.perf_counter()
+    for arg in args:
+        reader[arg]
+    t_get = (time.perf_counter() - t0) / len(args)
+    reader.close()
+    return t_iter, t_get
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ns = [int(float(a)) for a in sys.argv[1:]]
+    else:
+        ns = [10**4, 10**5]
+
+    MB = 2**20
+    for n in ns:
+        print("N={}: final_result list holds {:.1f}MB".format(n, mem_list(n)/MB))
+        for fsync in [None, 'segment', 1]:
+            with tempfile.TemporaryDirectory() as d:
+                name = d + '/res'
+                t, mem = write(name, n, fsync)
+                line = "  fsync={:<8} append {:>8.0f}/s ({:.1f}MB held)".format(str(fsync), n/t, mem/MB)
+                if fsync is None:
+                    t_iter, t_get = read(name, n)
+                    line += ", iterate {:.0f}/s, random get {:.3f}ms".format(n/t_iter, t_get*1000)
+                print(line)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compare the transport of large numpy results for the client option
+result_transport='pickle' and result_transport='oob'
+
+For each result size and transport ('manager', 'eventloop') a server and a client
+(a single worker) process N_JOBS jobs, each returning an array of the given size.
+The results take the whole way from the worker through the local result queue, the
+forwarding thread, the proxy and the server process to the result_q read by join.
+Reported are
+
+    - the throughput seen by the server, from the first to the last result
+    - the maximal resident set size of the server process running join
+
+usage: python bench_result_transport.py [size in MB, ...]   (default 1 10 100)
+"""
+from __future__ import division, print_function
+
+from os.path import dirname, abspath
+import sys
+import time
+import resource
+import multiprocessing as mp
+import numpy as np
+
+# Add parent directory to beginning of path variable
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import jobmanager
+from jobmanager.jobmanager import humanize_size
+
+AUTHKEY = 'bench_result_transport'
+N_JOBS = 10
+
+class BenchClient(jobmanager.JobManager_Client):
+    @staticmethod
+    def func(arg, const_arg):
+        return np.full(const_arg, arg, dtype=np.float64)
+
+class BenchServer(jobmanager.JobManager_Server):
+    def process_new_result(self, arg, result):
+        now = time.perf_counter()
+        if self.t_first is None:
+            self.t_first = now
+        self.t_last = now
+        assert result[0] == arg
+        # the arrays received are writable
+        result[0] = 0
+
+def start_client(port, transport, result_transport):
+    BenchClient(server='localhost', authkey=AUTHKEY, port=port, nproc=1, hide_progress=True,
+                transport=transport, result_transport=result_transport).start()
+
+def run(size_in_MB, transport, result_transport, port, conn):
+    n = int(size_in_MB * 2**20 / 8)
+    with BenchServer(authkey         = AUTHKEY,
+                     port            = port,
+                     const_arg       = n,
+                     fname_dump      = None,
+                     hide_progress   = True,
+                     show_statistics = False,
+                     transport       = transport) as jm_server:
+        jm_server.t_first = None
+        jm_server.args_from_list(range(1, N_JOBS + 1))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+        p_client = mp.Process(target=start_client, args=(port, transport, result_transport))
+        p_client.start()
+        jm_server.join()
+    p_client.join()
+    dt = jm_server.t_last - jm_server.t_first
+    # the first result is not part of the interval
+    conn.send(((N_JOBS - 1) * n * 8 / dt, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [float(a) for a in sys.argv[1:]]
+    else:
+        sizes = [1, 10, 100]
+
+    port = 42700
+    print("{:>8} {:>10} {:>7} {:>12} {:>12}".format("size", "transport", "mode", "throughput", "server RSS"))
+    for size in sizes:
+        for transport in ['manager', 'eventloop']:
+            for result_transport in ['pickle', 'oob']:
+                port += 1
+                conn_r, conn_s = mp.Pipe(duplex=False)
+                # a fresh process for each run, so that the maximal RSS is that of the run
+                p = mp.Process(target=run, args=(size, transport, result_transport, port, conn_s))
+                p.start()
+                speed, rss = conn_r.recv()
+                p.join()
+                print("{:>6}MB {:>10} {:>7} {:>10}/s {:>12}".format(size, transport, result_transport,
+                                                                   humanize_size(speed / 1024),
+                                                                   humanize_size(rss / 1024)))
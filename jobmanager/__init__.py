@@ -34,4 +34,5 @@ from .jobmanager import *
 
 from . import clients
 from . import servers
+from . import reducers
 from . import ode_wrapper
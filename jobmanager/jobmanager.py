@@ -28,12 +28,19 @@ following tasks:
 The class JobManager_Client
   
 """
+import array
+import asyncio
+import concurrent.futures
+import collections
+import contextlib
 import copy
 #import ctypes
 from datetime import datetime
 #import inspect
 import multiprocessing as mp
 from multiprocessing.managers import BaseManager, RemoteError
+from multiprocessing.connection import wait as mp_wait
+from multiprocessing.util import Finalize, register_after_fork
 import subprocess
 import os
 import pickle
@@ -42,17 +49,30 @@ import socket
 import sys
 
 import random
+import math
 import time
 import traceback
 import warnings
+import weakref
 import binfootprint as bf
 import pathlib
 import progression as progress
 import shelve
+import sqlite3
+import statistics
+import glob
 import hashlib
+import heapq
+import hmac
+import importlib
+import itertools
 import logging
 import threading
 import ctypes
+import struct
+import zlib
+import lzma
+import bz2
 from shutil import rmtree
 from .signalDelay import sig_delay
 
@@ -94,6 +114,175 @@ def humanize_size(size_in_bytes):
         i += 1
     return "{:.4g}{}B".format(size_in_bytes, units[i])
 
+# the size of the shared buffer of the info line shown next to the progress bar
+INFO_LINE_BYTES = 256
+
+def set_info_line(info_line, text):
+    """set the value of a shared info line, truncated to fit its buffer of INFO_LINE_BYTES"""
+    info_line.value = text.encode('utf-8')[:INFO_LINE_BYTES-1]
+
+# marks a result_q item which holds several pickled results (see pack_result_batch)
+RESULT_BATCH_MAGIC = b'#JMB'
+
+def pack_result_batch(data_list):
+    """frame a list of pickled results as a single bytes object
+
+    layout: magic, number of results n (uint32), n lengths (uint64), the results
+    """
+    n = len(data_list)
+    header = struct.pack('<4sI{}Q'.format(n), RESULT_BATCH_MAGIC, n, *[len(d) for d in data_list])
+    return b''.join([header] + data_list)
+
+def unpack_result_batch(bin_data):
+    """yield the pickled results contained in a result_q item
+
+    items not framed by pack_result_batch are considered a single result,
+    the results of a batch are yielded as memoryview slices (no copy)
+    """
+    if bin_data[:4] != RESULT_BATCH_MAGIC:
+        yield bin_data
+        return
+    n, = struct.unpack_from('<I', bin_data, 4)
+    lengths = struct.unpack_from('<{}Q'.format(n), bin_data, 8)
+    offset = 8 + 8*n
+    mv = memoryview(bin_data)
+    for l in lengths:
+        yield mv[offset:offset+l]
+        offset += l
+
+# marks the frames of a result joined into a single buffer (see join_result_frames)
+RESULT_OOB_MAGIC = b'#JMO'
+# the frames of an out-of-band pickled result start at multiples of this value
+RESULT_OOB_ALIGN = 64
+
+def _oob_frame_offsets(header_len, lengths):
+    offsets = []
+    offset = header_len
+    for l in lengths:
+        offset = -(-offset // RESULT_OOB_ALIGN) * RESULT_OOB_ALIGN
+        offsets.append(offset)
+        offset += l
+    return offsets, offset
+
+def dumps_result_frames(obj):
+    """pickle obj with protocol 5 passing large buffers (e.g. numpy arrays) out-of-band
+
+    Returns the list of frames, the pickle stream followed by the raw buffers (memoryviews
+    of the memory of obj, not copied). A frame list of a single frame is a plain pickle.
+    The frames are send as separate buffers (see FrameQueue.put_frames, EventLoopProxy.put_frames),
+    loads_result reverses.
+    """
+    buffers = []
+    stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return [stream] + [b.raw() for b in buffers]
+
+def join_result_frames(frames):
+    """join the frames of a result (see dumps_result_frames) into a single bytes object
+
+    Used where a result has to be a single buffer (compression, the manager transport and
+    the journal), layout: magic, number of frames n (uint32), n frame lengths (uint64), the
+    frames (each aligned to RESULT_OOB_ALIGN bytes).
+    """
+    n = len(frames)
+    lengths = [memoryview(f).nbytes for f in frames]
+    header = struct.pack('<4sI{}Q'.format(n), RESULT_OOB_MAGIC, n, *lengths)
+    offsets, _ = _oob_frame_offsets(len(header), lengths)
+    pieces = [header]
+    end = len(header)
+    for f, offset, l in zip(frames, offsets, lengths):
+        pieces.append(bytes(offset - end))
+        pieces.append(f)
+        end = offset + l
+    return b''.join(pieces)
+
+def dumps_result_oob(obj):
+    """pickle obj with out-of-band buffers into a single bytes object (see join_result_frames)"""
+    return join_result_frames(dumps_result_frames(obj))
+
+def loads_result(bin_data):
+    """unpickle a result as send by the client
+
+    bin_data is either a list of frames (see dumps_result_frames), a plain pickle or the
+    frames joined by join_result_frames. Out-of-band buffers are not copied, numpy arrays
+    reference the memory of the frames (of bin_data), they are writable if the frames are
+    (e.g. a bytearray as returned by FrameQueue.get).
+    """
+    if isinstance(bin_data, list):
+        return pickle.loads(bin_data[0], buffers=bin_data[1:])
+    if bin_data[:4] != RESULT_OOB_MAGIC:
+        return pickle.loads(bin_data)
+    n, = struct.unpack_from('<I', bin_data, 4)
+    lengths = struct.unpack_from('<{}Q'.format(n), bin_data, 8)
+    offsets, _ = _oob_frame_offsets(8 + 8*n, lengths)
+    mv = memoryview(bin_data)
+    frames = [mv[offset:offset+l] for offset, l in zip(offsets, lengths)]
+    return pickle.loads(frames[0], buffers=frames[1:])
+
+def result_nbytes(bin_data):
+    """the size of a result (or result_q item) given as buffer or as list of frames"""
+    if isinstance(bin_data, list):
+        return sum(memoryview(f).nbytes for f in bin_data)
+    return len(bin_data)
+
+def result_bytes(bin_data):
+    """a result given as buffer or as list of frames as bytes object (see join_result_frames)"""
+    if isinstance(bin_data, list):
+        return join_result_frames(bin_data)
+    return bytes(bin_data)
+
+# marks a result_q item which holds the frames of several results (see pack_result_frames)
+RESULT_FRAMES_MAGIC = b'#JMF'
+
+def pack_result_frames(data_list):
+    """the frames of a list of results (each a buffer or a list of frames) as a single list
+
+    The first frame describes the others, layout: magic, number of results n (uint32),
+    the number of frames of each result (n uint32). The frames are not copied.
+    """
+    frames_list = [d if isinstance(d, list) else [d] for d in data_list]
+    n = len(frames_list)
+    header = struct.pack('<4sI{}I'.format(n), RESULT_FRAMES_MAGIC, n, *[len(f) for f in frames_list])
+    return [header] + [f for frames in frames_list for f in frames]
+
+def unpack_result_frames(frames):
+    """yield the frame lists of the results packed by pack_result_frames"""
+    if bytes(frames[0][:4]) != RESULT_FRAMES_MAGIC:
+        raise ValueError("not a list of frames packed by pack_result_frames")
+    n, = struct.unpack_from('<I', frames[0], 4)
+    counts = struct.unpack_from('<{}I'.format(n), frames[0], 8)
+    i = 1
+    for c in counts:
+        yield frames[i:i+c]
+        i += c
+
+# marks a compressed result_q item (see compress_result)
+RESULT_COMPRESSED_MAGIC = b'#JMZ'
+# codec name -> (codec id, compress, decompress)
+RESULT_COMPRESSION_CODECS = {'zlib': (1, lambda d, l: zlib.compress(d, 6 if l is None else l), zlib.decompress),
+                             'lzma': (2, lambda d, l: lzma.compress(d, preset=l), lzma.decompress),
+                             'bz2' : (3, lambda d, l: bz2.compress(d, 9 if l is None else l), bz2.decompress)}
+
+def compress_result(bin_data, codec='zlib', level=None):
+    """compress a result_q item
+
+    layout: magic, codec id (uint8), length of the uncompressed data (uint64), the compressed data
+    """
+    codec_id, compress, _ = RESULT_COMPRESSION_CODECS[codec]
+    return struct.pack('<4sBQ', RESULT_COMPRESSED_MAGIC, codec_id, len(bin_data)) + compress(bin_data, level)
+
+def decompress_result(bin_data):
+    """reverse compress_result, items not compressed are returned unchanged"""
+    if bin_data[:4] != RESULT_COMPRESSED_MAGIC:
+        return bin_data
+    _, codec_id, raw_len = struct.unpack_from('<4sBQ', bin_data)
+    for c_id, _, decompress in RESULT_COMPRESSION_CODECS.values():
+        if c_id == codec_id:
+            raw_data = decompress(memoryview(bin_data)[13:])
+            if len(raw_data) != raw_len:
+                raise ValueError("decompressed result has {} bytes, expected {}".format(len(raw_data), raw_len))
+            return raw_data
+    raise ValueError("unknown compression codec id {}".format(codec_id))
+
 def get_user():
     out = subprocess.check_output('id -un', shell=True).decode().strip()
     return out
@@ -160,6 +349,417 @@ def parse_nproc(nproc):
     return n
 
 
+# header of an item of a FrameQueue: kind (0: a single buffer, 1: a list of frames), number of frames
+FRAME_QUEUE_HEADER = struct.Struct('<BI')
+
+class FrameQueue(object):
+    """a multiprocessing queue of buffers, used for the result queues
+
+    Like multiprocessing.Queue, put hands the item to a feeder thread and returns. Instead of
+    pickling the item, the feeder thread writes a header (the lengths of the frames) and then
+    each frame as it is to a socket, so a large buffer (e.g. the memory of a numpy array, see
+    dumps_result_frames) is neither pickled nor joined with other frames. get reads each frame
+    into a bytearray of its own, arrays unpickled from such frames are writable.
+
+    put puts a single buffer, get returns it as bytearray, put_frames puts a list of buffers,
+    get returns them as list of bytearrays.
+    """
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        self._rlock = mp.Lock()
+        self._wlock = mp.Lock()
+        self._size = mp.Value('q', 0)
+        self._after_fork()
+        register_after_fork(self, FrameQueue._after_fork)
+
+    def __getstate__(self):
+        mp.context.assert_spawning(self)
+        return (self._reader, self._writer, self._rlock, self._wlock, self._size)
+
+    def __setstate__(self, state):
+        self._reader, self._writer, self._rlock, self._wlock, self._size = state
+        self._after_fork()
+        register_after_fork(self, FrameQueue._after_fork)
+
+    def _after_fork(self):
+        # the feeder thread of the parent process does not exist here
+        self._notempty = threading.Condition(threading.Lock())
+        self._buffer = collections.deque()
+        self._thread = None
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=FrameQueue._feed,
+                                        args=(self._buffer, self._notempty, self._writer, self._wlock))
+        self._thread.daemon = True
+        self._thread.start()
+        # at exit the items put so far are written before the process ends (as multiprocessing.Queue does)
+        Finalize(self, FrameQueue._finalize_close, [self._buffer, self._notempty], exitpriority=10)
+        Finalize(self._thread, FrameQueue._finalize_join, [weakref.ref(self._thread)], exitpriority=-5)
+
+    @staticmethod
+    def _finalize_close(buffer, notempty):
+        with notempty:
+            buffer.append(None)
+            notempty.notify()
+
+    @staticmethod
+    def _finalize_join(twr):
+        thread = twr()
+        if thread is not None:
+            thread.join()
+
+    @staticmethod
+    def _feed(buffer, notempty, writer, wlock):
+        while True:
+            with notempty:
+                while not buffer:
+                    notempty.wait()
+                item = buffer.popleft()
+            if item is None:
+                return
+            kind, frames = item
+            try:
+                lengths = [memoryview(f).nbytes for f in frames]
+                header = FRAME_QUEUE_HEADER.pack(kind, len(frames)) + struct.pack('<{}Q'.format(len(frames)), *lengths)
+                with wlock:
+                    writer.sendall(header)
+                    for f in frames:
+                        writer.sendall(f)
+            except Exception:
+                log.error("FrameQueue feeder thread failed to write an item")
+                log.info(traceback.format_exc())
+            del item, frames
+
+    def _put(self, kind, frames):
+        with self._size.get_lock():
+            self._size.value += 1
+        with self._notempty:
+            if self._thread is None:
+                self._start_thread()
+            self._buffer.append((kind, frames))
+            self._notempty.notify()
+
+    def put(self, data):
+        self._put(0, [data])
+
+    def put_frames(self, frames):
+        self._put(1, list(frames))
+
+    def _recv_into(self, buf):
+        view = memoryview(buf)
+        while view.nbytes > 0:
+            k = self._reader.recv_into(view)
+            if k == 0:
+                raise EOFError
+            view = view[k:]
+
+    def _recv(self):
+        header = bytearray(FRAME_QUEUE_HEADER.size)
+        self._recv_into(header)
+        kind, n = FRAME_QUEUE_HEADER.unpack(header)
+        lengths = bytearray(8*n)
+        self._recv_into(lengths)
+        frames = []
+        for l in struct.unpack('<{}Q'.format(n), lengths):
+            frame = bytearray(l)
+            self._recv_into(frame)
+            frames.append(frame)
+        with self._size.get_lock():
+            self._size.value -= 1
+        return frames[0] if kind == 0 else frames
+
+    def get(self, block=True, timeout=None):
+        if block and (timeout is None):
+            with self._rlock:
+                return self._recv()
+        if not block:
+            timeout = 0
+        t_end = time.perf_counter() + timeout
+        if not self._rlock.acquire(True, timeout):
+            raise queue.Empty
+        try:
+            # once the header arrived the frames follow (written at once by the feeder thread)
+            if not mp_wait([self._reader], max(t_end - time.perf_counter(), 0)):
+                raise queue.Empty
+            return self._recv()
+        finally:
+            self._rlock.release()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        """the number of items put but not gotten yet (including those not written by the feeder thread yet)"""
+        return self._size.value
+
+    def empty(self):
+        return not mp_wait([self._reader], 0)
+
+
+class LocalResultQueueLimit(object):
+    """bounds the results pending in the local result queue of a JobManager_Client
+
+    The worker processes call acquire before putting a result to the local result queue
+    which blocks until the number of pending results is below max_items and their
+    size is below max_bytes. An empty queue accepts any result, regardless of its size.
+    The thread forwarding the results to the server calls release once the results
+    have been send, and close when it stops, from then on acquire does not block
+    anymore (the results left in the local result queue are dumped at shutdown).
+    """
+    def __init__(self, max_items, max_bytes=None, poll_interval=1):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        # the waiting workers check every poll_interval seconds whether the limit was closed
+        self.poll_interval = poll_interval
+        self.cond = mp.Condition()
+        self._items = mp.RawValue('L', 0)
+        self._bytes = mp.RawValue('Q', 0)
+        self._closed = mp.RawValue('b', 0)
+
+    def _has_space(self):
+        if self._items.value == 0:
+            return True
+        if self._items.value >= self.max_items:
+            return False
+        return (self.max_bytes is None) or (self._bytes.value < self.max_bytes)
+
+    def acquire(self, nbytes):
+        """reserve space for a result of size nbytes
+
+        returns the time spent waiting for space to become available
+        """
+        t0 = time.perf_counter()
+        with self.cond:
+            while not (self._closed.value or self._has_space()):
+                self.cond.wait(timeout=self.poll_interval)
+            self._items.value += 1
+            self._bytes.value += nbytes
+        return time.perf_counter() - t0
+
+    def release(self, items, nbytes):
+        with self.cond:
+            self._items.value -= items
+            self._bytes.value -= nbytes
+            self.cond.notify_all()
+
+    def close(self):
+        """no result will be released anymore, wake up the workers waiting"""
+        with self.cond:
+            self._closed.value = 1
+            self.cond.notify_all()
+
+    def closed(self):
+        return bool(self._closed.value)
+
+    def items(self):
+        return self._items.value
+
+    def bytes(self):
+        return self._bytes.value
+
+
+class ResultCompressor(object):
+    """decides whether to compress a result_q item before it is send to the server
+
+    In adaptive mode the compression ratio, the compression speed and the wire speed
+    (as measured by the forwarding thread) are tracked as exponential moving averages.
+    An item is compressed if the time to compress it plus the time to send the compressed
+    data is expected to be less than the time to send the raw data. While compression does
+    not pay off, every probe_interval-th item is compressed anyway to keep the estimates
+    up to date. Items smaller than min_bytes are not considered worth compressing.
+    If adaptive is False, every item is compressed.
+    """
+    def __init__(self, codec='zlib', level=None, adaptive=True, min_bytes=1024, probe_interval=16, alpha=0.2):
+        if codec not in RESULT_COMPRESSION_CODECS:
+            raise ValueError("unknown compression codec '{}', use one of {}".format(codec, sorted(RESULT_COMPRESSION_CODECS)))
+        self.codec = codec
+        self.level = level
+        self.adaptive = adaptive
+        self.min_bytes = min_bytes
+        self.probe_interval = probe_interval
+        self.alpha = alpha
+        self.ratio = None         # compressed size / raw size
+        self.compress_speed = None  # raw bytes / s
+        self.wire_speed = None    # bytes / s
+        self._cnt_skipped = 0
+
+    def _ema(self, old, new):
+        if old is None:
+            return new
+        return (1 - self.alpha) * old + self.alpha * new
+
+    def update_wire_speed(self, nbytes, dt):
+        if dt > 0:
+            self.wire_speed = self._ema(self.wire_speed, nbytes / dt)
+
+    def pays_off(self):
+        if (self.ratio is None) or (self.compress_speed is None) or (self.wire_speed is None):
+            return True
+        # raw/compress_speed + raw*ratio/wire_speed < raw/wire_speed
+        return 1 / self.compress_speed < (1 - self.ratio) / self.wire_speed
+
+    def __call__(self, bin_data):
+        """return the item to send, either bin_data or its compressed version"""
+        if self.adaptive:
+            if len(bin_data) < self.min_bytes:
+                return bin_data
+            if not self.pays_off():
+                self._cnt_skipped += 1
+                if self._cnt_skipped < self.probe_interval:
+                    return bin_data
+        self._cnt_skipped = 0
+        t0 = time.perf_counter()
+        c_data = compress_result(bin_data, self.codec, self.level)
+        dt = time.perf_counter() - t0
+        self.ratio = self._ema(self.ratio, len(c_data) / len(bin_data))
+        if dt > 0:
+            self.compress_speed = self._ema(self.compress_speed, len(bin_data) / dt)
+        if len(c_data) >= len(bin_data):
+            return bin_data
+        return c_data
+
+
+class PrefetchQueue(object):
+    """local queue of arguments fetched from the job_q in advance (see JobManager_Client, prefetch)
+
+    A fetcher thread in the client process puts the arguments (put) and the worker processes
+    get them (get). When the job_q has been found empty (or closed), the fetcher calls finish
+    and get raises queue.Empty (or ContainerClosedError) in every worker once the arguments
+    are used up.
+
+    The number of arguments to keep (target_depth) follows from the round trip time of a
+    fetch (reported by the fetcher via update_rtt) and the average time of a single job
+    (reported by the workers via job_done): while a fetch is pending the nproc workers should
+    not run out of arguments.
+    """
+    def __init__(self, nproc, max_depth, alpha=0.2):
+        self.nproc = nproc
+        self.max_depth = max_depth
+        self.alpha = alpha
+        self.q = mp.Queue()
+        self.cond = mp.Condition()
+        self._items = mp.RawValue('L', 0)
+        self._time_calc = mp.RawValue('d', 0)
+        self._jobs = mp.RawValue('L', 0)
+        self.rtt = None
+
+    def put(self, arg):
+        with self.cond:
+            self._items.value += 1
+        self.q.put(('#ARG', arg))
+
+    def finish(self, reason='#EMPTY'):
+        self.q.put((reason, None))
+
+    def get(self, stop=None):
+        """get an argument, if stop (a threading.Event) is given, raise SystemExit once it is set"""
+        if stop is None:
+            kind, arg = self.q.get()
+        else:
+            while True:
+                try:
+                    kind, arg = self.q.get(timeout=0.2)
+                    break
+                except queue.Empty:
+                    if stop.is_set():
+                        raise SystemExit
+        if kind != '#ARG':
+            # leave the marker for the other workers
+            self.q.put((kind, arg))
+            if kind == '#CLOSED':
+                raise ContainerClosedError
+            raise queue.Empty
+        with self.cond:
+            self._items.value -= 1
+            self.cond.notify_all()
+        return arg
+
+    def job_done(self, time_calc):
+        with self.cond:
+            self._time_calc.value += time_calc
+            self._jobs.value += 1
+
+    def items(self):
+        return self._items.value
+
+    def update_rtt(self, dt):
+        if self.rtt is None:
+            self.rtt = dt
+        else:
+            self.rtt = (1 - self.alpha) * self.rtt + self.alpha * dt
+
+    def target_depth(self):
+        if (self.rtt is None) or (self._jobs.value == 0):
+            return self.nproc
+        time_job = self._time_calc.value / self._jobs.value
+        if time_job <= 0:
+            return self.max_depth
+        # one argument per worker plus what the workers use up during a fetch
+        depth = self.nproc + math.ceil(self.nproc * self.rtt / time_job)
+        return min(depth, self.max_depth)
+
+    def wait_for_space(self, timeout):
+        """wait until less than target_depth arguments are pending, returns the number missing"""
+        with self.cond:
+            self.cond.wait_for(lambda: self._items.value < self.target_depth(), timeout=timeout)
+            return self.target_depth() - self._items.value
+
+    def drain(self, timeout=1):
+        """return the arguments not processed so far (only once the fetcher has stopped)"""
+        args = []
+        while self._items.value > 0:
+            try:
+                kind, arg = self.q.get(timeout=timeout)
+            except queue.Empty:
+                log.warning("%s prefetched argument(s) got lost", self._items.value)
+                break
+            if kind == '#ARG':
+                args.append(arg)
+                with self.cond:
+                    self._items.value -= 1
+        return args
+
+
+class WorkerThreadState(object):
+    """state of a worker thread shared with the main thread of its worker process
+
+    When the worker process receives SIGTERM, the main thread sets stop and hands back
+    the arguments (their job ids) of the threads busy with the calculation (abandon), these
+    threads discard their result. The other threads stop on their own, reinserting their
+    argument if needed.
+    """
+    def __init__(self, stop):
+        self.stop = stop
+        self.lock = threading.Lock()
+        self.job_id = None
+        self.computing = False
+        self.abandoned = False
+
+    def start_computing(self, job_id):
+        """returns False if the thread should stop instead"""
+        with self.lock:
+            if self.stop.is_set():
+                return False
+            self.job_id = job_id
+            self.computing = True
+            return True
+
+    def stop_computing(self):
+        """returns False if the argument has been abandoned meanwhile"""
+        with self.lock:
+            self.computing = False
+            self.job_id = None
+            return not self.abandoned
+
+    def abandon(self):
+        """returns the job id of the thread as list, if the thread is busy with the calculation"""
+        with self.lock:
+            if not self.computing:
+                return []
+            self.abandoned = True
+            return [self.job_id]
+
+
 class JobManager_Client(object):
     """
     Calls the functions self.func with arguments fetched from the job_q.
@@ -214,7 +814,24 @@ class JobManager_Client(object):
                  ask_on_sigterm          = True,
                  nthreads                = 1,
                  status_output_for_srun  = False,
-                 emtpy_lines_at_end      = 0):
+                 emtpy_lines_at_end      = 0,
+                 fetch_batch_size        = 1,
+                 result_batch_max_items  = 256,
+                 result_batch_max_bytes  = 2**25,
+                 result_batch_linger     = 0,
+                 local_result_q_max_items = None,
+                 local_result_q_max_bytes = None,
+                 result_transport        = 'pickle',
+                 result_compression      = None,
+                 result_compression_level = None,
+                 result_compression_adaptive = True,
+                 prefetch                = False,
+                 prefetch_max_depth      = None,
+                 worker_mode             = 'process',
+                 worker_threads          = 2,
+                 transport               = 'manager',
+                 fast_start              = False,
+                 preload_modules         = ()):
         """
         server [string] - ip address or hostname where the JobManager_Server is running
         
@@ -235,7 +852,7 @@ class JobManager_Client(object):
 
         nthreads, MLK threads for each subprocess
         
-        njobs [integer] - total number of jobs to run per process
+        njobs [integer] - total number of jobs to run per process (per thread, see worker_mode)
         
             negative integer or zero: run until there are no more jobs
             
@@ -250,6 +867,62 @@ class JobManager_Client(object):
         verbose [int] - 0: quiet, 1: status only, 2: debug messages
 
         timeout [int] - second until client stops automaticaly, if negative, do not start at all
+
+        fetch_batch_size [int] - number of arguments each subprocess fetches from the job_q
+        with a single call (get_many), the arguments are processed one after another
+            'auto': the server chooses the number of arguments (get_chunk) from the runtime of
+                    a single job and the round trip time of the previous call (see ChunkSizer)
+
+        result_batch_max_items [int], result_batch_max_bytes [int], result_batch_linger [float] -
+        the results pending in the local result queue are send to the server as a single batch
+        of at most result_batch_max_items results (but at least one) with a total size of at most
+        result_batch_max_bytes (approximately), after the first result of a batch arrived wait
+        at most result_batch_linger seconds for further results
+
+        local_result_q_max_items [int], local_result_q_max_bytes [int] - a worker blocks
+        when putting a result to the local result queue, as long as the results not send to
+        the server yet exceed one of these limits (default: one item per worker, no limit on the size),
+        the time spent waiting counts as communication time
+
+        result_transport [string] - how a result is serialized
+            'pickle': plain pickle
+            'oob': pickle protocol 5 with out-of-band buffers (see dumps_result_frames), with
+                   transport 'eventloop' and without result_compression the memory of large numpy
+                   arrays is written to the connection as it is, neither pickled nor joined with
+                   the rest of the result, otherwise the frames of a result are joined into a
+                   single buffer (see join_result_frames)
+            in any case the arrays received by the server are writable
+
+        result_compression [string] - compress the data send to the server using one of the
+        codecs 'zlib', 'lzma' or 'bz2' (default None: no compression)
+        result_compression_level [int] - compression level passed to the codec (None: codec default)
+        result_compression_adaptive [bool] - compress only if it pays off, i.e., if compressing
+        and sending the smaller data is expected to be faster than sending the raw data
+        (see ResultCompressor)
+
+        prefetch [bool] - if True, a single thread of the client process fetches the arguments
+        for all subprocesses in advance (see PrefetchQueue), so the subprocesses do not wait
+        for the server, the number of arguments kept is adjusted to the time a fetch takes
+        compared to the time of a single job, the arguments are fetched with a single call
+        (get_many) of as many arguments as missing, so fetch_batch_size is ignored, except
+        for 'auto' where the server may hand out fewer arguments (get_chunk)
+        prefetch_max_depth [int] - maximum number of arguments to keep (default: 16*nproc)
+
+        worker_mode [string] - how the workers calling func are run
+            'process': nproc subprocesses
+            'thread': nproc threads within a single subprocess, suitable if func spends most of
+                      its time in code releasing the GIL (e.g. numpy), the threads share const_arg
+            'hybrid': nproc subprocesses each running worker_threads threads
+        with more than one thread per subprocess prefetch is always enabled and the progress
+        information set by func (c, m) is not shown
+        worker_threads [int] - number of threads per subprocess in 'hybrid' mode
+
+        transport [string] - must match the transport of the JobManager_Server ('manager' or 'eventloop')
+
+        fast_start [bool] - start all subprocesses at once (fork) and wait until each of them reports
+        to be ready (signal handlers set up), instead of pausing 0.1s after each start
+        preload_modules [list of str] - modules imported by the client before the subprocesses are
+        started, the subprocesses inherit them and do not need to import them on their own
         
         DO NOT SIGTERM CLIENT TOO ERLY, MAKE SURE THAT ALL SIGNAL HANDLERS ARE UP (see log at debug level)
         """
@@ -313,7 +986,19 @@ class JobManager_Client(object):
         self.nice = nice
         log.debug("nice:%s", self.nice)
         self.nproc = parse_nproc(nproc)
+        if worker_mode == 'process':
+            self.worker_threads = 1
+        elif worker_mode == 'thread':
+            self.worker_threads = self.nproc
+            self.nproc = 1
+        elif worker_mode == 'hybrid':
+            self.worker_threads = worker_threads
+        else:
+            raise ValueError("unknown worker_mode '{}', use 'process', 'thread' or 'hybrid'".format(worker_mode))
         log.debug("nproc:%s", self.nproc)
+        log.debug("worker_threads:%s", self.worker_threads)
+        # total number of workers
+        self.nworkers = self.nproc * self.worker_threads
 
         self.nthreads = nthreads
 
@@ -336,6 +1021,52 @@ class JobManager_Client(object):
         self.ask_on_sigterm = ask_on_sigterm
         self.status_output_for_srun = status_output_for_srun
         self.emtpy_lines_at_end = emtpy_lines_at_end
+        if (fetch_batch_size != 'auto') and not (isinstance(fetch_batch_size, int) and (fetch_batch_size > 0)):
+            raise ValueError("fetch_batch_size must be a positive integer or 'auto'")
+        self.fetch_batch_size = fetch_batch_size
+        log.debug("fetch_batch_size:%s", self.fetch_batch_size)
+        self.result_batch_max_items = result_batch_max_items
+        log.debug("result_batch_max_items:%s", self.result_batch_max_items)
+        self.result_batch_max_bytes = result_batch_max_bytes
+        log.debug("result_batch_max_bytes:%s", self.result_batch_max_bytes)
+        self.result_batch_linger = result_batch_linger
+        log.debug("result_batch_linger:%s", self.result_batch_linger)
+        if local_result_q_max_items is None:
+            local_result_q_max_items = self.nworkers
+        self.local_result_q_max_items = local_result_q_max_items
+        log.debug("local_result_q_max_items:%s", self.local_result_q_max_items)
+        self.local_result_q_max_bytes = local_result_q_max_bytes
+        log.debug("local_result_q_max_bytes:%s", self.local_result_q_max_bytes)
+        if result_transport not in ('pickle', 'oob'):
+            raise ValueError("unknown result_transport '{}', use 'pickle' or 'oob'".format(result_transport))
+        self.result_transport = result_transport
+        log.debug("result_transport:%s", self.result_transport)
+        if (result_compression is not None) and (result_compression not in RESULT_COMPRESSION_CODECS):
+            raise ValueError("unknown result_compression '{}', use one of {}".format(result_compression,
+                                                                                  sorted(RESULT_COMPRESSION_CODECS)))
+        self.result_compression = result_compression
+        log.debug("result_compression:%s", self.result_compression)
+        self.result_compression_level = result_compression_level
+        log.debug("result_compression_level:%s", self.result_compression_level)
+        self.result_compression_adaptive = result_compression_adaptive
+        log.debug("result_compression_adaptive:%s", self.result_compression_adaptive)
+        if (self.worker_threads > 1) and not prefetch:
+            log.info("enable prefetch for more than one worker thread per process")
+            prefetch = True
+        self.prefetch = prefetch
+        log.debug("prefetch:%s", self.prefetch)
+        if prefetch_max_depth is None:
+            prefetch_max_depth = 16*self.nworkers
+        self.prefetch_max_depth = prefetch_max_depth
+        log.debug("prefetch_max_depth:%s", self.prefetch_max_depth)
+        if transport not in ('manager', 'eventloop'):
+            raise ValueError("unknown transport '{}', use 'manager' or 'eventloop'".format(transport))
+        self.transport = transport
+        log.debug("transport:%s", self.transport)
+        self.fast_start = fast_start
+        log.debug("fast_start:%s", self.fast_start)
+        self.preload_modules = list(preload_modules)
+        log.debug("preload_modules:%s", self.preload_modules)
         
     def connect(self):
         if self.manager_objects is None:
@@ -365,6 +1096,9 @@ class JobManager_Client(object):
             as non shared object in local memory
         """
 
+        if self.transport == 'eventloop':
+            return self._create_eventloop_objects()
+
         manager = ServerQueueManager(address=(self.server, self.port), authkey=self.authkey)
 
         try:
@@ -384,6 +1118,25 @@ class JobManager_Client(object):
         const_arg = copy.deepcopy(manager.get_const_arg())
             
         return job_q, result_q, fail_q, const_arg, manager
+
+    def _create_eventloop_objects(self):
+        address = (self.server, self.port)
+        dest = (address, self.authkey.decode())
+        try:
+            call_connect(connect         = lambda: EventLoopConnection(address, self.authkey).close(),
+                         dest            = dest,
+                         reconnect_wait  = self.reconnect_wait,
+                         reconnect_tries = self.reconnect_tries)
+        except:
+            log.warning("FAILED to connect to %s", dest)
+            log.info(traceback.format_exc())
+            return None
+
+        job_q = EventLoopProxy(address, self.authkey, 'job_q')
+        result_q = EventLoopProxy(address, self.authkey, 'result_q')
+        fail_q = EventLoopProxy(address, self.authkey, 'fail_q')
+        const_arg = EventLoopProxy(address, self.authkey, 'const_arg').get()
+        return job_q, result_q, fail_q, const_arg, None
         
     @staticmethod
     def func(arg, const_arg):
@@ -415,8 +1168,14 @@ class JobManager_Client(object):
                       loglevel,
                       i,
                       job_q_get,
+                      job_q_get_many,
+                      job_q_done_ids,
+                      fetch_batch_size,
+                      prefetch_q,
                       local_job_q,
                       local_result_q,
+                      local_result_q_limit,
+                      result_transport,
                       local_fail_q,
                       const_arg,
                       c,
@@ -429,9 +1188,14 @@ class JobManager_Client(object):
                       port,
                       authkey,
                       nthreads,
-                      nproc):
+                      worker_threads,
+                      ready,
+                      t_spawn):
         """
         the wrapper spawned nproc times calling and handling self.func
+
+        sets up the process and runs the main loop (__worker_loop), either directly
+        or in worker_threads threads, once set up the semaphore ready is released
         """
         global log
         log = logging.getLogger(__name__+'.worker{}'.format(i+1))
@@ -448,9 +1212,6 @@ class JobManager_Client(object):
             log.warning("changing niceness not permitted! run with niceness %s", n)
 
         log.debug("worker function now alive, niceness %s", n)
-        cnt = 0
-        time_queue = 0.
-        time_calc = 0.
 
         # check for func definition without status members count, max_count
         #args_of_func = inspect.getfullargspec(func).args
@@ -477,9 +1238,115 @@ class JobManager_Client(object):
         log.info("set mkl threads to {}".format(nthreads))
         set_mkl_threads(nthreads)
 
-            
+        if prefetch_q is not None:
+            # the arguments are fetched by the client process
+            job_q_get = prefetch_q.get
+            fetch_batch_size = 1
+
+        ready.release()
+        log.debug("worker ready after %.3fs", time.time() - t_spawn)
+
+        if worker_threads == 1:
+            JobManager_Client.__worker_loop(_func, job_q_get, job_q_get_many, job_q_done_ids, fetch_batch_size, prefetch_q,
+                                            local_job_q, local_result_q, local_result_q_limit, result_transport,
+                                            local_fail_q, const_arg, c, m, reset_pbc, njobs, emergency_dump_path,
+                                            host, port, authkey, t_spawn, thread_state=None)
+            return
+
+        # the threads share this process, thus const_arg, and fetch their arguments from the prefetch_q
+        m.value = 0
+        stop = threading.Event()
+        job_q_get = lambda: prefetch_q.get(stop=stop)
+        states = []
+        threads = []
+        for j in range(worker_threads):
+            state = WorkerThreadState(stop)
+            # progress information of func can not be shown per thread
+            t = threading.Thread(target=JobManager_Client.__worker_loop,
+                                 args=(_func, job_q_get, None, job_q_done_ids, 1, prefetch_q, local_job_q, local_result_q,
+                                       local_result_q_limit, result_transport, local_fail_q, const_arg,
+                                       progress.UnsignedIntValue(), progress.UnsignedIntValue(0), reset_pbc, njobs,
+                                       emergency_dump_path, host, port, authkey, t_spawn, state),
+                                 name='worker{}.{}'.format(i+1, j+1))
+            t.daemon = True
+            states.append(state)
+            threads.append(t)
+            t.start()
+        log.debug("started %s worker threads", worker_threads)
+
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(1)
+        except SystemExit:
+            stop.set()
+            job_ids = []
+            for state in states:
+                job_ids += state.abandon()
+            log.warning("SystemExit, stop %s worker threads, reinsert %s argument(s), please wait", worker_threads, len(job_ids))
+            try:
+                with sig_delay([signal.SIGTERM]):
+                    for job_id in job_ids:
+                        local_job_q.put(job_id)
+            except Exception as e:
+                log.error("puting arg back to local job_q failed due to %s", type(e))
+                handle_unexpected_queue_error(e)
+            # the threads not busy with the calculation stop on their own
+            for t, state in zip(threads, states):
+                if not state.abandoned:
+                    t.join(15)
+                    if t.is_alive():
+                        log.warning("worker thread %s did not stop", t.name)
+        log.debug("JobManager_Client.__worker_func at end (PID %s)", os.getpid())
+
+    @staticmethod
+    def __worker_loop(_func,
+                      job_q_get,
+                      job_q_get_many,
+                      job_q_done_ids,
+                      fetch_batch_size,
+                      prefetch_q,
+                      local_job_q,
+                      local_result_q,
+                      local_result_q_limit,
+                      result_transport,
+                      local_fail_q,
+                      const_arg,
+                      c,
+                      m,
+                      reset_pbc,
+                      njobs,
+                      emergency_dump_path,
+                      host,
+                      port,
+                      authkey,
+                      t_spawn,
+                      thread_state):
+        """
+        the main loop of a worker, get an argument, call _func and put the result to the local_result_q
+
+        t_spawn is the time (time.time) the worker process was started, used to report the time to the first job
+
+        thread_state is None if the loop runs in the main thread of a worker process, otherwise
+        it is the WorkerThreadState shared with the main thread
+        """
+        if thread_state is None:
+            delay_sigterm = lambda: sig_delay([signal.SIGTERM])
+        else:
+            # signals are handled by the main thread only
+            delay_sigterm = contextlib.nullcontext
+
+        cnt = 0
+        arg = None
+        job_id = None
+        # (job_id, arg) pairs fetched via get_jobs but not processed yet
+        args_buffer = []
+        # round trip time of the last fetch (fetch_batch_size 'auto')
+        rtt = None
+        time_queue = 0.
+        time_calc = 0.
+        time_stall = 0.
 
-               
         # supposed to catch SystemExit, which will shut the client down quietly 
         try:
             
@@ -492,15 +1359,35 @@ class JobManager_Client(object):
                 njobs -= 1
 
                 # try to get an item from the job_q
-                tg_0 = time.time()                
+                tg_0 = time.perf_counter()
                 try:
-                    log.debug("wait until local result q is almost empty")
-                    while local_result_q.qsize() > nproc:
-                         time.sleep(0.5)
-                    log.debug("done waiting, call job_q_get")
-
-                    with sig_delay([signal.SIGTERM]):
-                        arg = job_q_get()
+                    if (thread_state is not None) and thread_state.stop.is_set():
+                        raise SystemExit
+                    with delay_sigterm():
+                        if not args_buffer:
+                            if fetch_batch_size == 'auto':
+                                # njobs has already been decreased for the current job
+                                n_fetch = None if njobs < 0 else njobs + 1
+                                tr_0 = time.perf_counter()
+                                args_buffer = job_q_get_many(n_fetch, rtt)
+                                rtt = time.perf_counter() - tr_0
+                                log.debug("got %s args from job_q", len(args_buffer))
+                            elif fetch_batch_size > 1:
+                                # njobs has already been decreased for the current job
+                                n_fetch = fetch_batch_size if njobs < 0 else min(fetch_batch_size, njobs + 1)
+                                args_buffer = job_q_get_many(n_fetch)
+                                log.debug("got %s args from job_q", len(args_buffer))
+                            else:
+                                args_buffer = [job_q_get()]
+                        job_id, arg = args_buffer.pop(0)
+                        if isinstance(job_id, SpeculativeJobId) and job_q_done_ids([job_id]):
+                            # the job was handed out once more and the other copy has finished meanwhile
+                            log.info("skip job %s, it is done already", job_id)
+                            arg = None
+                            njobs += 1
+                            continue
+                    if cnt == 0:
+                        log.info("time to first job %.3fs", time.time() - t_spawn)
                     log.debug("process {}".format(arg))
 
                 # regular case, just stop working when empty job_q was found
@@ -527,13 +1414,21 @@ class JobManager_Client(object):
                 
                 # try to process the retrieved argument
                 try:
+                    if (thread_state is not None) and not thread_state.start_computing(job_id):
+                        raise SystemExit
                     tf_0 = time.perf_counter()
                     log.debug("START crunching _func")
                     res = _func(arg, const_arg, c, m)
                     log.debug("DONE crunching _func")
+                    if (thread_state is not None) and not thread_state.stop_computing():
+                        # the main thread has already reinserted the argument
+                        arg = None
+                        raise SystemExit
                     tf_1 = time.perf_counter()
                     time_calc_this = (tf_1-tf_0)
                     time_calc += time_calc_this
+                    if prefetch_q is not None:
+                        prefetch_q.job_done(time_calc_this)
                 # handle SystemExit in outer try ... except
                 except SystemExit as e:
                     raise e
@@ -541,6 +1436,8 @@ class JobManager_Client(object):
                 # - write traceback to file
                 # - try to inform the server of the failure
                 except:
+                    if thread_state is not None:
+                        thread_state.stop_computing()
                     err, val, trb = sys.exc_info()
                     log.error("caught exception '%s' when crunching 'func'\n%s", err.__name__, traceback.print_exc())
                 
@@ -554,8 +1451,12 @@ class JobManager_Client(object):
 
                     log.debug("put arg to local fail_q")
                     try:
-                        with sig_delay([signal.SIGTERM]):
-                            local_fail_q.put((arg, err.__name__, hostname))
+                        with delay_sigterm():
+                            local_fail_q.put((arg, err.__name__, hostname, job_id))
+                            # the worker stops, so hand back the arguments fetched in advance
+                            for a_id, a in args_buffer:
+                                local_job_q.put(a_id)
+                            args_buffer = []
                     # handle SystemExit in outer try ... except                        
                     except SystemExit as e:
                         log.warning('putting arg to local fail_q failed due to SystemExit')
@@ -575,12 +1476,29 @@ class JobManager_Client(object):
                 else:
                     try:
                         tp_0 = time.perf_counter()
-                        with sig_delay([signal.SIGTERM]):
-                            bin_data = pickle.dumps({'arg': arg,
-                                                     'res': res,
-                                                     'time': time_calc_this})
-                            local_result_q.put(bin_data)
+                        data_dict = {'arg': arg,
+                                     'id': job_id,
+                                     'res': res,
+                                     'time': time_calc_this}
+                        if result_transport == 'oob':
+                            bin_data = dumps_result_frames(data_dict)
+                        else:
+                            bin_data = pickle.dumps(data_dict)
+                        del data_dict
+                        # blocks as long as there are too many results waiting to be send,
+                        # the space is reserved and used without being interrupted by SIGTERM
+                        with delay_sigterm():
+                            time_stall_this = local_result_q_limit.acquire(result_nbytes(bin_data))
+                            if result_transport == 'oob':
+                                local_result_q.put_frames(bin_data)
+                            else:
+                                local_result_q.put(bin_data)
+                        time_stall += time_stall_this
+                        if time_stall_this > 0.1:
+                            log.debug("waited %s for the local result_q to take the result",
+                                      progress.humanize_time(time_stall_this))
                         log.debug('put result to local result_q, done!')
+                        arg = None
                         tp_1 = time.perf_counter()
                         time_queue += (tp_1-tp_0)
                         
@@ -606,14 +1524,17 @@ class JobManager_Client(object):
         # note SIGINT, SIGTERM -> SystemExit is achieved by overwriting the
         # default signal handlers
         except SystemExit:
-            if arg is None:
+            if arg is not None:
+                args_buffer.insert(0, (job_id, arg))
+            if len(args_buffer) == 0:
                 log.warning("SystemExit, quit processing, no argument to reinsert")
             else:
-                log.warning("SystemExit, quit processing, reinsert current argument, please wait")
+                log.warning("SystemExit, quit processing, reinsert %s argument(s), please wait", len(args_buffer))
                 log.debug("put arg back to local job_q")
                 try:
-                    with sig_delay([signal.SIGTERM]):
-                        local_job_q.put(arg)
+                    with delay_sigterm():
+                        for a_id, a in args_buffer:
+                            local_job_q.put(a_id)
                 # handle SystemExit in outer try ... except                        
                 except SystemExit as e:
                     log.error("puting arg back to local job_q failed due to SystemExit")
@@ -632,13 +1553,14 @@ class JobManager_Client(object):
 
             stat = "pure calculation time: {} single task average: {}".format(progress.humanize_time(time_calc), sta)
             try:
-                stat += "\ncalculation:{:.2%} communication:{:.2%}".format(time_calc/(time_calc+time_queue), time_queue/(time_calc+time_queue))
+                stat += "\ncalculation:{:.2%} communication:{:.2%} (waiting for the local result_q:{:.2%})".format(
+                    time_calc/(time_calc+time_queue), time_queue/(time_calc+time_queue), time_stall/(time_calc+time_queue))
             except ZeroDivisionError:
                 pass
 
             log.info(stat)
             # print("client {}:{}\n".format(i, stat))
-            log.debug("JobManager_Client.__worker_func at end (PID %s)", os.getpid())
+            log.debug("JobManager_Client.__worker_loop at end (PID %s)", os.getpid())
 
     def start(self):
         """
@@ -657,6 +1579,11 @@ class JobManager_Client(object):
             raise JMConnectionError("Can not start Client with no connection to server (shared objetcs are not available)")
         
         log.info("STARTING CLIENT\nserver:%s authkey:%s port:%s num proc:%s", self.server, self.authkey.decode(), self.port, self.nproc)
+
+        # imported once here, inherited by the worker processes
+        for name in self.preload_modules:
+            log.debug("preload module %s", name)
+            importlib.import_module(name)
         # print("on start client, log.level", log.level)
             
         c = []
@@ -696,12 +1623,17 @@ class JobManager_Client(object):
         job_q, result_q, fail_q, const_arg, manager = self.manager_objects
 
         local_job_q = mp.Queue()
-        local_result_q = mp.Queue()
+        local_result_q = FrameQueue()
+        local_result_q_limit = LocalResultQueueLimit(max_items = self.local_result_q_max_items,
+                                                     max_bytes = self.local_result_q_max_bytes)
         local_fail_q = mp.Queue()
 
-        infoline = progress.StringValue(num_of_bytes=64)
+        infoline = progress.StringValue(num_of_bytes=INFO_LINE_BYTES)
         bytes_send = mp.Value('L', 0)          # 4 byte unsigned int
+        bytes_send_raw = mp.Value('L', 0)      # size before compression
         time_result_q_put = mp.Value('d', 0)   # 8 byte float (double)
+        results_send = mp.Value('L', 0)        # number of results send to the server
+        batches_send = mp.Value('L', 0)        # number of calls to result_q_put
 
 
 
@@ -710,77 +1642,228 @@ class JobManager_Client(object):
                   'ping_timeout': self.ping_timeout,
                   'ping_retry': self.ping_retry}
 
-        job_q_get = proxy_operation_decorator(proxy=job_q, operation='get', **kwargs)
-        job_q_put = proxy_operation_decorator(proxy=job_q, operation='put', **kwargs)
+        # the arguments are handed out as (job_id, arg) pairs, the job_id is send back with the result
+        job_q_get = proxy_operation_decorator(proxy=job_q, operation='get_job', **kwargs)
+        if self.fetch_batch_size == 'auto':
+            job_q_get_chunk = proxy_operation_decorator(proxy=job_q, operation='get_chunk', **kwargs)
+            client_id = "{}:{}".format(socket.gethostname(), os.getpid())
+            # at most n arguments, the server chooses how many
+            job_q_get_many = lambda n, rtt: job_q_get_chunk(rtt, n, client_id, self.nworkers)
+        elif (self.fetch_batch_size > 1) or self.prefetch:
+            job_q_get_many = proxy_operation_decorator(proxy=job_q, operation='get_jobs', **kwargs)
+        else:
+            job_q_get_many = None
+        # reinsert arguments by their job_id
+        job_q_put_back = proxy_operation_decorator(proxy=job_q, operation='put_back', **kwargs)
+        job_q_fail_ids = proxy_operation_decorator(proxy=job_q, operation='fail_ids', **kwargs)
+        # asked before starting a job handed out once more (see SpeculativeJobId)
+        job_q_done_ids = proxy_operation_decorator(proxy=job_q, operation='done_ids', **kwargs)
         result_q_put = proxy_operation_decorator(proxy=result_q, operation='put', **kwargs)
+        if self.transport == 'eventloop':
+            # the frames of the results are send as they are (see pack_result_frames)
+            result_q_put_frames = proxy_operation_decorator(proxy=result_q, operation='put_frames', **kwargs)
+        else:
+            result_q_put_frames = None
         fail_q_put = proxy_operation_decorator(proxy=fail_q, operation='put', **kwargs)
 
         result_q_put_pending_lock = threading.Lock()
         job_q_put_pending_lock = threading.Lock()
         fail_q_put_pending_lock = threading.Lock()
 
-        def update_infoline(infoline, local_result_q, bytes_send, time_result_q_put):
+        if self.prefetch:
+            prefetch_q = PrefetchQueue(nproc=self.nworkers, max_depth=self.prefetch_max_depth)
+        else:
+            prefetch_q = None
+
+        def update_infoline(infoline, local_result_q_limit, bytes_send, bytes_send_raw, time_result_q_put, results_send, batches_send):
             while True:
                 if time_result_q_put.value > 0:
                     speed = humanize_size(bytes_send.value / time_result_q_put.value) + "/s"
+                    if bytes_send.value < bytes_send_raw.value:
+                        speed += " (raw {}/s)".format(humanize_size(bytes_send_raw.value / time_result_q_put.value))
                 else:
                     speed = ''
-                infoline.value = "local res_q {} {}".format(local_result_q.qsize(), speed).encode('utf-8')
+                if batches_send.value > 0:
+                    speed += " {:.1f}res/put".format(results_send.value / batches_send.value)
+                line = "local res_q {} {}".format(local_result_q_limit.items(), speed)
+                if prefetch_q is not None:
+                    line += " prefetched {}/{}".format(prefetch_q.items(), prefetch_q.target_depth())
                 if self.timeout:
-                    infoline.value += " timeout in: {}s".format(int(self.timeout - (time.time() - self.init_time))).encode('utf-8')
+                    line += " timeout in: {}s".format(int(self.timeout - (time.time() - self.init_time)))
+                set_info_line(infoline, line)
                 time.sleep(1)
         
-        def pass_job_q_put(job_q_put, local_job_q, job_q_put_pending_lock):
+        def fetch_prefetch_q(job_q_get_many, prefetch_q, prefetch_stop):
+            log.debug("this is thread thr_prefetch with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
+            # the total number of arguments the workers will process (negative: no limit)
+            remaining = self.njobs * self.nworkers if self.njobs > 0 else -1
+            try:
+                while (not prefetch_stop.is_set()) and (remaining != 0):
+                    n = prefetch_q.wait_for_space(timeout=1)
+                    if n <= 0:
+                        continue
+                    if remaining > 0:
+                        n = min(n, remaining)
+                    t0 = time.perf_counter()
+                    try:
+                        if self.fetch_batch_size == 'auto':
+                            args = job_q_get_many(n, prefetch_q.rtt)
+                        else:
+                            args = job_q_get_many(n)
+                    except queue.Empty:
+                        log.info("prefetch finds empty job queue")
+                        prefetch_q.finish('#EMPTY')
+                        break
+                    except ContainerClosedError:
+                        log.info("prefetch finds job queue closed")
+                        prefetch_q.finish('#CLOSED')
+                        break
+                    prefetch_q.update_rtt(time.perf_counter() - t0)
+                    log.debug("prefetched %s args (rtt %.3fs, target depth %s)", len(args), prefetch_q.rtt,
+                              prefetch_q.target_depth())
+                    for a in args:
+                        prefetch_q.put(a)
+                    if remaining > 0:
+                        remaining -= len(args)
+            except Exception as e:
+                log.error("thr_prefetch caught error %s", type(e))
+                log.info(traceback.format_exc())
+                prefetch_q.finish('#EMPTY')
+            log.debug("stopped thread thr_prefetch with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
+
+        def pass_job_q_put(job_q_put_back, local_job_q, job_q_put_pending_lock):
 #             log.debug("this is thread thr_job_q_put with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
             while True:
-                data = local_job_q.get()
-                log.debug('reinsert {}'.format(data))
+                job_id = local_job_q.get()
+                log.debug('reinsert job {}'.format(job_id))
                 with job_q_put_pending_lock:
-                    job_q_put(data)
+                    job_q_put_back([job_id])
                 
 #             log.debug("stopped thread thr_job_q_put with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
 
  
-        def pass_result_q_put(result_q_put, local_result_q, result_q_put_pending_lock, bytes_send, time_result_q_put):
+        if self.result_compression is not None:
+            result_compressor = ResultCompressor(codec    = self.result_compression,
+                                                 level    = self.result_compression_level,
+                                                 adaptive = self.result_compression_adaptive)
+        else:
+            result_compressor = None
+
+        def pass_result_q_put(result_q_put, result_q_put_frames, local_result_q, local_result_q_limit, result_q_put_pending_lock,
+                              bytes_send, bytes_send_raw, time_result_q_put, results_send, batches_send):
             log.debug("this is thread thr_result_q_put with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
             try:
                 while True:
                     data = local_result_q.get()
-                    log.debug("result_q client forward...\n{}".format(data))
                     with result_q_put_pending_lock:
-                        t0 = time.perf_counter()
-                        result_q_put(data)
+                        # collect whatever is pending in the local_result_q into a single batch
+                        batch = [data]
+                        batch_size = result_nbytes(data)
+                        t_linger = time.perf_counter() + self.result_batch_linger
+                        while (len(batch) < self.result_batch_max_items) and (batch_size < self.result_batch_max_bytes):
+                            try:
+                                linger = t_linger - time.perf_counter()
+                                if linger > 0:
+                                    data = local_result_q.get(timeout=linger)
+                                else:
+                                    data = local_result_q.get_nowait()
+                            except queue.Empty:
+                                break
+                            batch.append(data)
+                            batch_size += result_nbytes(data)
+
+                        try:
+                            if (result_q_put_frames is not None) and (result_compressor is None):
+                                # the frames are written to the connection one by one, not joined
+                                data = pack_result_frames(batch)
+                                raw_size = result_nbytes(data)
+                                log.debug("result_q client forward %s result(s) (%s in %s frames)", len(batch),
+                                          humanize_size(raw_size), len(data))
+                                t0 = time.perf_counter()
+                                result_q_put_frames(data)
+                            else:
+                                # a single buffer, the frames of a result are joined
+                                batch_data = [join_result_frames(d) if isinstance(d, list) else d for d in batch]
+                                if len(batch_data) == 1:
+                                    data = batch_data[0]
+                                else:
+                                    data = pack_result_batch(batch_data)
+                                del batch_data
+                                raw_size = len(data)
+                                if result_compressor is not None:
+                                    data = result_compressor(data)
+                                log.debug("result_q client forward %s result(s) (%s)", len(batch), humanize_size(len(data)))
+                                t0 = time.perf_counter()
+                                result_q_put(data)
+                        except Exception:
+                            # the results taken from the local_result_q would be lost otherwise
+                            log.error("forwarding %s result(s) failed, dump them", len(batch))
+                            for bin_data in batch:
+                                data_dict = loads_result(bin_data)
+                                emergency_dump(data_dict['arg'], data_dict['res'], self.emergency_dump_path,
+                                               self.server, self.port, self.authkey)
+                            raise
+                        finally:
+                            # give room for further results (wakes up the workers waiting)
+                            local_result_q_limit.release(len(batch), batch_size)
                     t1 = time.perf_counter()
+                    if result_compressor is not None:
+                        result_compressor.update_wire_speed(len(data), t1 - t0)
                     with bytes_send.get_lock():
-                        bytes_send.value += len(data)
+                        bytes_send.value += result_nbytes(data)
+                    with bytes_send_raw.get_lock():
+                        bytes_send_raw.value += raw_size
                     with time_result_q_put.get_lock():
                         time_result_q_put.value += (t1 - t0)
-                    del data
+                    with results_send.get_lock():
+                        results_send.value += len(batch)
+                    with batches_send.get_lock():
+                        batches_send.value += 1
+                    del data, batch
                     log.debug("result_q client forward, done! ({:.2f}s)".format(t1 - t0))
             except Exception as e:
                 log.error("thr_result_q_put caught error %s", type(e))
                 log.info(traceback.format_exc())
+            finally:
+                # nothing is forwarded anymore, the workers must not wait for space
+                local_result_q_limit.close()
             log.debug("stopped thread thr_result_q_put with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
  
-        def pass_fail_q_put(fail_q_put, local_fail_q, fail_q_put_pending_lock):
+        def pass_fail_q_put(fail_q_put, job_q_fail_ids, local_fail_q, fail_q_put_pending_lock):
 #             log.debug("this is thread thr_fail_q_put with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
             while True:
                 data = local_fail_q.get()
-                log.info("put {} to failq".format(data))
+                log.info("put {} to failq".format(data[:3]))
                 with fail_q_put_pending_lock:
-                    fail_q_put(data)
+                    # report the failure only if no other copy of the job has finished
+                    # before (see ArgsContainer.fail_ids)
+                    if job_q_fail_ids([data[3]]):
+                        fail_q_put(data[:3])
 #             log.debug("stopped thread thr_fail_q_put with tid %s", ctypes.CDLL('libc.so.6').syscall(186))
 
-        thr_job_q_put           = threading.Thread(target=pass_job_q_put   , args=(job_q_put   , local_job_q, job_q_put_pending_lock))
+        thr_job_q_put           = threading.Thread(target=pass_job_q_put   , args=(job_q_put_back, local_job_q, job_q_put_pending_lock))
         thr_job_q_put.daemon    = True
-        thr_result_q_put        = threading.Thread(target=pass_result_q_put, args=(result_q_put, local_result_q, result_q_put_pending_lock, bytes_send, time_result_q_put))
+        thr_result_q_put        = threading.Thread(target=pass_result_q_put, args=(result_q_put, result_q_put_frames, local_result_q,
+                                                                                   local_result_q_limit, result_q_put_pending_lock,
+                                                                                   bytes_send, bytes_send_raw, time_result_q_put,
+                                                                                   results_send, batches_send))
         thr_result_q_put.daemon = True
-        thr_fail_q_put          = threading.Thread(target=pass_fail_q_put  , args=(fail_q_put  , local_fail_q, fail_q_put_pending_lock))
+        thr_fail_q_put          = threading.Thread(target=pass_fail_q_put  , args=(fail_q_put  , job_q_fail_ids, local_fail_q,
+                                                                                   fail_q_put_pending_lock))
         thr_fail_q_put.daemon   = True
 
-        thr_update_infoline = threading.Thread(target=update_infoline, args=(infoline, local_result_q, bytes_send, time_result_q_put))
+        thr_update_infoline = threading.Thread(target=update_infoline, args=(infoline, local_result_q_limit, bytes_send, bytes_send_raw,
+                                                                             time_result_q_put, results_send, batches_send))
         thr_update_infoline.daemon = True
 
+        if prefetch_q is not None:
+            prefetch_stop = threading.Event()
+            thr_prefetch = threading.Thread(target=fetch_prefetch_q, args=(job_q_get_many, prefetch_q, prefetch_stop))
+            thr_prefetch.daemon = True
+            thr_prefetch.start()
+            # the workers do not talk to the job_q directly
+            job_q_get = job_q_get_many = None
+
         thr_job_q_put.start()
         thr_result_q_put.start()
         thr_fail_q_put.start()
@@ -802,15 +1885,28 @@ class JobManager_Client(object):
             if (not self.hide_progress) and self.show_statusbar_for_jobs:
                 self.pbc.start()
 
+            # released by each worker process once it is set up
+            ready = mp.Semaphore(0)
+            t_spawn = time.time()
+            if self.fast_start:
+                mp_context = mp.get_context('fork')
+            else:
+                mp_context = mp
             for i in range(self.nproc):
                 reset_pbc = lambda: self.pbc.reset(i)
-                p = mp.Process(target=self.__worker_func, args=(self.func,                # func
+                p = mp_context.Process(target=self.__worker_func, args=(self.func,                # func
                                                                 self.nice,                # nice
                                                                 log.level,                # loglevel
                                                                 i,                        # i
                                                                 job_q_get,                # job_q_get
+                                                                job_q_get_many,           # job_q_get_many
+                                                                job_q_done_ids,           # job_q_done_ids
+                                                                self.fetch_batch_size,    # fetch_batch_size
+                                                                prefetch_q,               # prefetch_q
                                                                 local_job_q,              # local_job_q
                                                                 local_result_q,           # local_result_q
+                                                                local_result_q_limit,     # local_result_q_limit
+                                                                self.result_transport,    # result_transport
                                                                 local_fail_q,             # local_fail_q
                                                                 const_arg,                # const_arg
                                                                 c[i],                     # c
@@ -822,17 +1918,33 @@ class JobManager_Client(object):
                                                                 self.server,              # host
                                                                 self.port,                # port
                                                                 self.authkey,             # authkey
-                                                                self.nthreads,
-                                                                self.nproc))
+                                                                self.nthreads,            # nthreads
+                                                                self.worker_threads,      # worker_threads
+                                                                ready,                    # ready
+                                                                t_spawn))                 # t_spawn
 
 
                 self.procs.append(p)
                 p.start()
                 log.debug("started new worker with pid %s", p.pid)
-                time.sleep(0.1)
+                if not self.fast_start:
+                    time.sleep(0.1)
 
             log.debug("all worker processes startes")
 
+            if self.fast_start:
+                n_ready = 0
+                while n_ready < self.nproc:
+                    if ready.acquire(timeout=1):
+                        n_ready += 1
+                    elif not any(p.is_alive() for p in self.procs):
+                        while ready.acquire(block=False):
+                            n_ready += 1
+                        break
+                if n_ready < self.nproc:
+                    log.warning("only %s of %s worker processes got ready", n_ready, self.nproc)
+                log.info("%s worker processes ready after %.3fs", n_ready, time.time() - t_spawn)
+
             #time.sleep(self.interval/2)
 
             if self.use_special_SIG_INT_handler:
@@ -866,7 +1978,7 @@ class JobManager_Client(object):
                             p.join()
                             log.debug("worker process %s was joined", p.pid)
                             break
-                        infoline.value = "timeout in: {}s".format(int(self.timeout - elps_time)).encode('utf-8')
+                        set_info_line(infoline, "timeout in: {}s".format(int(self.timeout - elps_time)))
                     p.join(10)
                     if self.status_output_for_srun:
                         total_c = 0
@@ -880,6 +1992,19 @@ class JobManager_Client(object):
             log.debug("still in progressBar context")
 
         log.debug("progressBar context has been left")
+
+        if prefetch_q is not None:
+            prefetch_stop.set()
+            thr_prefetch.join(30)
+            if thr_prefetch.is_alive():
+                log.warning("the thread thr_prefetch is still running")
+            jobs = prefetch_q.drain()
+            if jobs:
+                log.info("put %s prefetched argument(s) back to the job_q", len(jobs))
+                # put directly, since the local_job_q would not tell whether the data written
+                # by this process has reached the thread thr_job_q_put
+                with job_q_put_pending_lock:
+                    job_q_put_back([job_id for job_id, arg in jobs])
         
         while (not local_job_q.empty()) or job_q_put_pending_lock.locked():
             log.info("still data in local_job_q (%s)", local_job_q.qsize())
@@ -899,10 +2024,15 @@ class JobManager_Client(object):
             else:
                 log.warning("the thread thr_result_q_put has died, dump remaining results")
                 while (not local_result_q.empty()):
-                    arg, res = local_result_q.get()
-                    emergency_dump(arg, res, self.emergency_dump_path, self.server, self.port, self.authkey)
+                    data_dict = loads_result(local_result_q.get())
+                    emergency_dump(data_dict['arg'], data_dict['res'], self.emergency_dump_path, self.server, self.port, self.authkey)
                 break
         log.info("local_result_q now empty")
+        if batches_send.value > 0:
+            log.info("send %s results with %s calls to result_q_put (%.1f results per call), %s (raw %s) in %s",
+                     results_send.value, batches_send.value, results_send.value / batches_send.value,
+                     humanize_size(bytes_send.value), humanize_size(bytes_send_raw.value),
+                     progress.humanize_time(time_result_q_put.value))
 
         while (not local_fail_q.empty()) or fail_q_put_pending_lock.locked():
             log.info("still data in local_fail_q (%s)", local_fail_q.qsize())
@@ -1072,6 +2202,96 @@ class ClosableQueue(object):
         else:
             raise RuntimeError("client side has no counter for bytes_revieved")
 
+
+class ChunkSizer(object):
+    """chooses the number of arguments handed out by a single request (see ArgsContainer.get_chunk)
+
+    The runtime of a single job is estimated by an exponential moving average (update_job_time,
+    called by the server for each result). Processing a chunk should take 1/target_overhead times
+    the round trip time (rtt) measured by the client, so at most the fraction target_overhead
+    of the time is spent on communication, i.e.,
+
+        n = rtt / (target_overhead * job_time)
+
+    limited to max_size. Very short jobs are handed out in large chunks, long jobs one at a time.
+    As long as there is no estimate of the job time or the rtt, a single argument is handed out.
+
+    The last n_recent job times are kept as well for their median (median_job_time).
+
+    Near the end of the queue the chunk shrinks to at most remaining / (tail_factor * workers)
+    (guided self-scheduling), where workers is the total number of workers of all clients which
+    requested arguments within the last active_window seconds, so that the last arguments
+    are spread over all workers.
+    """
+    def __init__(self, target_overhead=0.05, max_size=1000, alpha=0.1, tail_factor=2, active_window=60, n_recent=1000):
+        self.target_overhead = target_overhead
+        self.max_size = max_size
+        self.alpha = alpha
+        self.tail_factor = tail_factor
+        self.active_window = active_window
+        self.job_time = None
+        self.recent_job_times = collections.deque(maxlen=n_recent)
+        self._lock = threading.Lock()
+        # client_id -> (number of workers, time of the last request)
+        self._clients = {}
+
+        # statistics of the chunks handed out
+        self.n_chunks = 0
+        self.n_items = 0
+        self.last = 0
+        self.smallest = None
+        self.largest = 0
+
+    def update_job_time(self, t):
+        if self.job_time is None:
+            self.job_time = t
+        else:
+            self.job_time = (1 - self.alpha) * self.job_time + self.alpha * t
+        self.recent_job_times.append(t)
+
+    def median_job_time(self):
+        """the median of the recent job times, None if there is none"""
+        if not self.recent_job_times:
+            return None
+        return statistics.median(self.recent_job_times)
+
+    def workers(self, client_id=None, nworkers=1):
+        """register the request of client_id and return the number of active workers"""
+        now = time.time()
+        with self._lock:
+            if client_id is not None:
+                self._clients[client_id] = (nworkers, now)
+            for cid in [cid for cid, (n, t) in self._clients.items() if now - t > self.active_window]:
+                del self._clients[cid]
+            return max(1, sum(n for n, t in self._clients.values()))
+
+    def size(self, rtt, remaining, client_id=None, nworkers=1):
+        workers = self.workers(client_id, nworkers)
+        job_time = self.job_time
+        if (not rtt) or (job_time is None):
+            n = 1
+        elif job_time <= 0:
+            n = self.max_size
+        else:
+            n = min(self.max_size, int(rtt / (self.target_overhead * job_time)))
+        # shrink the chunks near the end of the queue
+        n = min(n, remaining // (self.tail_factor * workers))
+        return max(1, n)
+
+    def record(self, n):
+        with self._lock:
+            self.n_chunks += 1
+            self.n_items += n
+            self.last = n
+            self.smallest = n if self.smallest is None else min(self.smallest, n)
+            self.largest = max(self.largest, n)
+
+    def mean(self):
+        return self.n_items / self.n_chunks if self.n_chunks else 0
+
+    def info(self):
+        return "chunk {} (avr {:.1f})".format(self.last, self.mean())
+
 class ArgsContainerQueue(object):
     def __init__(self, put_conn, get_conn):
         self.put_conn = put_conn
@@ -1079,26 +2299,26 @@ class ArgsContainerQueue(object):
         self.put_lock = threading.Lock()
         self.get_lock = threading.Lock()
 
-    def put(self, item):
+    def _put(self, cmd, payload):
         with self.put_lock:
             try:
-                self.put_conn.send(item)
+                self.put_conn.send( (cmd, payload) )
                 kind, res = self.put_conn.recv()
             except:
                 while self.put_conn.poll(timeout=1):
                     self.put_conn.recv()
                 raise
         if kind == '#suc':
-            return
+            return res
         elif kind == '#exc':
             raise res
         else:
             raise RuntimeError("unknown kind '{}'".format(kind))
 
-    def get(self):
+    def _get(self, cmd, payload):
         with self.get_lock:
             try:
-                self.get_conn.send('#GET')
+                self.get_conn.send( (cmd, payload) )
                 kind, res = self.get_conn.recv()
             except:
                 while self.get_conn.poll(timeout=1):
@@ -1111,8 +2331,354 @@ class ArgsContainerQueue(object):
         else:
             raise RuntimeError("unknown kind '{}'".format(kind))
 
-        
+    def put(self, item):
+        self._put('#PUT', item)
+
+    def put_many(self, items):
+        """put all items using a single message through the pipe"""
+        self._put('#PUT_MANY', list(items))
+
+    def put_back(self, item_ids):
+        self._put('#PUT_BACK', list(item_ids))
+
+    def fail_ids(self, item_ids):
+        return self._put('#FAIL_IDS', list(item_ids))
+
+    def done_ids(self, item_ids):
+        return self._put('#DONE_IDS', list(item_ids))
+
+    def get(self):
+        return self._get('#GET', None)
+
+    def get_job(self):
+        return self._get('#GET_JOB', None)
+
+    def get_jobs(self, n):
+        return self._get('#GET_JOBS', n)
+
+    def get_many(self, n):
+        """get up to n items using a single message through the pipe
+
+        raises queue.Empty if there is no item at all
+        """
+        return self._get('#GET_MANY', n)
+
+    def get_chunk(self, rtt, max_n=None, client_id=None, nworkers=1):
+        """get a chunk of (id, item) pairs, its size is chosen by the container (see ArgsContainer.get_chunk)"""
+        return self._get('#GET_CHUNK', (rtt, max_n, client_id, nworkers))
+
+
+class ShardedArgsContainerQueue(object):
+    """the queue of a ShardedArgsContainer, spreads the requests round robin over the
+    queues (pipes) of the shards
+    """
+    def __init__(self, queues):
+        self.queues = queues
+        self._next = itertools.count()
+
+    def _queue(self):
+        return self.queues[next(self._next) % len(self.queues)]
+
+    def put(self, item):
+        self._queue().put(item)
+
+    def put_many(self, items):
+        self._queue().put_many(items)
+
+    def put_back(self, item_ids):
+        self._queue().put_back(item_ids)
+
+    def fail_ids(self, item_ids):
+        return self._queue().fail_ids(item_ids)
+
+    def done_ids(self, item_ids):
+        return self._queue().done_ids(item_ids)
+
+    def get(self):
+        return self._queue().get()
+
+    def get_job(self):
+        return self._queue().get_job()
+
+    def get_jobs(self, n):
+        return self._queue().get_jobs(n)
+
+    def get_many(self, n):
+        return self._queue().get_many(n)
+
+    def get_chunk(self, rtt, max_n=None, client_id=None, nworkers=1):
+        return self._queue().get_chunk(rtt, max_n, client_id, nworkers)
+
+
     
+def hash_arg(arg, hash_func='sha256'):
+    """the hash identifying an argument in the ArgsContainer
+
+    hash_func 'sha256': hex digest of SHA-256 (64 characters), 'blake2b': raw 16 byte digest
+    of BLAKE2b (faster and a quarter of the size), or a (picklable) function mapping the
+    binfootprint of the argument to its hash as bytes
+    """
+    data = bf.dump(arg)
+    if hash_func == 'sha256':
+        return hashlib.sha256(data).hexdigest()
+    elif hash_func == 'blake2b':
+        return hashlib.blake2b(data, digest_size=16).digest()
+    elif callable(hash_func):
+        return hash_func(data)
+    raise ValueError("unknown hash_func '{}', use 'sha256', 'blake2b' or a function".format(hash_func))
+
+def hash_args(args, hash_func='sha256'):
+    """list of the hashes of args (called by the process pool of JobManager_Server.args_from_list)"""
+    return [hash_arg(a, hash_func) for a in args]
+
+
+class SQLiteArgsStore(object):
+    """storage of the ArgsContainer in a SQLite database
+
+    Each item is a single row of the table args (id, hash, item) with an index on the hash
+    (a hex digest is stored as raw bytes, NULL for items without hash), added by add_many.
+    For reading it behaves like the dict / shelve storage of the ArgsContainer, which maps
+    '_<id>' to the item and the hash to the id.
+
+    The database uses write-ahead logging, inserts are committed in groups of commit_every
+    rows and by commit (called when the ArgsContainer is pickled or closed).
+    """
+    def __init__(self, fname, commit_every=10000):
+        self.fname = fname
+        self.commit_every = commit_every
+        # the ArgsContainer serializes the access by its lock
+        self.conn = sqlite3.connect(fname, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-65536")   # 64MB
+        self.conn.execute("CREATE TABLE IF NOT EXISTS args (id INTEGER PRIMARY KEY, hash BLOB, item BLOB NOT NULL)")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS args_hash ON args (hash)")
+        self.conn.commit()
+        self._pending = 0
+
+    def add_many(self, rows):
+        """add the items given as (id, hash, item) with a single statement"""
+        rows = [(item_id, self._hash_blob(item_hash), pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+                for item_id, item_hash, item in rows]
+        # a row with the same id or hash is a leftover of a crash (see ArgsContainer.put_restored)
+        self.conn.executemany("INSERT OR REPLACE INTO args VALUES (?, ?, ?)", rows)
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        if self._pending > 0:
+            self.conn.commit()
+            self._pending = 0
+
+    @staticmethod
+    def _hash_blob(item_hash):
+        if isinstance(item_hash, str):
+            return bytes.fromhex(item_hash)
+        return item_hash
+
+    @staticmethod
+    def _is_id_key(key):
+        # '_<id>', any other key is a hash (hex digest or bytes)
+        return isinstance(key, str) and key.startswith('_')
+
+    def _query(self, key):
+        if self._is_id_key(key):
+            return self.conn.execute("SELECT item FROM args WHERE id=?", (int(key[1:]),)).fetchone()
+        else:
+            return self.conn.execute("SELECT id FROM args WHERE hash=?", (self._hash_blob(key),)).fetchone()
+
+    def __getitem__(self, key):
+        row = self._query(key)
+        if row is None:
+            raise KeyError(key)
+        if self._is_id_key(key):
+            return pickle.loads(row[0])
+        return row[0]
+
+    def __contains__(self, key):
+        if self._is_id_key(key):
+            return self.conn.execute("SELECT 1 FROM args WHERE id=?", (int(key[1:]),)).fetchone() is not None
+        return self._query(key) is not None
+
+    def __len__(self):
+        # two keys per item as for the dict / shelve storage
+        return 2*self.conn.execute("SELECT COUNT(*) FROM args").fetchone()[0]
+
+    def discard(self, item_id):
+        """remove the item with the given id"""
+        self.conn.execute("DELETE FROM args WHERE id=?", (item_id,))
+        self._pending += 1
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+# the states of an id in the ArgsStateTable
+class SpeculativeJobId(int):
+    """the id of a job handed out once more (see ArgsContainer, speculative)
+
+    The client asks the job_q whether such a job is done (done_ids) before starting it.
+    """
+    pass
+
+ARG_NOT_GOTTEN = 0
+ARG_GOTTEN = 1
+ARG_MARKED = 2
+ARG_FAILED = 3
+
+class ArgsStateTable(object):
+    """the state of the items of an ArgsContainer, a single byte per id
+
+    An id is either not gotten, gotten (in flight), marked or failed, the number of ids in each
+    state is counted. The not gotten ids are handed out (pop) in increasing order by a cursor moving
+    through the table, except for ids which are put back behind the cursor, these are kept
+    on a stack and handed out first.
+
+    Once an id is added with a priority, the priorities of all ids are kept (ids without
+    priority get 0) and the not gotten ids are handed out from a heap, highest priority first,
+    ids of equal priority in increasing order. An id which is put back keeps its priority.
+
+    The pickled form is the zlib compressed table where gotten ids become not gotten
+    (the calculations of items gotten but not marked are considered lost), together with
+    the priorities. Failed ids stay failed.
+    """
+    def __init__(self):
+        self._state = bytearray()
+        self._put_back = array.array('q')
+        self._cursor = 0
+        self._priority = None
+        self._heap = None
+        self.n_not_gotten = 0
+        self.n_marked = 0
+        self.n_failed = 0
+
+    def __len__(self):
+        return len(self._state)
+
+    def state(self, item_id):
+        if (item_id < 0) or (item_id >= len(self._state)):
+            raise KeyError(item_id)
+        return self._state[item_id]
+
+    def priority(self, item_id):
+        """the priority of the id, None if no priorities are used"""
+        self.state(item_id)
+        if self._priority is None:
+            return None
+        return self._priority[item_id]
+
+    def add(self, priority=None):
+        """add a new (not gotten) id and return it"""
+        if (priority is not None) and (self._priority is None):
+            self._use_priorities()
+        item_id = len(self._state)
+        self._state.append(ARG_NOT_GOTTEN)
+        self.n_not_gotten += 1
+        if self._priority is not None:
+            self._priority.append(priority or 0)
+            heapq.heappush(self._heap, (-self._priority[item_id], item_id))
+        return item_id
+
+    def _use_priorities(self):
+        # all ids known so far get priority 0
+        self._priority = array.array('d', bytes(8*len(self._state)))
+        self._heap = [(0., item_id) for item_id in self.ids(ARG_NOT_GOTTEN)]
+        self._put_back = array.array('q')
+
+    def pop(self):
+        """return a not gotten id and set it gotten, raises KeyError if there is none"""
+        # ids put back and marked since are skipped
+        if self._heap is not None:
+            while True:
+                if not self._heap:
+                    raise KeyError("no id left")
+                item_id = heapq.heappop(self._heap)[1]
+                if self._state[item_id] == ARG_NOT_GOTTEN:
+                    break
+        else:
+            while self._put_back:
+                item_id = self._put_back.pop()
+                if self._state[item_id] == ARG_NOT_GOTTEN:
+                    break
+            else:
+                item_id = self._state.find(ARG_NOT_GOTTEN, self._cursor)
+                if item_id < 0:
+                    self._cursor = len(self._state)
+                    raise KeyError("no id left")
+                self._cursor = item_id + 1
+        self._state[item_id] = ARG_GOTTEN
+        self.n_not_gotten -= 1
+        return item_id
+
+    def put_back(self, item_id):
+        """set a gotten id not gotten again"""
+        self._state[item_id] = ARG_NOT_GOTTEN
+        self.n_not_gotten += 1
+        if self._heap is not None:
+            heapq.heappush(self._heap, (-self._priority[item_id], item_id))
+        elif item_id < self._cursor:
+            self._put_back.append(item_id)
+
+    def mark(self, item_id):
+        """set a gotten (or not gotten) id marked"""
+        if self._state[item_id] == ARG_NOT_GOTTEN:
+            self.n_not_gotten -= 1
+        self._state[item_id] = ARG_MARKED
+        self.n_marked += 1
+
+    def fail(self, item_id):
+        """set a gotten (or not gotten) id failed"""
+        if self._state[item_id] == ARG_NOT_GOTTEN:
+            self.n_not_gotten -= 1
+        self._state[item_id] = ARG_FAILED
+        self.n_failed += 1
+
+    def ids(self, state):
+        """iterate over the ids in the given state"""
+        item_id = self._state.find(state)
+        while item_id >= 0:
+            yield item_id
+            item_id = self._state.find(state, item_id + 1)
+
+    def __getstate__(self):
+        state = zlib.compress(bytes(self._state).replace(bytes([ARG_GOTTEN]), bytes([ARG_NOT_GOTTEN])), 1)
+        if self._priority is None:
+            return (state, None)
+        return (state, zlib.compress(self._priority.tobytes(), 1))
+
+    def __setstate__(self, state):
+        if isinstance(state, bytes):
+            # dumped without priorities
+            state = (state, None)
+        self._state = bytearray(zlib.decompress(state[0]))
+        self._put_back = array.array('q')
+        self._cursor = 0
+        self.n_marked = self._state.count(ARG_MARKED)
+        self.n_failed = self._state.count(ARG_FAILED)
+        self.n_not_gotten = len(self._state) - self.n_marked - self.n_failed
+        if state[1] is None:
+            self._priority = None
+            self._heap = None
+        else:
+            self._priority = array.array('d')
+            self._priority.frombytes(zlib.decompress(state[1]))
+            self._heap = [(-self._priority[item_id], item_id) for item_id in self.ids(ARG_NOT_GOTTEN)]
+            heapq.heapify(self._heap)
+
+    @classmethod
+    def from_marked_ids(cls, n, marked_ids):
+        """table of n ids with the ids marked_ids marked and all others not gotten"""
+        table = cls()
+        table._state = bytearray(n)
+        for item_id in marked_ids:
+            table._state[item_id] = ARG_MARKED
+        table.n_marked = len(marked_ids)
+        table.n_not_gotten = n - table.n_marked
+        return table
+
+
 class ArgsContainer(object):
     r"""a container for the arguments hold by the jobmanager server
     and fed to the jobmanager clients
@@ -1125,32 +2691,90 @@ class ArgsContainer(object):
     Additional features:
         - items may only be inserted once via 'put'
         - if an item was drawn using 'get', it may be reinserted using 'put'
-        - items are identified via hash values, using sha256
+        - items are identified via hash values, using sha256 by default or the hash_func
+          given (see hash_arg), for hash_func None items are not deduplicated at all, every
+          item put is a new item (the caller guarantees that the items are unique) and can
+          only be marked by its id
         - items that were drawn using 'get' can be marked using 'mark'
         - items that are 'marked' can not be reinserted
-        - the class is pickable, when unpickled, ALL items that are NOT marked
+        - the class is pickable, when unpickled, ALL items that are NOT marked (or failed)
           will be accessible via 'get'
+        - 'get_job' and 'get_jobs' hand out the items together with their id, which allows
+          to reinsert ('put_back') and mark ('mark_id') them without hashing them again,
+          the hash is calculated only once, when the item is inserted
+        - an item may be inserted with a priority (e.g. its expected runtime), or the priority
+          is given by cost_func(item) if cost_func is set, items with higher priority are
+          drawn first, a reinserted item keeps its priority (see ArgsStateTable)
+        - if release_marked is set, marked items are removed from the storage (only their
+          state is kept), so a marked item is no longer known when inserted again
+        - if lease_time is set, an item handed out by 'get_job(s)' is leased until a deadline,
+          'expire_leases' reinserts the items whose lease has expired (their calculation is
+          considered lost), such an item may still be marked, the first mark wins, a
+          second one raises RuntimeWarning (see lease_time)
+        - if speculative is set and there is no item left to hand out, the items handed out
+          longer than speculative_factor times the median job time ago (stragglers) are handed
+          out once more (with a SpeculativeJobId), again the first mark wins, 'done_ids' tells
+          whether such a job has finished meanwhile
+        - items whose calculation failed are set failed by 'fail_ids', a job is either
+          marked or failed, whatever comes first, the other one is discarded
+        - if journal is set (see Journal), the new items are appended to the journal
 
     These Features allows the following workflow for the Server/Client communication.
 
+    The items are kept in a dict (path None) or on disk in the directory path, using
+    a shelve (backend 'shelve') or a SQLite database (backend 'sqlite', see SQLiteArgsStore).
+
     The Client used 'get' to draw an item. Onces successfully processed the client
     returns the item and its results. The item will be marked once it was received by the server.
     Now the item is 'save', even when shutting down the server, dumping its state and restarting
     the server, the item will not be calculated again.
     """
-    def __init__(self, path=None):
+    def __init__(self, path=None, backend='shelve', hash_func='sha256'):
+        if backend not in ('shelve', 'sqlite'):
+            raise ValueError("unknown backend '{}', use 'shelve' or 'sqlite'".format(backend))
+        if not ((hash_func is None) or (hash_func in ('sha256', 'blake2b')) or callable(hash_func)):
+            raise ValueError("unknown hash_func '{}', use 'sha256', 'blake2b', a function or None".format(hash_func))
         self._path = path
+        self._backend = backend
+        self.hash_func = hash_func
         self._lock = threading.Lock()
         
         if self._path is None:
             self.data = {}
         else:
-            self._open_shelve()
+            self._open_storage()
 
         self._closed = False
-        self._not_gotten_ids = set()
-        self._marked_ids = set()
-        self._max_id = 0
+        self._ids = ArgsStateTable()
+        self.chunk_sizer = ChunkSizer()
+        self.cost_func = None
+        self.release_marked = False
+        # id -> storage key of its hash of the items stored while release_marked is set
+        self._release_keys = {}
+        self.journal = None
+        self._init_dispatch()
+
+    def _init_dispatch(self):
+        # the deadline of the lease is lease_time seconds after the items have been handed out
+        # or for lease_time 'auto' lease_factor times the estimated runtime of all items
+        # handed out at once, but at least lease_min_time
+        self.lease_time = None
+        self.lease_factor = 10
+        self.lease_min_time = 60
+        # id -> deadline of the gotten ids, the heap of (deadline, id) finds the expired ones
+        self._leases = {}
+        self._lease_heap = []
+        # ids reinserted because their lease expired, they may still be marked
+        self._expired = set()
+        self.n_lease_expired = 0
+
+        self.speculative = False
+        self.speculative_factor = 3
+        # id -> time handed out of the gotten ids (oldest first), if speculative
+        self._dispatched = {}
+        # ids handed out once more
+        self._speculated = set()
+        self.n_speculative = 0
 
     def get_queue(self):
         c_get_1, c_get_2 = mp.Pipe()
@@ -1170,62 +2794,115 @@ class ArgsContainer(object):
     def _receiver(self, conn):
         while True:
             try:
-                item = conn.recv()
+                cmd, payload = conn.recv()
             except EOFError:
                 break
+            res = None
             try:
-                self.put(item)
+                if cmd == '#PUT':
+                    self.put(payload)
+                elif cmd == '#PUT_MANY':
+                    self.put_many(payload)
+                elif cmd == '#PUT_BACK':
+                    self.put_back(payload)
+                elif cmd == '#FAIL_IDS':
+                    res = self.fail_ids(payload)
+                elif cmd == '#DONE_IDS':
+                    res = self.done_ids(payload)
+                else:
+                    raise RuntimeError("reveived unknown command '{}'".format(cmd))
             except Exception as e:
                 conn.send( ('#exc', type(e)) )
             else:
-                conn.send( ('#suc', None) )
+                conn.send( ('#suc', res) )
 
     def _sender(self, conn):
         while True:
             try:
-                msg = conn.recv()
+                cmd, payload = conn.recv()
             except EOFError:
                 break
-            if msg == '#GET':
+            if cmd == '#GET':
                 try:
                     conn.send( ('#res', self.get()) )
                 except Exception as e:
                     conn.send( ('#exc', type(e)) )
-            else:
-                raise RuntimeError("reveived unknown message '{}'".format(msg))
-
-    def _open_shelve(self, new_shelve=True):
-        if os.path.exists(self._path):
-            if os.path.isfile(self._path):
-                raise RuntimeWarning("can not create shelve, path '{}' is an existing file".format(self._path))
-            if new_shelve:
-                raise RuntimeError("a shelve with name {} already exists".format(self._path))
+            elif cmd == '#GET_MANY':
+                try:
+                    conn.send( ('#res', self.get_many(payload)) )
+                except Exception as e:
+                    conn.send( ('#exc', type(e)) )
+            elif cmd == '#GET_JOB':
+                try:
+                    conn.send( ('#res', self.get_job()) )
+                except Exception as e:
+                    conn.send( ('#exc', type(e)) )
+            elif cmd == '#GET_JOBS':
+                try:
+                    conn.send( ('#res', self.get_jobs(payload)) )
+                except Exception as e:
+                    conn.send( ('#exc', type(e)) )
+            elif cmd == '#GET_CHUNK':
+                try:
+                    conn.send( ('#res', self.get_chunk(*payload)) )
+                except Exception as e:
+                    conn.send( ('#exc', type(e)) )
+            else:
+                raise RuntimeError("reveived unknown message '{}'".format(cmd))
+
+    def _open_storage(self, new_storage=True):
+        if os.path.exists(self._path):
+            if os.path.isfile(self._path):
+                raise RuntimeWarning("can not create shelve, path '{}' is an existing file".format(self._path))
+            if new_storage:
+                raise RuntimeError("a shelve with name {} already exists".format(self._path))
         else:
             os.makedirs(self._path)
         fname = os.path.abspath(os.path.join(self._path, 'args'))
-        self.data = shelve.open(fname)
+        if self._backend == 'sqlite':
+            self.data = SQLiteArgsStore(fname + '.sqlite')
+        else:
+            self.data = shelve.open(fname)
 
             
     def __getstate__(self):
         with self._lock:
             if self._path is None:
-                return (self.data, self._not_gotten_ids, self._marked_ids, self._max_id)
+                return (self.data, self._ids, self._backend, self.hash_func)
             else:
-                return (self._path, self._not_gotten_ids, self._marked_ids, self._max_id)
+                if self._backend == 'sqlite':
+                    self.data.commit()
+                else:
+                    self.data.sync()
+                return (self._path, self._ids, self._backend, self.hash_func)
         
     def __setstate__(self, state):
-        tmp, tmp_not_gotten_ids, self._marked_ids, self._max_id = state
         # the not gotten ones are all items except the markes ones
-        # the old gotten ones which are not marked where lost
-        self._not_gotten_ids = set(range(self._max_id)) - self._marked_ids
+        # the old gotten ones which are not marked where lost (see ArgsStateTable)
+        if isinstance(state[1], ArgsStateTable):
+            tmp, self._ids, self._backend = state[:3]
+            self.hash_func = state[3] if len(state) > 3 else 'sha256'
+        else:
+            # dumped by an older version, the states are sets of ids
+            tmp, tmp_not_gotten_ids, marked_ids, max_id = state[:4]
+            self._ids = ArgsStateTable.from_marked_ids(max_id, marked_ids)
+            self._backend = state[4] if len(state) > 4 else 'shelve'
+            self.hash_func = 'sha256'
         if isinstance(tmp, dict):
             self.data = tmp
             self._path = None
         else:
             self._path = tmp
-            self._open_shelve(new_shelve=False)
+            self._open_storage(new_storage=False)
         self._closed = False
         self._lock = threading.Lock()
+        self.chunk_sizer = ChunkSizer()
+        self.cost_func = None
+        self.release_marked = False
+        # id -> storage key of its hash of the items stored while release_marked is set
+        self._release_keys = {}
+        self.journal = None
+        self._init_dispatch()
         
     def close(self):
         self._closed = True
@@ -1242,18 +2919,26 @@ class ArgsContainer(object):
             else:
                 self.data.clear()
             self._closed = False
-            self._not_gotten_ids = set()
-            self._marked_ids = set()
+            self._ids = ArgsStateTable()
+            self._leases.clear()
+            self._lease_heap = []
+            self._expired.clear()
+            self._dispatched.clear()
+            self._speculated.clear()
+            self._release_keys.clear()
         
     def qsize(self):
-        return len(self._not_gotten_ids)
+        return self._ids.n_not_gotten
 
     def put_items(self):
-        s = len(self.data)//2
-        return s
+        # the ids are consecutive
+        return len(self._ids)
 
     def marked_items(self):
-        return len(self._marked_ids)
+        return self._ids.n_marked
+
+    def failed_items(self):
+        return self._ids.n_failed
     
     def gotten_items(self):
         return self.put_items() - self.qsize()
@@ -1262,71 +2947,616 @@ class ArgsContainer(object):
         return self.put_items() - self.marked_items()
 
 
-    def put(self, item):
+    def put(self, item, priority=None):
+        self.put_many([item], priorities=None if priority is None else [priority])
+
+    def put_many(self, items, hashes=None, priorities=None):
+        """put all items while holding the lock only once
+
+        the items are processed in order, if an item is rejected (ValueError)
+        the items before have been inserted already, the new items are written
+        to the storage at once
+
+        hashes (see hash_arg) may be given if they have been calculated already (ignored
+        for hash_func None), priorities of the items may be given as well (otherwise
+        cost_func is used, if set)
+        """
         with self._lock:
             if self._closed:
                 raise ContainerClosedError
-    
-            item_hash = hashlib.sha256(bf.dump(item)).hexdigest()
-            # print("ADD arg with hash", item_hash)
-            # print(item)
-            # print()
-            if item_hash in self.data:
-                item_id = self.data[item_hash]
-                if (item_id in self._not_gotten_ids) or (item_id in self._marked_ids):
-                    # the item has either not 'gotten' yet or is 'marked'
-                    # in both cases a reinsert is not allowed  
-                    msg = ("do not add the same argument twice! If you are sure, they are not the same, "+
-                           "there might be an error with the binfootprint mehtods or a hash collision!")
-                    log.critical(msg)
-                    raise ValueError(msg)
-                else:
-                    # the item is allready known, but has been 'gotten' and not marked yet
-                    # thefore a reinster it allowd
-                    self._not_gotten_ids.add(item_id) 
+            if self.hash_func is None:
+                items_hashes = ((item, None) for item in items)
+            elif hashes is None:
+                items_hashes = ((item, hash_arg(item, self.hash_func)) for item in items)
             else:
-                str_id = '_'+str(self._max_id)
-                self.data[str_id] = item
-                self.data[item_hash] = self._max_id
-                self._not_gotten_ids.add(self._max_id)
-                self._max_id += 1
+                items_hashes = zip(items, hashes)
+            if priorities is None:
+                priorities = itertools.repeat(None)
+            # hash (id for hash_func None) -> (id, item) of the new items
+            pending = {}
+            try:
+                for (item, item_hash), priority in zip(items_hashes, priorities):
+                    self._put(item, item_hash, priority, pending)
+            finally:
+                self._store(pending)
+
+    def _put(self, item, item_hash, priority, pending):
+        # needs to be called with self._lock acquired, new items are added to pending
+        # and have to be stored afterwards (_store)
+        item_id = None
+        if item_hash is not None:
+            key = self._data_key(item_hash)
+            if item_hash in pending:
+                item_id = pending[item_hash][0]
+            elif key in self.data:
+                item_id = self.data[key]
+                if item_id >= len(self._ids):
+                    # written to the storage on disk after the last snapshot but not journaled
+                    # before a crash (see put_restored), the item is new
+                    item_id = None
+        if item_id is None:
+            if (priority is None) and (self.cost_func is not None):
+                priority = self.cost_func(item)
+            item_id = self._ids.add(priority)
+            pending[item_id if item_hash is None else item_hash] = (item_id, item)
+            return
+
+        if self._ids.state(item_id) != ARG_GOTTEN:
+            # the item has either not 'gotten' yet or is 'marked' or 'failed'
+            # in all cases a reinsert is not allowed  
+            msg = ("do not add the same argument twice! If you are sure, they are not the same, "+
+                   "there might be an error with the binfootprint mehtods or a hash collision!")
+            log.critical(msg)
+            raise ValueError(msg)
+        else:
+            # the item is allready known, but has been 'gotten' and not marked yet
+            # thefore a reinster it allowd
+            self._ids.put_back(item_id)
+            self._end_dispatch(item_id)
+
+    def _store(self, pending):
+        # needs to be called with self._lock acquired
+        if isinstance(self.data, SQLiteArgsStore):
+            if self.hash_func is None:
+                self.data.add_many((item_id, None, item) for item_id, item in pending.values())
+            else:
+                self.data.add_many((item_id, item_hash, item) for item_hash, (item_id, item) in pending.items())
+        else:
+            for item_hash, (item_id, item) in pending.items():
+                self.data['_'+str(item_id)] = item
+                if self.hash_func is not None:
+                    key = self._data_key(item_hash)
+                    self.data[key] = item_id
+                    if self.release_marked:
+                        self._release_keys[item_id] = key
+        if (self.journal is not None) and pending:
+            self.journal.append(('put', [(item_id, item, self._ids.priority(item_id))
+                                         for item_id, item in pending.values()]))
+
+    def put_restored(self, rows):
+        """put the items given as (id, item, priority) (replay of a Journal)
+
+        rows with an id known already (in the snapshot) are skipped, the others have to
+        continue the ids. An item on disk written after the snapshot is written again.
+        """
+        with self._lock:
+            pending = {}
+            for item_id, item, priority in rows:
+                if item_id < len(self._ids):
+                    continue
+                if item_id != len(self._ids):
+                    raise RuntimeError("journal does not match the snapshot, argument {} is missing".format(len(self._ids)))
+                self._ids.add(priority)
+                if self.hash_func is None:
+                    pending[item_id] = (item_id, item)
+                else:
+                    pending[hash_arg(item, self.hash_func)] = (item_id, item)
+            self._store(pending)
+
+    def _data_key(self, item_hash):
+        # the keys of a shelve are strings
+        if isinstance(item_hash, bytes) and (self._path is not None) and (self._backend == 'shelve'):
+            return item_hash.hex()
+        return item_hash
+
+    def put_back(self, item_ids):
+        """reinsert the items with the given ids (see get_job), which have been gotten but not marked
+
+        ids marked or failed (by another copy of the job) and ids reinserted already because
+        their lease has expired are skipped, for an id handed out once more (see speculative)
+        the other copy is still out, so the item stays gotten
+        """
+        with self._lock:
+            if self._closed:
+                raise ContainerClosedError
+            for item_id in item_ids:
+                state = self._ids.state(item_id)
+                if (state in (ARG_MARKED, ARG_FAILED)) or ((state == ARG_NOT_GOTTEN) and (item_id in self._expired)):
+                    continue
+                if state != ARG_GOTTEN:
+                    raise ValueError("item {} has not been gotten, can not put it back".format(item_id))
+                if item_id in self._speculated:
+                    # only one copy is out now, it may be handed out once more again
+                    self._speculated.discard(item_id)
+                    continue
+                self._ids.put_back(item_id)
+                self._end_dispatch(item_id)
+
+    def fail_ids(self, item_ids):
+        """the calculation of the items with the given ids failed (see fail_q), set them failed
+
+        A job is either marked or failed: ids marked or failed before (a copy of the job
+        handed out again) are skipped and a result of a failed id is discarded (see mark_id).
+        Returns the ids set failed, only these are to be reported by the fail_q.
+        """
+        failed = []
+        with self._lock:
+            for item_id in item_ids:
+                if self._ids.state(item_id) in (ARG_MARKED, ARG_FAILED):
+                    continue
+                self._ids.fail(item_id)
+                self._end_dispatch(item_id)
+                self._expired.discard(item_id)
+                self._speculated.discard(item_id)
+                failed.append(item_id)
+            if (self.journal is not None) and failed:
+                self.journal.append(('fail_ids', failed))
+        return failed
+
+    def done_ids(self, item_ids):
+        """the ids among item_ids which are marked or failed
+
+        A client checks a job handed out once more (see SpeculativeJobId) before starting
+        it, the job need not be calculated if the other copy has finished meanwhile.
+        """
+        with self._lock:
+            return [item_id for item_id in item_ids if self._ids.state(item_id) in (ARG_MARKED, ARG_FAILED)]
+
+    def _dispatch(self, item_ids):
+        # needs to be called with self._lock acquired
+        if self.speculative:
+            now = time.time()
+            for item_id in item_ids:
+                # moves the id to the end
+                self._dispatched.pop(item_id, None)
+                self._dispatched[item_id] = now
+        if self.lease_time is None:
+            return
+        if self.lease_time == 'auto':
+            duration = self.lease_min_time
+            if self.chunk_sizer.job_time is not None:
+                duration = max(duration, self.lease_factor * self.chunk_sizer.job_time * len(item_ids))
+        else:
+            duration = self.lease_time
+        deadline = time.time() + duration
+        for item_id in item_ids:
+            self._leases[item_id] = deadline
+            heapq.heappush(self._lease_heap, (deadline, item_id))
+
+    def _end_dispatch(self, item_id):
+        # needs to be called with self._lock acquired
+        self._leases.pop(item_id, None)
+        self._dispatched.pop(item_id, None)
+
+    def _stragglers(self, n):
+        # needs to be called with self._lock acquired, up to n ids to hand out once more
+        median = self.chunk_sizer.median_job_time()
+        if median is None:
+            return []
+        t_max = time.time() - self.speculative_factor * median
+        item_ids = []
+        for item_id, t in self._dispatched.items():
+            if (t > t_max) or (len(item_ids) >= n):
+                break
+            if item_id not in self._speculated:
+                item_ids.append(item_id)
+        self._speculated.update(item_ids)
+        self.n_speculative += len(item_ids)
+        return item_ids
+
+    def expire_leases(self):
+        """reinsert the gotten items whose lease has expired, returns their number"""
+        with self._lock:
+            now = time.time()
+            n = 0
+            while self._lease_heap and (self._lease_heap[0][0] <= now):
+                deadline, item_id = heapq.heappop(self._lease_heap)
+                if self._leases.get(item_id) != deadline:
+                    # the lease has ended before (mark, put_back, fail_ids)
+                    continue
+                self._end_dispatch(item_id)
+                self._ids.put_back(item_id)
+                self._expired.add(item_id)
+                n += 1
+            if n > 0:
+                log.warning("the lease of %s item(s) has expired, reinsert them", n)
+            self.n_lease_expired += n
+            return n
 
-            #print("put", self._not_gotten_ids, self._marked_ids)
-    
     def get(self):
+        return self.get_job()[1]
+
+    def get_job(self):
+        """get an item together with its id, (id, item)"""
+        return self.get_jobs(1)[0]
+
+    def get_many(self, n):
+        """get up to n items while holding the lock only once
+
+        raises queue.Empty if there is no item at all
+        """
+        return [item for item_id, item in self.get_jobs(n)]
+
+    def get_jobs(self, n, speculate=True):
+        """as get_many, but returns a list of (id, item) pairs
+
+        stragglers are handed out only if speculate is set as well (see speculative)
+        """
         with self._lock:
-            #print("get", self._not_gotten_ids, self._marked_ids)
             if self._closed:
                 raise ContainerClosedError
-            try:
-                get_idx = self._not_gotten_ids.pop()
-            except KeyError:
+            jobs = []
+            while len(jobs) < n:
+                try:
+                    get_idx = self._ids.pop()
+                except KeyError:
+                    break
+                jobs.append((get_idx, self.data['_' + str(get_idx)]))
+            if (len(jobs) == 0) and self.speculative and speculate:
+                jobs = [(SpeculativeJobId(get_idx), self.data['_' + str(get_idx)]) for get_idx in self._stragglers(n)]
+            if len(jobs) == 0:
                 raise queue.Empty
-    
-            str_id = '_' + str(get_idx)
-            item = self.data[str_id]
-            item_hash = hashlib.sha256(bf.dump(item)).hexdigest()
-            # print("GET item with hash", item_hash)
-            # print(item)
-            # print()
-            return item
+            self._dispatch([get_idx for get_idx, item in jobs])
+            return jobs
+
+    def get_chunk(self, rtt, max_n=None, client_id=None, nworkers=1):
+        """get up to max_n (id, item) pairs, as many as chosen by the chunk_sizer (see ChunkSizer)
+
+        rtt is the round trip time measured by the client (None if unknown), nworkers the number
+        of workers of the client identified by client_id
+
+        raises queue.Empty if there is no item at all
+        """
+        n = self.chunk_sizer.size(rtt, self.qsize(), client_id, nworkers)
+        if max_n is not None:
+            n = min(n, max_n)
+        jobs = self.get_jobs(n)
+        self.chunk_sizer.record(len(jobs))
+        return jobs
     
     def mark(self, item):
+        if self.hash_func is None:
+            raise ValueError("items without hash (hash_func None) can only be marked by their id, use mark_id")
+        item_hash = hash_arg(item, self.hash_func)
         with self._lock:
-            item_hash = hashlib.sha256(bf.dump(item)).hexdigest()
             # print("MARK item with hash", item_hash)
             # print(item)
             # print()
 
-            item_id = self.data[item_hash]
-            #print("mark", item_id, self._not_gotten_ids, self._marked_ids)
-            if item_id in self._not_gotten_ids:
-                raise ValueError("item not gotten yet, can not be marked")
-            if item_id in self._marked_ids:
-                raise RuntimeWarning("item already marked")
-            self._marked_ids.add(item_id)
+            item_id = self.data[self._data_key(item_hash)]
+            self._mark_id(item_id)
+            return item_id
+
+    def mark_id(self, item_id):
+        """mark the item with the given id (see get_job)"""
+        with self._lock:
+            self._mark_id(item_id)
+
+    def mark_restored(self, item_id):
+        """mark the item with the given id in any state (replay of a Journal)
+
+        returns False if the item has been marked already
+        """
+        with self._lock:
+            if self._ids.state(item_id) in (ARG_MARKED, ARG_FAILED):
+                return False
+            self._ids.mark(item_id)
+            self._end_dispatch(item_id)
+            if self.release_marked:
+                self._release(item_id)
+            return True
+
+    def _mark_id(self, item_id):
+        # needs to be called with self._lock acquired
+        state = self._ids.state(item_id)
+        if (state == ARG_NOT_GOTTEN) and (item_id not in self._expired):
+            raise ValueError("item not gotten yet, can not be marked")
+        if state == ARG_MARKED:
+            raise RuntimeWarning("item already marked")
+        if state == ARG_FAILED:
+            raise RuntimeWarning("item already failed")
+        self._ids.mark(item_id)
+        self._end_dispatch(item_id)
+        self._expired.discard(item_id)
+        self._speculated.discard(item_id)
+        if self.release_marked:
+            self._release(item_id)
+
+    def _release(self, item_id):
+        # needs to be called with self._lock acquired
+        if isinstance(self.data, SQLiteArgsStore):
+            self.data.discard(item_id)
+        else:
+            if ('_' + str(item_id)) not in self.data:
+                # released on disk already, after the last snapshot (see mark_restored)
+                return
+            item = self.data.pop('_' + str(item_id))
+            if self.hash_func is not None:
+                # items stored before release_marked was set (e.g. restored ones) are hashed again
+                key = self._release_keys.pop(item_id, None)
+                if key is None:
+                    key = self._data_key(hash_arg(item, self.hash_func))
+                del self.data[key]
+
+
+
 
+class _ShardJournal(object):
+    # the journal of the shard i of a ShardedArgsContainer, the records of the shard (with
+    # its local ids) are appended as ('shard', i, record) (see JobManager_Server._replay)
+    def __init__(self, journal, shard):
+        self.journal = journal
+        self.shard = shard
 
+    def append(self, record):
+        self.journal.append(('shard', self.shard, record))
+
+
+class _ArgsShardChannel(object):
+    # the requests through the pipe of the shard i of a ShardedArgsContainer,
+    # served by the shard i first (see ShardedArgsContainer.get_jobs)
+    def __init__(self, container, shard):
+        self.container = container
+        self.shard = shard
+
+    get_queue = ArgsContainer.get_queue
+    _sender = ArgsContainer._sender
+    _receiver = ArgsContainer._receiver
+
+    def put(self, item):
+        self.container.put(item)
+
+    def put_many(self, items):
+        self.container.put_many(items)
+
+    def put_back(self, item_ids):
+        self.container.put_back(item_ids)
+
+    def fail_ids(self, item_ids):
+        return self.container.fail_ids(item_ids)
+
+    def done_ids(self, item_ids):
+        return self.container.done_ids(item_ids)
+
+    def get(self):
+        return self.get_job()[1]
+
+    def get_job(self):
+        return self.get_jobs(1)[0]
+
+    def get_many(self, n):
+        return [item for item_id, item in self.get_jobs(n)]
+
+    def get_jobs(self, n):
+        return self.container.get_jobs(n, start=self.shard)
+
+    def get_chunk(self, rtt, max_n=None, client_id=None, nworkers=1):
+        return self.container.get_chunk(rtt, max_n, client_id, nworkers, start=self.shard)
+
+
+class ShardedArgsContainer(object):
+    """an ArgsContainer split into n_shards ArgsContainers (shards), each with its own lock and storage
+
+    An item belongs to the shard given by its hash, thus it can be inserted only once (for
+    hash_func None the items are spread round robin), the id of the item with the id local_id
+    within the shard i is local_id*n_shards + i.
+
+    get_queue returns a queue with a pipe (and threads serving it) per shard, the requests are spread
+    round robin over the pipes. A request through the pipe i is served by the shard i, if it has no
+    item left by the next one and so on. Items are handed out speculatively (see ArgsContainer) only
+    if no shard has any item left.
+
+    The counters (qsize, put_items, ...) are the sums over the shards. The shards share the
+    chunk_sizer, the options (cost_func, lease_time, ...) are set for all shards. The records of
+    a shard in the journal are tagged with the index of the shard.
+    """
+    _SHARED_ATTRIBUTES = ('chunk_sizer', 'cost_func', 'release_marked', 'lease_time', 'lease_factor',
+                          'lease_min_time', 'speculative', 'speculative_factor')
+
+    def __init__(self, n_shards, path=None, backend='shelve', hash_func='sha256'):
+        self.n_shards = n_shards
+        self._path = path
+        self.shards = [ArgsContainer(None if path is None else os.path.join(path, 'shard{}'.format(i)),
+                                     backend, hash_func)
+                       for i in range(n_shards)]
+        self._init_shared()
+
+    def _init_shared(self):
+        self.hash_func = self.shards[0].hash_func
+        self._next = itertools.count()
+        self._next_put = itertools.count()
+        self.chunk_sizer = ChunkSizer()
+        self.cost_func = None
+        self.release_marked = False
+        self.journal = None
+        self.lease_time = None
+        self.lease_factor = 10
+        self.lease_min_time = 60
+        self.speculative = False
+        self.speculative_factor = 3
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._SHARED_ATTRIBUTES:
+            for shard in self.shards:
+                setattr(shard, name, value)
+        elif name == 'journal':
+            for i, shard in enumerate(self.shards):
+                shard.journal = None if value is None else _ShardJournal(value, i)
+
+    def __getstate__(self):
+        return (self.shards, self._path)
+
+    def __setstate__(self, state):
+        self.shards, self._path = state
+        self.n_shards = len(self.shards)
+        self._init_shared()
+
+    def get_queue(self):
+        return ShardedArgsContainerQueue([_ArgsShardChannel(self, i).get_queue() for i in range(self.n_shards)])
+
+    def _shard(self, item_hash):
+        if isinstance(item_hash, bytes):
+            return int.from_bytes(item_hash[:4], 'big') % self.n_shards
+        if isinstance(item_hash, str):
+            try:
+                return int(item_hash[:8], 16) % self.n_shards
+            except ValueError:
+                pass
+        # any other digest of a user supplied hash_func (e.g. an int or a tuple)
+        digest = hashlib.blake2b(repr(item_hash).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % self.n_shards
+
+    def _by_shard(self, item_ids):
+        # the local ids grouped by shard
+        local_ids = [[] for i in range(self.n_shards)]
+        for item_id in item_ids:
+            local_ids[item_id % self.n_shards].append(item_id // self.n_shards)
+        return zip(self.shards, local_ids)
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def close_shelve(self):
+        for shard in self.shards:
+            shard.close_shelve()
+
+    def clear(self):
+        for shard in self.shards:
+            shard.clear()
+        if (self._path is not None) and os.path.exists(self._path):
+            rmtree(self._path)
+
+    def qsize(self):
+        return sum(shard.qsize() for shard in self.shards)
+
+    def put_items(self):
+        return sum(shard.put_items() for shard in self.shards)
+
+    def marked_items(self):
+        return sum(shard.marked_items() for shard in self.shards)
+
+    def failed_items(self):
+        return sum(shard.failed_items() for shard in self.shards)
+
+    def gotten_items(self):
+        return self.put_items() - self.qsize()
+
+    def unmarked_items(self):
+        return self.put_items() - self.marked_items()
+
+    @property
+    def n_lease_expired(self):
+        return sum(shard.n_lease_expired for shard in self.shards)
+
+    @property
+    def n_speculative(self):
+        return sum(shard.n_speculative for shard in self.shards)
+
+    def put(self, item, priority=None):
+        self.put_many([item], priorities=None if priority is None else [priority])
+
+    def put_many(self, items, hashes=None, priorities=None):
+        """as ArgsContainer.put_many, a single call per shard"""
+        if self.hash_func is None:
+            hashes = itertools.repeat(None)
+        elif hashes is None:
+            items = list(items)
+            hashes = [hash_arg(item, self.hash_func) for item in items]
+        if priorities is None:
+            priorities = itertools.repeat(None)
+        groups = [([], [], []) for i in range(self.n_shards)]
+        for item, item_hash, priority in zip(items, hashes, priorities):
+            if item_hash is None:
+                group = groups[next(self._next_put) % self.n_shards]
+            else:
+                group = groups[self._shard(item_hash)]
+            group[0].append(item)
+            group[1].append(item_hash)
+            group[2].append(priority)
+        for shard, (shard_items, shard_hashes, shard_priorities) in zip(self.shards, groups):
+            if shard_items:
+                shard.put_many(shard_items, shard_hashes, shard_priorities)
+
+    def put_back(self, item_ids):
+        for shard, local_ids in self._by_shard(item_ids):
+            if local_ids:
+                shard.put_back(local_ids)
+
+    def fail_ids(self, item_ids):
+        failed = []
+        for i, (shard, local_ids) in enumerate(self._by_shard(item_ids)):
+            if local_ids:
+                failed += [local_id*self.n_shards + i for local_id in shard.fail_ids(local_ids)]
+        return failed
+
+    def done_ids(self, item_ids):
+        done = []
+        for i, (shard, local_ids) in enumerate(self._by_shard(item_ids)):
+            if local_ids:
+                done += [local_id*self.n_shards + i for local_id in shard.done_ids(local_ids)]
+        return done
+
+    def get(self):
+        return self.get_job()[1]
+
+    def get_job(self):
+        return self.get_jobs(1)[0]
+
+    def get_many(self, n):
+        return [item for item_id, item in self.get_jobs(n)]
+
+    def get_jobs(self, n, start=None):
+        """up to n (id, item) pairs from a single shard, start with the shard start (None: round robin)"""
+        if start is None:
+            start = next(self._next) % self.n_shards
+        order = [(start + i) % self.n_shards for i in range(self.n_shards)]
+        for speculate in [False, True]:
+            if speculate and not self.speculative:
+                break
+            for i in order:
+                try:
+                    jobs = self.shards[i].get_jobs(n, speculate=speculate)
+                except queue.Empty:
+                    continue
+                # keeps the type of the id (see SpeculativeJobId)
+                return [(type(local_id)(local_id*self.n_shards + i), item) for local_id, item in jobs]
+        raise queue.Empty
+
+    def get_chunk(self, rtt, max_n=None, client_id=None, nworkers=1, start=None):
+        """as ArgsContainer.get_chunk"""
+        n = self.chunk_sizer.size(rtt, self.qsize(), client_id, nworkers)
+        if max_n is not None:
+            n = min(n, max_n)
+        jobs = self.get_jobs(n, start)
+        self.chunk_sizer.record(len(jobs))
+        return jobs
+
+    def mark(self, item):
+        if self.hash_func is None:
+            raise ValueError("items without hash (hash_func None) can only be marked by their id, use mark_id")
+        i = self._shard(hash_arg(item, self.hash_func))
+        return self.shards[i].mark(item)*self.n_shards + i
+
+    def mark_id(self, item_id):
+        self.shards[item_id % self.n_shards].mark_id(item_id // self.n_shards)
+
+    def mark_restored(self, item_id):
+        return self.shards[item_id % self.n_shards].mark_restored(item_id // self.n_shards)
+
+    def expire_leases(self):
+        return sum(shard.expire_leases() for shard in self.shards)
 
 
 RAND_STR_ASCII_IDX_LIST = list(range(48,58)) + list(range(65,91)) + list(range(97,123)) 
@@ -1351,9 +3581,599 @@ def _new_rand_file_name(path='.', pre='', end='', l=8):
             print("INFO: increase random file name length to", l)
 
 
+def _segments(name):
+    # the sequence numbers of the existing segments name.000001, ... (Journal, ResultSink), in increasing order
+    seqs = []
+    for fname in glob.glob(glob.escape(name) + '.[0-9]*'):
+        suffix = fname[len(name)+1:]
+        if suffix.isdigit():
+            seqs.append(int(suffix))
+    return sorted(seqs)
+
+class Journal(object):
+    """append-only journal of the changes of the state of a JobManager_Server
+
+    The journal is a sequence of segments, the files name.000001, name.000002, ..., of
+    pickled records, new records are appended to the last segment. A checkpoint of the
+    server starts a new segment (rotate), writes a snapshot of the whole state and removes
+    the segments before, thus the snapshot and the segments from its start on restore the
+    state (see JobManager_Server.read_old_state).
+
+    A segment may end with a truncated record (crash while writing), reading stops there.
+    Since a new segment is started whenever the journal is opened, such a segment is never
+    appended to.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.f = None
+        self.rotate()
+
+    def _fname(self, seq):
+        return '{}.{:06d}'.format(self.name, seq)
+
+    def segments(self):
+        """the sequence numbers of the existing segments, in increasing order"""
+        return _segments(self.name)
+
+    def rotate(self):
+        """start a new segment and return its sequence number"""
+        with self.lock:
+            if self.f is not None:
+                self.f.close()
+            segments = self.segments()
+            self.seq = max(segments[-1] if segments else 0, self.seq) + 1
+            self.f = open(self._fname(self.seq), 'ab')
+            return self.seq
+
+    def append(self, record):
+        with self.lock:
+            pickle.dump(record, self.f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def flush(self):
+        with self.lock:
+            self.f.flush()
+
+    def size(self):
+        """the size of the current segment in bytes"""
+        with self.lock:
+            return self.f.tell()
+
+    def records(self, start=0):
+        """iterate over the records of the segments from start on"""
+        for seq in self.segments():
+            if seq < start:
+                continue
+            with open(self._fname(seq), 'rb') as f:
+                while True:
+                    try:
+                        yield pickle.load(f)
+                    except EOFError:
+                        break
+                    except Exception:
+                        log.warning("journal segment '%s' ends with a truncated record", self._fname(seq))
+                        break
+
+    def remove_before(self, seq):
+        for s in self.segments():
+            if s < seq:
+                os.remove(self._fname(s))
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+
+
+# an entry of the index of a ResultSink segment: hash of the argument (16 bytes), offset and length of the record
+RESULT_SINK_INDEX_ENTRY = struct.Struct('<16sQQ')
+RESULT_SINK_HEADER = struct.Struct('<Q')
+
+class ResultSink(object):
+    """append-only store of the results of a JobManager_Server on disk (see result_sink)
+
+    The pairs (arg, result) are pickled and appended to segments, the files name.000001,
+    name.000002, ..., each record is preceded by its length (uint64). Once a segment exceeds
+    max_segment_size bytes the next one is started. For each segment the index name.000001.idx
+    holds an entry per record, the hash of the argument (hash_arg with blake2b) and the offset
+    and length of the record, so that the result of an argument can be read without reading
+    the segments (see ResultSinkReader).
+
+    Writes are buffered up to buffer_size bytes. fsync: None (left to the OS), 'segment' (a
+    complete segment and on close), 'always' (after each result) or the number of seconds
+    between two fsyncs (checked when a result is written).
+
+    A new segment is started whenever a sink is opened, the results written before are kept.
+    """
+    def __init__(self, name, max_segment_size=2**30, buffer_size=2**20, fsync='segment'):
+        if not ((fsync is None) or (fsync in ('segment', 'always')) or
+                (isinstance(fsync, (int, float)) and fsync > 0)):
+            raise ValueError("fsync must be None, 'segment', 'always' or a positive number")
+        self.name = name
+        self.max_segment_size = max_segment_size
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.n = 0
+        segments = _segments(name)
+        self.seq = segments[-1] if segments else 0
+        self.f = None
+        self.f_idx = None
+        self._open()
+
+    def _fname(self, seq):
+        return '{}.{:06d}'.format(self.name, seq)
+
+    def _open(self):
+        self.seq += 1
+        self.f = open(self._fname(self.seq), 'ab', buffering=self.buffer_size)
+        self.f_idx = open(self._fname(self.seq) + '.idx', 'ab', buffering=self.buffer_size)
+        self._offset = self.f.tell()
+        self._t_sync = time.time()
+
+    def _sync(self):
+        for f in (self.f, self.f_idx):
+            f.flush()
+            os.fsync(f.fileno())
+        self._t_sync = time.time()
+
+    def _close(self):
+        if self.fsync is None:
+            self.f.flush()
+            self.f_idx.flush()
+        else:
+            self._sync()
+        self.f.close()
+        self.f_idx.close()
+
+    def append(self, arg, result):
+        data = pickle.dumps((arg, result), protocol=pickle.HIGHEST_PROTOCOL)
+        key = hash_arg(arg, 'blake2b')
+        with self.lock:
+            self.f.write(RESULT_SINK_HEADER.pack(len(data)))
+            self.f.write(data)
+            length = RESULT_SINK_HEADER.size + len(data)
+            self.f_idx.write(RESULT_SINK_INDEX_ENTRY.pack(key, self._offset, length))
+            self._offset += length
+            self.n += 1
+            if self._offset >= self.max_segment_size:
+                self._close()
+                self._open()
+            elif self.fsync == 'always':
+                self._sync()
+            elif (self.fsync not in (None, 'segment')) and (time.time() - self._t_sync > self.fsync):
+                self._sync()
+
+    def sync(self):
+        """write the buffered results to disk (fsync unless fsync is None)"""
+        with self.lock:
+            if self.fsync is None:
+                self.f.flush()
+                self.f_idx.flush()
+            else:
+                self._sync()
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+
+class ResultSinkReader(object):
+    """read the results of the ResultSink with the given name
+
+    Iterating yields the pairs (arg, result) in the order they have been written, reading
+    the segments record by record (a segment ending with a truncated record is read up to
+    there). reader[arg] (get, in) reads the result of the argument arg at its offset, the
+    index of all segments is loaded at the first access (as dict of the hashes). If the result
+    of an argument has been written more than once (e.g. replayed from the journal), the
+    last one is returned.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._index = None
+        self._files = {}
+
+    def _fname(self, seq):
+        return '{}.{:06d}'.format(self.name, seq)
+
+    def segments(self):
+        return _segments(self.name)
+
+    def __iter__(self):
+        for seq in self.segments():
+            with open(self._fname(seq), 'rb') as f:
+                while True:
+                    header = f.read(RESULT_SINK_HEADER.size)
+                    if len(header) < RESULT_SINK_HEADER.size:
+                        break
+                    n, = RESULT_SINK_HEADER.unpack(header)
+                    data = f.read(n)
+                    if len(data) < n:
+                        log.warning("result sink segment '%s' ends with a truncated record", self._fname(seq))
+                        break
+                    yield pickle.loads(data)
+
+    def _load_index(self):
+        self._index = {}
+        for seq in self.segments():
+            size = os.path.getsize(self._fname(seq))
+            try:
+                with open(self._fname(seq) + '.idx', 'rb') as f:
+                    index_data = f.read()
+            except FileNotFoundError:
+                continue
+            n = len(index_data) // RESULT_SINK_INDEX_ENTRY.size
+            for key, offset, length in RESULT_SINK_INDEX_ENTRY.iter_unpack(index_data[:n*RESULT_SINK_INDEX_ENTRY.size]):
+                # records not written completely are left out
+                if offset + length <= size:
+                    self._index[key] = (seq, offset, length)
+
+    def __len__(self):
+        """the number of different arguments"""
+        if self._index is None:
+            self._load_index()
+        return len(self._index)
+
+    def __contains__(self, arg):
+        if self._index is None:
+            self._load_index()
+        return hash_arg(arg, 'blake2b') in self._index
+
+    def __getitem__(self, arg):
+        if self._index is None:
+            self._load_index()
+        try:
+            seq, offset, length = self._index[hash_arg(arg, 'blake2b')]
+        except KeyError:
+            raise KeyError(arg)
+        if seq not in self._files:
+            self._files[seq] = open(self._fname(seq), 'rb')
+        f = self._files[seq]
+        f.seek(offset + RESULT_SINK_HEADER.size)
+        return pickle.loads(f.read(length - RESULT_SINK_HEADER.size))[1]
+
+    def get(self, arg, default=None):
+        try:
+            return self[arg]
+        except KeyError:
+            return default
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def unpack_result_item(bin_data):
+    """the size of the decompressed result_q item and an iterator over the pickled results it holds
+
+    An item is either a buffer (see pack_result_batch, compress_result) or a list of frames
+    (see pack_result_frames), a pickled result is a buffer or a list of frames (see loads_result).
+    """
+    if isinstance(bin_data, list):
+        return result_nbytes(bin_data), unpack_result_frames(bin_data)
+    bin_data = decompress_result(bin_data)
+    return len(bin_data), unpack_result_batch(bin_data)
+
+def decode_result_item(bin_data):
+    """the size of the decompressed result_q item and the list of its (pickled result, result) pairs"""
+    raw_len, bin_results = unpack_result_item(bin_data)
+    return raw_len, [(bin_result, loads_result(bin_result)) for bin_result in bin_results]
+
+
+class ResultPipeline(object):
+    """pipeline processing the items of the result_q of a JobManager_Server (see result_pipeline)
+
+    The stages are
+        - decode: the items submitted are decoded (decode_result_item) by a pool of
+          decode_workers threads
+        - mark: decoded returns the decoded items in the order they have been submitted,
+          the caller marks the results
+        - callback: the results passed to callback are processed by callback(arg, res)
+          on callback_workers threads, for a single thread strictly in order
+
+    Each stage holds at most max_depth items, callback blocks if the callback stage is full,
+    the caller has to take the decoded items (decoded) before the decode stage is full (full).
+    An exception raised by callback is raised again by the next call of callback or by close.
+    """
+    def __init__(self, callback, decode_workers=2, callback_workers=1, max_depth=100):
+        self.max_depth = max_depth
+        self._decoder = concurrent.futures.ThreadPoolExecutor(max_workers=decode_workers)
+        self._decoding = collections.deque()
+        self._callback = callback
+        self._callback_q = queue.Queue(maxsize=max_depth)
+        self._exc = None
+        self._callback_threads = []
+        for i in range(callback_workers):
+            thr = threading.Thread(target=self._callback_worker)
+            thr.daemon = True
+            thr.start()
+            self._callback_threads.append(thr)
+
+    def submit(self, bin_data):
+        self._decoding.append(self._decoder.submit(decode_result_item, bin_data))
+
+    def full(self):
+        return len(self._decoding) >= self.max_depth
+
+    def pending(self):
+        return len(self._decoding) > 0
+
+    def decoded(self, block=False):
+        """the decoded items at the head of the decode stage (see decode_result_item)
+
+        block: wait for the first item, if any
+        """
+        items = []
+        while self._decoding and (self._decoding[0].done() or (block and not items)):
+            items.append(self._decoding.popleft().result())
+        return items
+
+    def callback(self, arg, res):
+        if self._exc is not None:
+            raise self._exc
+        self._callback_q.put((arg, res))
+
+    def _callback_worker(self):
+        while True:
+            item = self._callback_q.get()
+            try:
+                if item is None:
+                    return
+                if self._exc is None:
+                    self._callback(*item)
+            except Exception as e:
+                log.error("process_new_result raised %s", type(e).__name__)
+                self._exc = e
+            finally:
+                self._callback_q.task_done()
+
+    def wait(self):
+        """wait until the results passed to callback so far have been processed"""
+        self._callback_q.join()
+
+    def qsizes(self):
+        """number of items in the decode and the callback stage"""
+        return {'decode': len(self._decoding), 'callback': self._callback_q.qsize()}
+
+    def close(self):
+        """wait for the callbacks to finish, items not taken from the decode stage are dropped"""
+        for thr in self._callback_threads:
+            self._callback_q.put(None)
+        for thr in self._callback_threads:
+            thr.join()
+        self._decoder.shutdown(wait=True)
+        if self._exc is not None:
+            raise self._exc
+
+
 class JobManager_Manager(BaseManager):
     pass
 
+
+# messages of the event loop transport are prefixed by their length (uint64, network byte order)
+EVENTLOOP_HEADER = struct.Struct('!Q')
+EVENTLOOP_CHALLENGE_LEN = 32
+
+class EventLoopServer(object):
+    """serves job_q, result_q, fail_q and const_arg of a JobManager_Server using a single event loop (asyncio)
+
+    An alternative to JobManager_Manager whose server spawns a thread per connection.
+    Each message is a pickled request (op, args) answered by ('#suc', result) or ('#exc', exception),
+    where op is one of the keys of self.ops. A new connection has to answer a challenge with the
+    HMAC (sha256) of the challenge using authkey.
+
+    The request 'result_q.put_frames' with args (n,) is followed by n messages, the frames of
+    the results (see pack_result_frames), which are not pickled and passed to result_q.put_frames.
+
+    The job_q operations block (they talk to the ArgsContainer in the server process),
+    they are executed by two threads, one for get and one for put operations, all other
+    operations are executed by the event loop directly.
+    """
+    def __init__(self, port, authkey, job_q, result_q, fail_q, const_arg):
+        self.port = port
+        self.authkey = bytes(authkey)
+        self.job_q = job_q
+        self.result_q = result_q
+        self.fail_q = fail_q
+        self.const_arg = const_arg
+        self.get_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.put_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # op -> (function, executor or None)
+        self.ops = {'job_q.get'           : (job_q.get, self.get_executor),
+                    'job_q.get_many'      : (job_q.get_many, self.get_executor),
+                    'job_q.get_job'       : (job_q.get_job, self.get_executor),
+                    'job_q.get_jobs'      : (job_q.get_jobs, self.get_executor),
+                    'job_q.get_chunk'     : (job_q.get_chunk, self.get_executor),
+                    'job_q.put'           : (job_q.put, self.put_executor),
+                    'job_q.put_many'      : (job_q.put_many, self.put_executor),
+                    'job_q.put_back'      : (job_q.put_back, self.put_executor),
+                    'job_q.fail_ids'      : (job_q.fail_ids, self.put_executor),
+                    'job_q.done_ids'      : (job_q.done_ids, self.put_executor),
+                    'result_q.put'        : (result_q.put, None),
+                    'result_q.put_frames' : (result_q.put_frames, None),
+                    'result_q.qsize'      : (result_q.qsize, None),
+                    'fail_q.put'          : (fail_q.put, None),
+                    'fail_q.qsize'        : (fail_q.qsize, None),
+                    'const_arg.get'       : (lambda: self.const_arg, None)}
+        self.connections = 0
+
+    @staticmethod
+    async def _recv(reader):
+        n, = EVENTLOOP_HEADER.unpack(await reader.readexactly(EVENTLOOP_HEADER.size))
+        return await reader.readexactly(n)
+
+    @staticmethod
+    def _send(writer, data):
+        writer.write(EVENTLOOP_HEADER.pack(len(data)))
+        writer.write(data)
+
+    async def _authenticate(self, reader, writer):
+        challenge = os.urandom(EVENTLOOP_CHALLENGE_LEN)
+        self._send(writer, challenge)
+        digest = await self._recv(reader)
+        if hmac.compare_digest(digest, hmac.new(self.authkey, challenge, 'sha256').digest()):
+            self._send(writer, b'#WELCOME')
+            return True
+        else:
+            log.warning("connection from %s: digest rejected", writer.get_extra_info('peername'))
+            self._send(writer, b'#FAILURE')
+            return False
+
+    async def _call(self, op, args):
+        f, executor = self.ops[op]
+        if executor is None:
+            return f(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, f, *args)
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            if not await self._authenticate(reader, writer):
+                return
+            while True:
+                op, args = pickle.loads(await self._recv(reader))
+                if op == 'result_q.put_frames':
+                    args = ([await self._recv(reader) for i in range(args[0])], )
+                try:
+                    reply = ('#suc', await self._call(op, args))
+                except Exception as e:
+                    reply = ('#exc', e)
+                self._send(writer, pickle.dumps(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _serve(self, ready):
+        server = await asyncio.start_server(self._handle, host='', port=self.port, reuse_address=True, backlog=1024)
+        ready.send(True)
+        async with server:
+            await server.serve_forever()
+
+    def serve_forever(self, ready):
+        """run the event loop, send True via the connection ready once the server is listening"""
+        try:
+            asyncio.run(self._serve(ready))
+        except Exception as e:
+            ready.send(e)
+            raise
+
+def run_eventloop_server(port, authkey, job_q, result_q, fail_q, const_arg, ready):
+    """target of the process running the EventLoopServer"""
+    Signal_to_SIG_IGN(signals=[signal.SIGINT])
+    EventLoopServer(port, authkey, job_q, result_q, fail_q, const_arg).serve_forever(ready)
+
+
+class EventLoopConnection(object):
+    """blocking client side connection to an EventLoopServer"""
+    def __init__(self, address, authkey):
+        self.sock = socket.create_connection(address)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        challenge = self._recv()
+        self._send(hmac.new(bytes(authkey), challenge, 'sha256').digest())
+        if self._recv() != b'#WELCOME':
+            self.close()
+            raise AuthenticationError('digest sent was rejected')
+
+    def _send(self, data):
+        self.sock.sendall(EVENTLOOP_HEADER.pack(memoryview(data).nbytes))
+        self.sock.sendall(data)
+
+    def _recv_exactly(self, n):
+        buf = bytearray(n)
+        view = memoryview(buf)
+        while n > 0:
+            k = self.sock.recv_into(view[-n:])
+            if k == 0:
+                raise EOFError
+            n -= k
+        return buf
+
+    def _recv(self):
+        n, = EVENTLOOP_HEADER.unpack(self._recv_exactly(EVENTLOOP_HEADER.size))
+        return bytes(self._recv_exactly(n))
+
+    def call(self, op, args, frames=None):
+        """call op with args, the list frames (if given) is send after the request, frame by frame"""
+        self._send(pickle.dumps((op, args)))
+        if frames is not None:
+            for frame in frames:
+                self._send(frame)
+        kind, res = pickle.loads(self._recv())
+        if kind == '#exc':
+            raise res
+        return res
+
+    def close(self):
+        self.sock.close()
+
+class EventLoopProxy(object):
+    """client side replacement of the manager proxies for job_q, result_q, fail_q and const_arg (EventLoopServer)
+
+    Like the manager proxies, every thread (and every process) uses its own connection.
+    """
+    def __init__(self, address, authkey, name):
+        self._address = address
+        self._authkey = authkey
+        self._name = name
+        self._tls = threading.local()
+        self._pid = os.getpid()
+
+    def __reduce__(self):
+        return EventLoopProxy, (self._address, self._authkey, self._name)
+
+    def _connect(self):
+        if self._pid != os.getpid():
+            # do not use connections inherited from the parent process
+            self._tls = threading.local()
+            self._pid = os.getpid()
+        self._tls.connection = EventLoopConnection(self._address, self._authkey)
+
+    def _callmethod(self, method, args=(), frames=None):
+        if (self._pid != os.getpid()) or (getattr(self._tls, 'connection', None) is None):
+            self._connect()
+        return self._tls.connection.call(self._name + '.' + method, args, frames)
+
+    def get(self):
+        return self._callmethod('get')
+
+    def get_many(self, n):
+        return self._callmethod('get_many', (n,))
+
+    def get_chunk(self, rtt, max_n=None, client_id=None, nworkers=1):
+        return self._callmethod('get_chunk', (rtt, max_n, client_id, nworkers))
+
+    def put(self, item):
+        return self._callmethod('put', (item,))
+
+    def put_frames(self, frames):
+        """put the list of buffers frames (see FrameQueue), they are send as they are, without pickling"""
+        return self._callmethod('put_frames', (len(frames),), frames)
+
+    def put_many(self, items):
+        return self._callmethod('put_many', (list(items),))
+
+    def get_job(self):
+        return self._callmethod('get_job')
+
+    def get_jobs(self, n):
+        return self._callmethod('get_jobs', (n,))
+
+    def put_back(self, item_ids):
+        return self._callmethod('put_back', (list(item_ids),))
+
+    def fail_ids(self, item_ids):
+        return self._callmethod('fail_ids', (list(item_ids),))
+
+    def done_ids(self, item_ids):
+        return self._callmethod('done_ids', (list(item_ids),))
+
+    def qsize(self):
+        return self._callmethod('qsize')
+
 class JobManager_Server(object):
     """general usage:
     
@@ -1411,10 +4231,32 @@ class JobManager_Server(object):
                  show_statistics           = True,
                  job_q_on_disk             = False,
                  job_q_on_disk_path        = '.',
+                 job_q_on_disk_backend     = 'shelve',
+                 job_q_shards              = 1,
+                 job_q_hash                = 'sha256',
                  timeout                   = None,
                  log_level                 = logging.WARNING,
                  status_file_name          = None,
-                 jm_ready_callback         = lambda : print("jm ready")):
+                 jm_ready_callback         = lambda : print("jm ready"),
+                 transport                 = 'manager',
+                 chunk_target_overhead     = 0.05,
+                 chunk_max_size            = 1000,
+                 cost_func                 = None,
+                 lease_time                = None,
+                 lease_factor              = 10,
+                 lease_min_time            = 60,
+                 speculative               = False,
+                 speculative_factor        = 3,
+                 journal                   = None,
+                 journal_compact_size      = 2**26,
+                 result_pipeline           = False,
+                 result_decode_workers     = 2,
+                 result_callback_workers   = 1,
+                 result_pipeline_depth     = 100,
+                 result_sink               = None,
+                 result_sink_segment_size  = 2**30,
+                 result_sink_buffer_size   = 2**20,
+                 result_sink_fsync         = 'segment'):
         """
         authkey [string] - authentication key used by the SyncManager. 
         Server and Client must have the same authkey.
@@ -1440,6 +4282,67 @@ class JobManager_Server(object):
         of not successfully processed arguments, if there are any. 
         (None: do not dump, 'auto' choose filename 'YYYY_MM_DD_hh_mm_ss_fail.dump')
         
+        job_q_on_disk [bool], job_q_on_disk_path [string], job_q_on_disk_backend [string] - keep the
+        arguments on disk in a new directory within job_q_on_disk_path, using a shelve ('shelve')
+        or a SQLite database ('sqlite', see SQLiteArgsStore), instead of in memory
+
+        job_q_shards [int] - split the job_q into this many shards, each with its own lock, storage
+        and pipe to the connections of the clients (see ShardedArgsContainer), so that many clients
+        do not have to wait for each other
+
+        job_q_hash [string/callable/None] - the hash identifying an argument, an argument which
+        is in the job_q already is rejected (see hash_arg). 'sha256': hex digest, 'blake2b': raw
+        16 byte digest, faster and less memory per argument. None: no deduplication at all, for
+        arguments known to be unique, the results are then matched by the job id only
+
+        transport [string] - how the clients talk to the server
+            'manager': multiprocessing manager (JobManager_Manager), one thread per connection
+            'eventloop': a single event loop (EventLoopServer), scales to many connections,
+                         the clients have to use transport='eventloop' as well
+
+        chunk_target_overhead [float], chunk_max_size [int] - clients using fetch_batch_size='auto'
+        get as many arguments per request as needed to spend at most the fraction chunk_target_overhead
+        of the time on communication, but at most chunk_max_size, based on a moving average of
+        the runtime of a single job and the round trip time measured by the client (see ChunkSizer)
+
+        cost_func [callable] - cost_func(arg) returns the priority of an argument which is
+        put without explicit priority (see put_arg), e.g. its expected runtime, arguments
+        with higher priority are handed out first (longest expected first)
+
+        lease_time [None/float/'auto'], lease_factor [float], lease_min_time [float] - a job handed out
+        and without result after lease_time seconds is considered lost (e.g. the client died) and
+        handed out again. For 'auto' the lease lasts lease_factor times the estimated runtime
+        of the jobs handed out together, at least lease_min_time seconds. A late result of such a
+        job is discarded if the job has been processed in the meantime. (None: no leases)
+
+        speculative [bool], speculative_factor [float] - once all jobs have been handed out,
+        clients asking for more get the jobs handed out longer than speculative_factor times
+        the median runtime of a single job ago (stragglers, each at most once more), the
+        first result wins, the other one is discarded. A client skips such a copy if the job
+        has finished by the time it would start it, a copy already being calculated is not
+        interrupted.
+
+        journal [string], journal_compact_size [int] - append the new arguments, results and failures
+        to the journal (see Journal) with the given name, so the state can be restored after a crash
+        (see read_old_state). Once the current segment of the journal exceeds journal_compact_size
+        bytes and the size of the last snapshot, a checkpoint is made (see checkpoint). For a job_q
+        on disk the snapshot refers to its directory, which is kept when the server shuts down
+        (fname_dump None). (None: no journal)
+
+        result_pipeline [bool], result_decode_workers [int], result_callback_workers [int],
+        result_pipeline_depth [int] - process the results in a pipeline (see ResultPipeline):
+        the results are decoded by result_decode_workers threads, marked in the order they
+        have been received and passed to process_new_result by result_callback_workers threads.
+        For a single callback worker process_new_result is called strictly serially in order,
+        for more it has to be thread-safe. Each stage holds at most result_pipeline_depth items
+        of the result_q (see result_queue_sizes). (False: all done by join, one after the other)
+
+        result_sink [string], result_sink_segment_size [int], result_sink_buffer_size [int],
+        result_sink_fsync [None/string/float] - process_new_result writes the results to the
+        ResultSink with the given name (segments of result_sink_segment_size bytes, buffering
+        and fsync policy as for ResultSink) instead of keeping them in final_result, read them
+        by ResultSinkReader. (None: final_result)
+        
         This init actually starts the SyncManager as a new process. As a next step
         the job_q has to be filled, see put_arg().
         """
@@ -1504,19 +4407,95 @@ class JobManager_Server(object):
         else:
             fname = None
 
-        self.job_q = ArgsContainer(fname)
-        self.result_q = mp.Queue()  # ClosableQueue(name='result_q')
+        if job_q_shards > 1:
+            self.job_q = ShardedArgsContainer(job_q_shards, fname, backend=job_q_on_disk_backend, hash_func=job_q_hash)
+        else:
+            self.job_q = ArgsContainer(fname, backend=job_q_on_disk_backend, hash_func=job_q_hash)
+        log.debug("job_q_shards:%s", job_q_shards)
+        log.debug("job_q_hash:%s", job_q_hash)
+        # the results are read into buffers of their own (see FrameQueue)
+        self.result_q = FrameQueue()
         self.fail_q = mp.Queue()    # ClosableQueue(name='fail_q')
 
         self.stat = None
 
         self.jm_ready_callback = jm_ready_callback
 
+        if transport not in ('manager', 'eventloop'):
+            raise ValueError("unknown transport '{}', use 'manager' or 'eventloop'".format(transport))
+        self.transport = transport
+        self.eventloop_proc = None
+
         self.single_job_max_time = 0
         self.single_job_min_time = 10**10
         self.single_job_acu_time = 0
         self.single_job_cnt = 0
 
+        self.chunk_sizer = ChunkSizer(target_overhead=chunk_target_overhead, max_size=chunk_max_size)
+        log.debug("chunk_target_overhead:%s", self.chunk_sizer.target_overhead)
+        log.debug("chunk_max_size:%s", self.chunk_sizer.max_size)
+        self.cost_func = cost_func
+        self.job_q.cost_func = self.cost_func
+        log.debug("cost_func:%s", self.cost_func)
+        if not ((lease_time is None) or (lease_time == 'auto') or (lease_time > 0)):
+            raise ValueError("lease_time must be None, 'auto' or a positive number")
+        self.lease_time = lease_time
+        log.debug("lease_time:%s", self.lease_time)
+        self.lease_factor = lease_factor
+        log.debug("lease_factor:%s", self.lease_factor)
+        self.lease_min_time = lease_min_time
+        log.debug("lease_min_time:%s", self.lease_min_time)
+        self.speculative = speculative
+        log.debug("speculative:%s", self.speculative)
+        self.speculative_factor = speculative_factor
+        log.debug("speculative_factor:%s", self.speculative_factor)
+
+        # the failed jobs received from the fail_q
+        self.fail_list = []
+        self.journal_compact_size = journal_compact_size
+        log.debug("journal_compact_size:%s", self.journal_compact_size)
+        self._snapshot_size = 0
+        if journal is not None:
+            self.journal = Journal(journal)
+            if (len(self.journal.segments()) > 1) or os.path.exists(journal + '.snapshot'):
+                log.warning("journal '%s' exists, use read_old_state() to resume", journal)
+        else:
+            self.journal = None
+        log.debug("journal:%s", journal)
+        self.job_q.journal = self.journal
+        self.n_duplicate_results = 0
+
+        self.result_pipeline = result_pipeline
+        log.debug("result_pipeline:%s", self.result_pipeline)
+        self.result_decode_workers = result_decode_workers
+        log.debug("result_decode_workers:%s", self.result_decode_workers)
+        self.result_callback_workers = result_callback_workers
+        log.debug("result_callback_workers:%s", self.result_callback_workers)
+        self.result_pipeline_depth = result_pipeline_depth
+        log.debug("result_pipeline_depth:%s", self.result_pipeline_depth)
+        # the ResultPipeline used by join
+        self._pipeline = None
+
+        if result_sink is not None:
+            self.result_sink = ResultSink(result_sink,
+                                          max_segment_size = result_sink_segment_size,
+                                          buffer_size      = result_sink_buffer_size,
+                                          fsync            = result_sink_fsync)
+        else:
+            self.result_sink = None
+        log.debug("result_sink:%s", result_sink)
+
+        # name -> reducer aggregating the results (see add_reducer), name -> function selecting the value
+        self.reducers = {}
+        self._reducer_values = {}
+        self._reducer_lock = threading.Lock()
+
+        # the job source of args_from_iter and the number of arguments pulled from it
+        self.args_source = None
+        self.args_source_pos = 0
+        self.args_source_total = None
+        self.args_source_window = None
+
     
     @staticmethod
     def _check_bind(host, port):
@@ -1532,10 +4511,25 @@ class JobManager_Server(object):
                
     def _start_manager(self):
         self._check_bind(self.hostname, self.port)
+
+        # also for a job_q loaded from an old state
+        self.job_q.chunk_sizer = self.chunk_sizer
+        self.job_q.cost_func = self.cost_func
+        self.job_q.lease_time = self.lease_time
+        self.job_q.lease_factor = self.lease_factor
+        self.job_q.lease_min_time = self.lease_min_time
+        self.job_q.speculative = self.speculative
+        self.job_q.speculative_factor = self.speculative_factor
+
+        if self.transport == 'eventloop':
+            self._start_eventloop_server()
+            return
             
         # make job_q, result_q, fail_q, const_arg available via network
         q = self.job_q.get_queue()        
-        JobManager_Manager.register('get_job_q', callable=lambda: q, exposed=['get', 'put'])
+        JobManager_Manager.register('get_job_q', callable=lambda: q, exposed=['get', 'put', 'get_many', 'put_many',
+                                                                                 'get_job', 'get_jobs', 'get_chunk', 'put_back',
+                                                                                 'fail_ids', 'done_ids'])
         JobManager_Manager.register('get_const_arg', callable=lambda: self.const_arg)
         
         
@@ -1563,7 +4557,35 @@ class JobManager_Server(object):
         log.info("JobManager_Manager started on %s:%s (%s)", self.hostname, self.port, authkey)
         print("JobManager started on {}:{} ({})".format(self.hostname, self.port, authkey))
         
+    def _start_eventloop_server(self):
+        ready_r, ready_w = mp.Pipe(duplex=False)
+        self.eventloop_proc = mp.Process(target=run_eventloop_server, args=(self.port, self.authkey, self.job_q.get_queue(),
+                                                                            self.result_q, self.fail_q, self.const_arg, ready_w))
+        self.eventloop_proc.start()
+        if not ready_r.poll(10):
+            raise ConnectionError("EventLoopServer did not start")
+        res = ready_r.recv()
+        if res is not True:
+            raise ConnectionError("EventLoopServer failed to start ({})".format(res))
+
+        try:
+            EventLoopConnection(('localhost', self.port), self.authkey).close()
+        except:
+            raise ConnectionError("test conntect to EventLoopServer failed")
+
+        log.info("EventLoopServer started on %s:%s (%s)", self.hostname, self.port, self.authkey)
+        print("JobManager started on {}:{} ({})".format(self.hostname, self.port, self.authkey))
+
     def _stop_manager(self):
+        if self.eventloop_proc is not None:
+            self.eventloop_proc.terminate()
+            log.info("EventLoopServer shutdown triggered")
+            progress.check_process_termination(proc                     = self.eventloop_proc,
+                                               prefix                   = 'EventLoopServer: ',
+                                               timeout                  = 2,
+                                               auto_kill_on_last_resort = True)
+            self.eventloop_proc = None
+
         if self.manager == None:
             return
         
@@ -1615,7 +4637,9 @@ class JobManager_Server(object):
         
         self._stop_manager()
         
-
+        # the results are on disk for the final processing
+        if self.result_sink is not None:
+            self.result_sink.sync()
 
         # do user defined final processing
         self.process_final_result()
@@ -1623,6 +4647,13 @@ class JobManager_Server(object):
         
         self.show_statistics()
 
+        if self.journal is not None:
+            self.checkpoint()
+            self.journal.close()
+
+        if self.result_sink is not None:
+            self.result_sink.close()
+
         if self.fname_dump is not None:
             if self.fname_dump == 'auto':
                 fname = "{}_{}.dump".format(self.authkey.decode('utf8'), getDateForFileName(includePID=False))
@@ -1638,7 +4669,11 @@ class JobManager_Server(object):
 
         else:
             log.info("fname_dump == None, ignore dumping current state!")
-            self.job_q.clear()
+            if self.journal is None:
+                self.job_q.clear()
+            else:
+                # the snapshot refers to the arguments on disk
+                self.job_q.close_shelve()
         
         # start also makes sure that it was not started as subprocess
         # so at default behavior this assertion will allays be True
@@ -1653,7 +4688,7 @@ class JobManager_Server(object):
         if self.show_stat:
             all_jobs = self.job_q.put_items()
             succeeded = self.job_q.marked_items()
-            failed = self.fail_q.qsize()
+            failed = self.number_of_failed_jobs()
 
             all_processed = succeeded + failed
 
@@ -1673,6 +4708,14 @@ class JobManager_Server(object):
                 print("{}    timing in sec: min {:.3e} | max {:.3e} | avr {:.3e}".format(id2, self.single_job_min_time,
                                                                                          self.single_job_max_time,
                                                                                          self.single_job_acu_time / self.single_job_cnt))
+            if self.chunk_sizer.n_chunks > 0:
+                print("{}    chunks: {} | size min {} | max {} | avr {:.1f}".format(id2, self.chunk_sizer.n_chunks,
+                                                                                  self.chunk_sizer.smallest,
+                                                                                  self.chunk_sizer.largest,
+                                                                                  self.chunk_sizer.mean()))
+            if (self.lease_time is not None) or self.speculative:
+                print("{}    leases expired: {} | handed out speculatively: {} | late results discarded: {}".format(
+                    id2, self.job_q.n_lease_expired, self.job_q.n_speculative, self.n_duplicate_results))
 
             all_not_processed = all_jobs - all_processed
             not_queried = self.number_of_jobs()
@@ -1691,21 +4734,33 @@ class JobManager_Server(object):
         data['final_result'] = pickle.load(f)        
         data['job_q'] = pickle.load(f)
         data['fail_list'] = pickle.load(f)
+        try:
+            data['args_source_pos'] = pickle.load(f)
+        except EOFError:
+            # dumped by an older version
+            data['args_source_pos'] = 0
+        try:
+            data['reducers'] = pickle.load(f)
+        except EOFError:
+            data['reducers'] = {}
         return data
 
     def __load(self, f):
         data = JobManager_Server.static_load(f)
         self.final_result = data['final_result']
         self.job_q = data['job_q']
-        for fail_item in data['fail_list']:
-            self.fail_q.put(fail_item)
+        self.job_q.cost_func = self.cost_func
+        self.job_q.journal = self.journal
+        self.fail_list = list(data['fail_list'])
+        self.args_source_pos = data['args_source_pos']
+        self.reducers.update(data['reducers'])
 
         log.debug("load: len(final_result): {}".format(len(self.final_result)))
         log.debug("load: job_q.qsize: {}".format(self.number_of_jobs()))
         log.debug("load: job_q.marked_items: {}".format(self.job_q.marked_items()))
         log.debug("load: job_q.gotten_items: {}".format(self.job_q.gotten_items()))
         log.debug("load: job_q.unmarked_items: {}".format(self.job_q.unmarked_items()))
-        log.debug("load: len(fail_q): {}".format(self.fail_q.qsize()))
+        log.debug("load: len(fail_list): {}".format(len(self.fail_list)))
 
 
     def __dump(self, f):
@@ -1717,17 +4772,119 @@ class JobManager_Server(object):
         log.debug("dump: job_q.gotten_items: {}".format(self.job_q.gotten_items()))
         log.debug("dump: job_q.unmarked_items: {}".format(self.job_q.unmarked_items()))
 
-        fail_list = []
-        try:
-            while True:
-                fail_list.append(self.fail_q.get(timeout = 0))
-        except queue.Empty:
-            pass
-        pickle.dump(fail_list, f, protocol=pickle.HIGHEST_PROTOCOL)
-        log.debug("dump: len(fail_q): {}".format(len(fail_list)))
+        self._drain_fail_q()
+        pickle.dump(self.fail_list, f, protocol=pickle.HIGHEST_PROTOCOL)
+        log.debug("dump: len(fail_list): {}".format(len(self.fail_list)))
+        pickle.dump(self.args_source_pos, f, protocol=pickle.HIGHEST_PROTOCOL)
+        log.debug("dump: args_source_pos: {}".format(self.args_source_pos))
+        with self._reducer_lock:
+            pickle.dump(self.reducers, f, protocol=pickle.HIGHEST_PROTOCOL)
+        log.debug("dump: reducers: {}".format(list(self.reducers)))
 
         
+    def _drain_fail_q(self):
+        # move the failed jobs from the fail_q to fail_list
+        while True:
+            try:
+                fail_item = self.fail_q.get_nowait()
+            except queue.Empty:
+                return
+            if self.journal is not None:
+                self.journal.append(('fail', len(self.fail_list), fail_item))
+            self.fail_list.append(fail_item)
+
+    def number_of_failed_jobs(self):
+        return len(self.fail_list) + self.fail_q.qsize()
+
+    def checkpoint(self):
+        """write a snapshot of the state and remove the journal up to now
+
+        The journal continues with a new segment before the snapshot is written, records
+        which made it into the snapshot as well are skipped when replayed.
+
+        The snapshot holds the whole final_result, so without result_sink and reducers (the
+        results are neither written to the sink nor reduced, but appended to final_result)
+        its cost grows with the number of results. Of a job_q on disk only the states of the
+        items are in the snapshot.
+        """
+        # the results marked so far have to be processed (and written to disk) before the snapshot
+        if self._pipeline is not None:
+            self._pipeline.wait()
+        if self.result_sink is not None:
+            self.result_sink.sync()
+        seq = self.journal.rotate()
+        fname = self.journal.name + '.snapshot'
+        t0 = time.perf_counter()
+        with open(fname + '.tmp', 'wb') as f:
+            pickle.dump(seq, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.__dump(f)
+            f.flush()
+            os.fsync(f.fileno())
+            self._snapshot_size = f.tell()
+        os.replace(fname + '.tmp', fname)
+        self.journal.remove_before(seq)
+        log.info("checkpoint: snapshot of %s written in %.2fs", humanize_size(self._snapshot_size), time.perf_counter() - t0)
+
+    def _read_journal(self):
+        # restore the last snapshot and replay the journal from its start on
+        fname = self.journal.name + '.snapshot'
+        seq = 0
+        if os.path.isfile(fname):
+            log.info("load snapshot '%s'", fname)
+            job_q = self.job_q
+            with open(fname, 'rb') as f:
+                seq = pickle.load(f)
+                self.__load(f)
+            # the new (empty) job_q is replaced by the one of the snapshot
+            job_q.clear()
+        self.job_q.journal = None
+        n = 0
+        for record in self.journal.records(start=seq):
+            self._replay(record)
+            n += 1
+        log.info("replayed %s records of the journal", n)
+        self.job_q.journal = self.journal
+        self.checkpoint()
+
+    def _replay(self, record, job_q=None):
+        # job_q: the shard of the record, the job_q itself if None
+        if job_q is None:
+            job_q = self.job_q
+        kind = record[0]
+        if kind == 'shard':
+            if not isinstance(self.job_q, ShardedArgsContainer) or (record[1] >= self.job_q.n_shards):
+                raise RuntimeError("journal does not match the job_q, no shard {}".format(record[1]))
+            self._replay(record[2], self.job_q.shards[record[1]])
+        elif kind == 'put':
+            if isinstance(job_q, ShardedArgsContainer):
+                raise RuntimeError("journal does not match the job_q, record 'put' of no shard")
+            job_q.put_restored(record[1])
+        elif kind == 'res':
+            item_id, bin_result = record[1:]
+            if self.job_q.mark_restored(item_id):
+                data_dict = loads_result(bin_result)
+                self.process_new_result(data_dict['arg'], data_dict['res'])
+        elif kind == 'fail_ids':
+            job_q.fail_ids(record[1])
+        elif kind == 'fail':
+            index, fail_item = record[1:]
+            if index >= len(self.fail_list):
+                self.fail_list.append(fail_item)
+        elif kind == 'pos':
+            self.args_source_pos = max(self.args_source_pos, record[1])
+        else:
+            raise RuntimeError("unknown record '{}' in journal".format(kind))
+
     def read_old_state(self, fname_dump=None):
+        """restore the state from the file fname_dump (see fname_dump)
+
+        with a journal and fname_dump None, restore the last snapshot and replay the
+        journal (see checkpoint), this has to be done before any argument is put
+        """
+        if (fname_dump is None) and (self.journal is not None):
+            self._read_journal()
+            self.show_statistics()
+            return
         if fname_dump == None:
             fname_dump = self.fname_dump
         if fname_dump == 'auto':
@@ -1745,8 +4902,10 @@ class JobManager_Server(object):
         
         self.show_statistics()
             
-    def put_arg(self, a):
+    def put_arg(self, a, priority=None):
         """add argument a to the job_q
+
+        arguments with higher priority are handed out first (see also cost_func)
         """
         #hash_bfa = hashlib.sha256(bf.dump(a)).digest()
 #         if hash_bfa in self.args_dict:
@@ -1761,7 +4920,7 @@ class JobManager_Server(object):
         #self.args_list.append(a)
         
         # the actual shared queue
-        self.job_q.put(copy.copy(a))
+        self.job_q.put(copy.copy(a), priority)
 
         #with self._numjobs.get_lock():
         #    self._numjobs.value += 1
@@ -1769,19 +4928,138 @@ class JobManager_Server(object):
     def number_of_jobs(self):
         return self.job_q.qsize()
         
-    def args_from_list(self, args):
+    def args_from_list(self, args, nproc=None, chunk_size=10000):
         """serialize a list of arguments to the job_q
+
+        The arguments are inserted in chunks of chunk_size, each with a single call to
+        ArgsContainer.put_many. If there is more than a single chunk, the hashes of the
+        arguments are calculated in parallel by a pool of nproc processes (None: number
+        of cpu cores, 1: no subprocesses). Without hash (job_q_hash None) there is nothing to
+        calculate and no pool is used.
         """
-        for a in args:
-            self.put_arg(a)
+        chunks = self._copied_chunks(args, chunk_size)
+        first_chunk = next(chunks, [])
+        if (nproc == 1) or (len(first_chunk) < chunk_size) or (self.job_q.hash_func is None):
+            self.job_q.put_many(first_chunk)
+            for chunk in chunks:
+                self.job_q.put_many(chunk)
+            return
+
+        nproc = nproc or mp.cpu_count()
+        with mp.Pool(nproc) as pool:
+            # keep at most 2*nproc chunks in flight
+            pending = collections.deque()
+            for chunk in itertools.chain([first_chunk], chunks):
+                pending.append((chunk, pool.apply_async(hash_args, (chunk, self.job_q.hash_func))))
+                if len(pending) > 2*nproc:
+                    chunk, hashes = pending.popleft()
+                    self.job_q.put_many(chunk, hashes.get())
+            while pending:
+                chunk, hashes = pending.popleft()
+                self.job_q.put_many(chunk, hashes.get())
+
+    def args_from_iter(self, source, total=None, window=10000):
+        """use the iterable source (e.g. a generator) as job source, its arguments are pulled lazily
+
+        The job_q is filled up to window arguments not handed out yet, and refilled by join
+        whenever less than half of them are left. Marked arguments are removed from the job_q
+        (see ArgsContainer.release_marked), so the memory needed is bounded by the window
+        (plus a byte per argument for its state). As for put_arg, an argument which is still
+        in the job_q must not be yielded again (ValueError).
+
+        total is the number of arguments of source, if known, used for the progress bar.
+
+        When resuming from an old state (read_old_state) the arguments pulled before are skipped,
+        so source has to yield the same arguments in the same order again.
+        """
+        self.args_source = iter(source)
+        if self.args_source_pos > 0:
+            log.info("skip the %s arguments pulled before", self.args_source_pos)
+            collections.deque(itertools.islice(self.args_source, self.args_source_pos), maxlen=0)
+        self.args_source_total = total
+        self.args_source_window = window
+        self.job_q.release_marked = True
+        self._pull_args()
+
+    def _pull_args(self):
+        # refill the job_q from args_source (see args_from_iter),
+        # returns True if arguments have been pulled
+        if self.args_source is None:
+            return False
+        n = self.args_source_window - self.number_of_jobs()
+        if n < self.args_source_window // 2:
+            return False
+        chunk = [copy.copy(a) for a in itertools.islice(self.args_source, n)]
+        self.args_source_pos += len(chunk)
+        if len(chunk) < n:
+            log.info("args_source exhausted after %s arguments", self.args_source_pos)
+            self.args_source = None
+        self.job_q.put_many(chunk)
+        if self.journal is not None:
+            self.journal.append(('pos', self.args_source_pos))
+        return True
+
+    def total_number_of_jobs(self):
+        """number of jobs put so far, or the expected number as long as args_source is not exhausted"""
+        n = self.job_q.put_items()
+        if self.args_source is not None:
+            n = max(n + 1, self.args_source_total or 0)
+        return n
+
+    @staticmethod
+    def _copied_chunks(args, chunk_size):
+        # as put_arg, insert copies of the arguments
+        args = iter(args)
+        while True:
+            chunk = [copy.copy(a) for a in itertools.islice(args, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+    def add_reducer(self, name, reducer, value=None):
+        """aggregate the results online by reducer (see jobmanager.reducers), the aggregate is
+        reducers[name].result()
+
+        value(arg, result) selects the value passed to the reducer (None: the result). With
+        reducers the results are not kept in final_result, so the memory needed does not grow
+        with the number of jobs. The reducers are part of the dumped state, a reducer of the
+        same kind restored from an old state (read_old_state) is kept.
+        """
+        old = self.reducers.get(name)
+        if (old is not None) and (type(old) is type(reducer)):
+            log.info("keep the restored state of the reducer '%s'", name)
+        else:
+            self.reducers[name] = reducer
+        self._reducer_values[name] = value
+
+    def merge_reducers(self, reducers):
+        """merge the partial aggregates reducers (dict name -> reducer, e.g. the reducers of
+        an other dump, see static_load) into the reducers of the same name"""
+        with self._reducer_lock:
+            for name, reducer in reducers.items():
+                self.reducers[name].merge(reducer)
+
+    def _update_reducers(self, arg, result):
+        with self._reducer_lock:
+            for name, reducer in self.reducers.items():
+                value = self._reducer_values.get(name)
+                reducer.update(result if value is None else value(arg, result))
 
     def process_new_result(self, arg, result):
         """Will be called when the result_q has data available.      
         result is the computed result to the argument arg.
+
+        Updates the reducers (see add_reducer), if there are none appends (arg, result) to
+        final_result, or writes it to the result_sink if set.
         
         Should be overwritten by subclassing!
         """
-        self.final_result.append((arg, result))
+        if self.reducers:
+            self._update_reducers(arg, result)
+        if self.result_sink is not None:
+            self.result_sink.append(arg, result)
+        elif not self.reducers:
+            self.final_result.append((arg, result))
     
     def process_final_result(self):
         """to implement user defined final processing"""
@@ -1824,13 +5102,21 @@ class JobManager_Server(object):
         """
         starts to loop over incoming results
 
+        The loop drains the result_q, the number of results is counted as they are marked.
+        Every msg_interval seconds the other counters are updated, the failed jobs are taken
+        from the fail_q, expired leases are handled and the info line is refreshed.
+        With result_pipeline the results are processed by a ResultPipeline.
+
         When finished, or on exception call stop() afterwards to shut down gracefully.
         """
         
-        info_line = progress.StringValue(num_of_bytes=128)
+        info_line = progress.StringValue(num_of_bytes=INFO_LINE_BYTES)
         
-        numresults = progress.UnsignedIntValue(self.job_q.marked_items() + self.fail_q.qsize())
-        numjobs    = progress.UnsignedIntValue(self.job_q.put_items())
+        markeditems = self.job_q.marked_items()
+        self._drain_fail_q()
+        failqsize = len(self.fail_list)
+        numresults = progress.UnsignedIntValue(markeditems + failqsize)
+        numjobs    = progress.UnsignedIntValue(self.total_number_of_jobs())
 
         log.debug("at start: number of jobs: {}".format(numjobs.value))
         log.debug("at start: number of results: {}".format(numresults.value))
@@ -1838,8 +5124,9 @@ class JobManager_Server(object):
         speed_q = myQueue()
         time_stamp = time.perf_counter()
         bytes_recieved = 0
+        bytes_recieved_raw = 0
         for i in range(15):
-            speed_q.put((bytes_recieved, time_stamp))
+            speed_q.put((bytes_recieved, bytes_recieved_raw, time_stamp))
 
         with progress.ProgressBarFancy(count             = numresults,
                                        max_count         = numjobs,
@@ -1847,13 +5134,17 @@ class JobManager_Server(object):
                                        speed_calc_cycles = self.speed_calc_cycles,
                                        sigint            = 'ign',
                                        sigterm           = 'ign',
-                                       info_line=info_line) as self.stat:
+                                       info_line=info_line) as self.stat, \
+             self._result_pipeline() as pipeline:
             if not self.hide_progress:
                 self.stat.start()
 
 
 
             data_speed = 0
+            data_speed_raw = 0
+            # time of the next update of the counters and the info line
+            next_update = time.perf_counter()
             while numresults.value < numjobs.value:
 
                 if stopEvent is not None:
@@ -1861,69 +5152,180 @@ class JobManager_Server(object):
                         log.info('received externally set stop event -> leave join loop')
                         break
 
-                numjobs.value = self.job_q.put_items()
-                failqsize = self.fail_q.qsize()
-                jobqsize = self.number_of_jobs()
-                markeditems = self.job_q.marked_items()
-                numresults.value = failqsize + markeditems
-                if (time.perf_counter() - time_stamp) > self.msg_interval:
-                    old_bytes, old_time_stamp = speed_q.get()
-
-                    time_stamp = time.perf_counter()
-                    speed_q.put((bytes_recieved, time_stamp))
-                    data_speed = humanize_size((bytes_recieved - old_bytes) / (time_stamp - old_time_stamp))
-
-                if (self.timeout is not None):
-                    time_left = int(self.timeout - self.__wait_before_stop - (datetime.now() - self.start_time).total_seconds())
-                    if time_left < 0:
-                        if self.stat:
-                            self.stat.stop()
-                        log.warning("timeout ({}s) exceeded -> quit server".format(self.timeout))
+                # the clients must not run dry, the check is cheap (qsize)
+                if self._pull_args():
+                    numjobs.value = self.total_number_of_jobs()
+                    if self.journal is not None:
+                        self.journal.flush()
+
+                now = time.perf_counter()
+                if now >= next_update:
+                    next_update = now + self.msg_interval
+                    if self.lease_time is not None:
+                        self.job_q.expire_leases()
+                    numjobs.value = self.total_number_of_jobs()
+                    self._drain_fail_q()
+                    failqsize = len(self.fail_list)
+                    numresults.value = markeditems + failqsize
+                    if self.journal is not None:
+                        if self.journal.size() > max(self.journal_compact_size, self._snapshot_size):
+                            self.checkpoint()
+                    jobqsize = self.number_of_jobs()
+
+                    old_bytes, old_bytes_raw, old_time_stamp = speed_q.get()
+                    time_stamp = now
+                    speed_q.put((bytes_recieved, bytes_recieved_raw, time_stamp))
+                    if time_stamp > old_time_stamp:
+                        data_speed = humanize_size((bytes_recieved - old_bytes) / (time_stamp - old_time_stamp))
+                        data_speed_raw = humanize_size((bytes_recieved_raw - old_bytes_raw) / (time_stamp - old_time_stamp))
+
+                    if self.chunk_sizer.n_chunks > 0:
+                        chunk_info = " " + self.chunk_sizer.info()
+                    else:
+                        chunk_info = ''
+
+                    if (self.timeout is not None):
+                        time_left = int(self.timeout - self.__wait_before_stop - (datetime.now() - self.start_time).total_seconds())
+                        if time_left < 0:
+                            if self.stat:
+                                self.stat.stop()
+                            log.warning("timeout ({}s) exceeded -> quit server".format(self.timeout))
+                            break
+                        set_info_line(info_line, ("res_q #{} {}/s (raw {}/s) {}|rem{} "+
+                                           "done{} fail{} prog{} "+
+                                           "timeout:{}s{}").format(self.result_q.qsize(), data_speed, data_speed_raw, humanize_size(bytes_recieved),
+                                                                    jobqsize,
+                                                                    markeditems,
+                                                                    failqsize,
+                                                                    numjobs.value - numresults.value - jobqsize,
+                                                                    time_left,
+                                                                    chunk_info))
+                    else:
+                        set_info_line(info_line, ("res_q #{} {}/s (raw {}/s) {}|rem.:{}, "+
+                                           "done:{}, failed:{}, prog.:{}{}").format(self.result_q.qsize(), data_speed, data_speed_raw, humanize_size(bytes_recieved),
+                                                                                  jobqsize,
+                                                                                  markeditems,
+                                                                                  failqsize,
+                                                                                  numjobs.value - numresults.value - jobqsize,
+                                                                                  chunk_info))
+                    log.info("infoline %s", info_line.value)
+                    if pipeline is not None:
+                        log.debug("result queue sizes %s", self.result_queue_sizes())
+                    if self.journal is not None:
+                        self.journal.flush()
+                    if numresults.value >= numjobs.value:
                         break
-                    info_line.value = ("res_q #{} {}/s {}|rem{} "+
-                                       "done{} fail{} prog{} "+
-                                       "timeout:{}s").format(self.result_q.qsize(), data_speed, humanize_size(bytes_recieved),
-                                                                jobqsize,
-                                                                markeditems,
-                                                                failqsize,
-                                                                numjobs.value - numresults.value - jobqsize,
-                                                                time_left).encode('utf-8')
-                else:
-                    info_line.value = ("res_q #{} {}/s {}|rem.:{}, "+
-                                       "done:{}, failed:{}, prog.:{}").format(self.result_q.qsize(), data_speed, humanize_size(bytes_recieved),
-                                                                              jobqsize,
-                                                                              markeditems,
-                                                                              failqsize,
-                                                                              numjobs.value - numresults.value - jobqsize).encode('utf-8')
-                log.info("infoline {}".format(info_line.value))
-                # allows for update of the info line
+
+                # wait at most until the next update, not at all if results are being decoded
                 try:
-                    bin_data = self.result_q.get(timeout=self.msg_interval)
-                    data_dict = pickle.loads(bin_data)
-                    bytes_recieved += len(bin_data)
-                    del bin_data
+                    if (pipeline is not None) and pipeline.pending():
+                        bin_data = self.result_q.get(block=False)
+                    else:
+                        bin_data = self.result_q.get(timeout=max(next_update - time.perf_counter(), 0.001))
                 except queue.Empty:
-                    continue
-                # print("got arg", arg)
-                arg = data_dict['arg']
-                res = data_dict['res']
-                single_job_time = data_dict['time']
-                self.job_q.mark(data_dict['arg'])
-                # print("has been marked!")
-                log.debug("received {}".format(data_dict['arg']))
-                self.process_new_result(arg, res)
-                self.single_job_max_time = max(self.single_job_max_time, single_job_time)
-                self.single_job_min_time = min(self.single_job_min_time, single_job_time)
-                self.single_job_acu_time += single_job_time
-                self.single_job_cnt += 1
-                if not self.keep_new_result_in_memory:
-                    del data_dict
+                    if (pipeline is None) or not pipeline.pending():
+                        continue
+                    bin_data = None
+
+                if pipeline is None:
+                    bytes_recieved += result_nbytes(bin_data)
+                    # a single item of the result_q may hold several results (see unpack_result_item)
+                    raw_len, bin_results = unpack_result_item(bin_data)
+                    decoded = [(raw_len, ((bin_result, loads_result(bin_result)) for bin_result in bin_results))]
+                else:
+                    if bin_data is not None:
+                        bytes_recieved += result_nbytes(bin_data)
+                        pipeline.submit(bin_data)
+                    # wait for the oldest item if there is nothing else to do
+                    decoded = pipeline.decoded(block=(bin_data is None) or pipeline.full())
+                del bin_data
+                for raw_len, results in decoded:
+                    bytes_recieved_raw += raw_len
+                    markeditems += self._mark_results(results, pipeline)
+                del decoded
+                numresults.value = markeditems + failqsize
+                if self.journal is not None:
+                    self.journal.flush()
+
+            if pipeline is not None:
+                # the results received already
+                while pipeline.pending():
+                    for raw_len, results in pipeline.decoded(block=True):
+                        markeditems += self._mark_results(results, pipeline)
+                numresults.value = markeditems + failqsize
+                if self.journal is not None:
+                    self.journal.flush()
 
         self.stat = None
 
         log.debug("wait %ss before trigger clean up", self.__wait_before_stop)
         time.sleep(self.__wait_before_stop)
 
+    def _mark_results(self, results, pipeline=None):
+        # mark the jobs of the decoded results (see decode_result_item) and pass them to
+        # process_new_result (directly or by the pipeline), returns the number of marked jobs
+        n = 0
+        for bin_result, data_dict in results:
+            # print("got arg", arg)
+            arg = data_dict['arg']
+            res = data_dict['res']
+            single_job_time = data_dict['time']
+            try:
+                if 'id' in data_dict:
+                    item_id = data_dict['id']
+                    self.job_q.mark_id(item_id)
+                else:
+                    # result of a client not aware of the job ids
+                    item_id = self.job_q.mark(data_dict['arg'])
+            except RuntimeWarning:
+                # the job was handed out again (lease expired or speculative) and
+                # has been processed in the meantime, the first result wins
+                log.info("discard late result of %s", arg)
+                self.n_duplicate_results += 1
+                continue
+            n += 1
+            if self.journal is not None:
+                self.journal.append(('res', item_id, result_bytes(bin_result)))
+            del bin_result
+            # print("has been marked!")
+            log.debug("received %s", arg)
+            if pipeline is None:
+                self.process_new_result(arg, res)
+            else:
+                pipeline.callback(arg, res)
+            self.single_job_max_time = max(self.single_job_max_time, single_job_time)
+            self.single_job_min_time = min(self.single_job_min_time, single_job_time)
+            self.single_job_acu_time += single_job_time
+            self.single_job_cnt += 1
+            self.chunk_sizer.update_job_time(single_job_time)
+            if not self.keep_new_result_in_memory:
+                del data_dict
+        return n
+
+    @contextlib.contextmanager
+    def _result_pipeline(self):
+        # the ResultPipeline used by join (None without result_pipeline)
+        if not self.result_pipeline:
+            yield None
+            return
+        self._pipeline = ResultPipeline(self.process_new_result,
+                                        decode_workers   = self.result_decode_workers,
+                                        callback_workers = self.result_callback_workers,
+                                        max_depth        = self.result_pipeline_depth)
+        try:
+            yield self._pipeline
+        finally:
+            pipeline, self._pipeline = self._pipeline, None
+            pipeline.close()
+
+    def result_queue_sizes(self):
+        """number of items in the result_q and, while join uses a ResultPipeline, in its stages"""
+        sizes = {'result_q': self.result_q.qsize()}
+        pipeline = self._pipeline
+        if pipeline is not None:
+            sizes.update(pipeline.qsizes())
+        return sizes
+
     def start(self):
         self.bring_him_up()
         self.join()
@@ -2132,6 +5534,8 @@ class Signal_to_terminate_process_list(object):
                                                auto_kill_on_last_resort=False)
 
 def address_authkey_from_proxy(proxy):
+    if isinstance(proxy, EventLoopProxy):
+        return proxy._address, proxy._authkey.decode()
     return proxy._token.address, proxy._authkey.decode()
 
 def address_authkey_from_manager(manager):
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""online reducers aggregating the results of a JobManager_Server (see JobManager_Server.add_reducer)
+
+A reducer aggregates the values one by one (update) in a state which does not grow with
+the number of values. Two reducers of the same kind are combined by merge, e.g. the
+partial aggregates of several runs or servers. The reducers are pickled with the state
+of the server (dump, checkpoint), so the aggregation continues after read_old_state.
+
+The values may be numbers or numpy arrays (all of the same shape), Sum, MeanVar and MinMax
+reduce them element wise.
+"""
+import heapq
+import itertools
+
+import numpy as np
+
+
+class Reducer(object):
+    """base class of the reducers"""
+    def update(self, value):
+        """add a single value"""
+        raise NotImplementedError
+
+    def merge(self, other):
+        """add the values aggregated by the reducer other (of the same kind)"""
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+    def _check_other(self, other):
+        if type(other) is not type(self):
+            raise TypeError("can not merge {} into {}".format(type(other).__name__, type(self).__name__))
+
+
+def _as_float_array(value):
+    # integers are summed as floats, complex values stay complex
+    value = np.asarray(value)
+    return value.astype(np.result_type(value, 1.0), copy=True)
+
+
+class Sum(Reducer):
+    """element wise sum, with compensation of the rounding errors (Kahan-Babuska / Neumaier)
+
+    result: the sum (None if there is no value yet)
+    """
+    def __init__(self):
+        self.n = 0
+        self.sum = None
+        self.compensation = None
+
+    def _add(self, value, compensation=None):
+        if self.sum is None:
+            self.sum = value
+            self.compensation = np.zeros_like(value)
+        else:
+            t = self.sum + value
+            big = np.abs(self.sum) >= np.abs(value)
+            self.compensation += np.where(big, (self.sum - t) + value, (value - t) + self.sum)
+            self.sum = t
+        if compensation is not None:
+            self.compensation += compensation
+
+    def update(self, value):
+        self._add(_as_float_array(value))
+        self.n += 1
+
+    def merge(self, other):
+        self._check_other(other)
+        if other.sum is not None:
+            self._add(other.sum.copy(), other.compensation)
+        self.n += other.n
+
+    def result(self):
+        if self.sum is None:
+            return None
+        return self.sum + self.compensation
+
+
+class MeanVar(Reducer):
+    """element wise mean and variance, updated by Welford's algorithm and merged by the
+    algorithm of Chan et al., both numerically stable
+
+    The deviations are taken from the first value (shift), so that values with a large
+    offset do not lose precision. The variance is the sum of the squared deviations from
+    the mean divided by n - ddof (for complex values the squared absolute deviations).
+
+    result: (n, mean, variance), mean and variance are None if there is no value yet
+    """
+    def __init__(self, ddof=0):
+        self.ddof = ddof
+        self.n = 0
+        self.shift = None
+        # mean of the shifted values and sum of the squared deviations
+        self._mean = None
+        self.m2 = None
+
+    def update(self, value):
+        value = _as_float_array(value)
+        self.n += 1
+        if self.shift is None:
+            self.shift = value
+            self._mean = np.zeros_like(value)
+            self.m2 = np.zeros(value.shape)
+            return
+        value = value - self.shift
+        delta = value - self._mean
+        self._mean += delta / self.n
+        self.m2 += (delta * np.conj(value - self._mean)).real
+
+    def merge(self, other):
+        self._check_other(other)
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.shift, self._mean, self.m2 = other.n, other.shift.copy(), other._mean.copy(), other.m2.copy()
+            return
+        n = self.n + other.n
+        delta = (other.shift - self.shift) + other._mean - self._mean
+        self._mean = self._mean + delta * (other.n / n)
+        self.m2 = self.m2 + other.m2 + np.abs(delta)**2 * (self.n * other.n / n)
+        self.n = n
+
+    @property
+    def mean(self):
+        if self.shift is None:
+            return None
+        return self.shift + self._mean
+
+    def variance(self):
+        if (self.shift is None) or (self.n - self.ddof <= 0):
+            return None
+        return self.m2 / (self.n - self.ddof)
+
+    def result(self):
+        return self.n, self.mean, self.variance()
+
+
+class MinMax(Reducer):
+    """element wise minimum and maximum
+
+    result: (minimum, maximum), None if there is no value yet
+    """
+    def __init__(self):
+        self.min = None
+        self.max = None
+
+    def update(self, value):
+        value = np.asarray(value)
+        if self.min is None:
+            self.min = value.copy()
+            self.max = value.copy()
+        else:
+            self.min = np.minimum(self.min, value)
+            self.max = np.maximum(self.max, value)
+
+    def merge(self, other):
+        self._check_other(other)
+        if other.min is not None:
+            self.update(other.min)
+            self.max = np.maximum(self.max, other.max)
+
+    def result(self):
+        return self.min, self.max
+
+
+class Histogram(Reducer):
+    """histogram of all elements of the values
+
+    The bins are either given by their edges or by their number and the range, as for
+    numpy.histogram, the last bin includes its right edge. Elements below and above the
+    bins are counted by underflow and overflow (NaN is not counted at all).
+
+    result: (counts, edges)
+    """
+    def __init__(self, bins=10, range=(0, 1)):
+        if np.ndim(bins) == 0:
+            self.edges = np.linspace(range[0], range[1], bins + 1)
+        else:
+            self.edges = np.asarray(bins, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, value):
+        value = np.ravel(value)
+        self.counts += np.histogram(value, self.edges)[0]
+        self.underflow += int(np.count_nonzero(value < self.edges[0]))
+        self.overflow += int(np.count_nonzero(value > self.edges[-1]))
+
+    def merge(self, other):
+        self._check_other(other)
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("can not merge histograms with different bins")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def result(self):
+        return self.counts, self.edges
+
+
+class TopK(Reducer):
+    """the k values with the smallest key(value) (largest for largest=True), e.g. the best fits
+
+    key has to be picklable (e.g. operator.itemgetter, not a lambda), None: the value itself.
+    Of values with the same key the first ones are kept.
+
+    result: the list of the k values, best first
+    """
+    def __init__(self, k, key=None, largest=False):
+        self.k = k
+        self.key = key
+        self.largest = largest
+        # heap of (-score, -count, value), its first entry is the worst value kept
+        self._heap = []
+        self._count = itertools.count()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_count'] = next(self._count)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._count = itertools.count(self._count)
+
+    def _score(self, value):
+        score = value if self.key is None else self.key(value)
+        return -score if self.largest else score
+
+    def _push(self, score, value):
+        entry = (-score, -next(self._count), value)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def update(self, value):
+        self._push(self._score(value), value)
+
+    def merge(self, other):
+        self._check_other(other)
+        for value in other.result():
+            self.update(value)
+
+    def result(self):
+        return [value for s, c, value in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
@@ -10,6 +10,7 @@ import signal
 import logging
 import datetime
 import threading
+import queue
 from numpy import random
 import pytest
 import shutil
@@ -183,14 +184,15 @@ def start_server(n, read_old_state=False, client_sleep=0.1, hide_progress=False,
             jm_server.read_old_state()
         jm_server.start()        
     
-def start_client(hide_progress=True):
+def start_client(hide_progress=True, **client_kwargs):
     print("START CLIENT")
     jm_client = jobmanager.JobManager_Client(server  = SERVER,
                                              authkey = AUTHKEY,
                                              port    = PORT,
                                              nproc   = 3,
                                              reconnect_tries = 0,
-                                             hide_progress = hide_progress)
+                                             hide_progress = hide_progress,
+                                             **client_kwargs)
     jm_client.start()
     
 def test_start_server_with_no_args():
@@ -329,6 +331,540 @@ def test_jobmanager_basic():
                 p_client.terminate()
             raise
     
+def run_server_with_client(n, client_sleep=0.05, server_kwargs={}, client_kwargs={}):
+    """
+    run a server in this process and a client (start_client) in a subprocess
+
+    returns the server after it has been shut down
+    """
+    p_client = mp.Process(target=start_client, kwargs=client_kwargs)
+    try:
+        with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                          port          = PORT,
+                                          const_arg     = client_sleep,
+                                          fname_dump    = None,
+                                          hide_progress = True,
+                                          **server_kwargs) as jm_server:
+            jm_server.args_from_list(range(1, n))
+            jm_server.bring_him_up(no_sys_exit_on_signal=True)
+            p_client.start()
+            jm_server.join()
+
+        p_client.join(TIMEOUT)
+        assert not p_client.is_alive(), "the client did not terminate on time!"
+        assert p_client.exitcode == 0, "the client raised an exception"
+    except:
+        if p_client.is_alive():
+            p_client.terminate()
+        raise
+    return jm_server
+
+def test_jobmanager_fetch_batch_size():
+    """
+    start server, start client fetching several arguments at once, quit
+
+    check if all arguments are found in final_result
+    """
+    global PORT
+    PORT += 1
+    n = 20
+    jm_server = run_server_with_client(n, client_kwargs={'fetch_batch_size': 4})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_ChunkSizer():
+    from jobmanager.jobmanager import ChunkSizer, ArgsContainer
+    cs = ChunkSizer(target_overhead=0.1, max_size=100, alpha=0.5)
+    # nothing known yet -> single arguments
+    assert cs.size(rtt=None, remaining=1000) == 1
+    assert cs.size(rtt=0.01, remaining=1000) == 1
+
+    cs.update_job_time(0.001)
+    assert cs.size(rtt=0.01, remaining=1000) == 100
+    assert cs.size(rtt=0.001, remaining=1000) == 10
+    cs.update_job_time(0.003)
+    assert cs.job_time == pytest.approx(0.002)
+    # long jobs one at a time
+    cs.update_job_time(10)
+    assert cs.size(rtt=0.01, remaining=1000) == 1
+
+    # shrink near the end of the queue
+    cs = ChunkSizer(target_overhead=0.1, max_size=100, tail_factor=2)
+    cs.update_job_time(0.0001)
+    assert cs.size(rtt=0.01, remaining=1000, client_id='a', nworkers=4) == 100
+    assert cs.size(rtt=0.01, remaining=200, client_id='a', nworkers=4) == 25
+    assert cs.size(rtt=0.01, remaining=200, client_id='b', nworkers=6) == 10
+    assert cs.size(rtt=0.01, remaining=5, client_id='b', nworkers=6) == 1
+    cs.active_window = 0
+    time.sleep(0.01)
+    assert cs.size(rtt=0.01, remaining=200, client_id='b', nworkers=6) == 16
+
+    ac = ArgsContainer()
+    ac.put_many(range(10))
+    ac.chunk_sizer.update_job_time(0)
+    assert len(ac.get_chunk(rtt=0.01, max_n=3)) == 3
+    assert len(ac.get_chunk(rtt=0.01)) == 3
+    assert ac.chunk_sizer.n_chunks == 2
+    assert ac.chunk_sizer.n_items == 6
+    assert ac.chunk_sizer.info() == "chunk 3 (avr 3.0)"
+
+def test_jobmanager_fetch_batch_size_auto():
+    """
+    the server chooses the number of arguments a client fetches
+    """
+    global PORT
+    PORT += 1
+    n = 60
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs={'fetch_batch_size': 'auto'})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+    assert jm_server.chunk_sizer.n_items == n-1
+    assert jm_server.chunk_sizer.job_time == pytest.approx(0.01, rel=0.5)
+
+def test_pack_result_batch():
+    from jobmanager.jobmanager import pack_result_batch, unpack_result_batch
+    import pickle
+
+    data_list = [pickle.dumps({'arg': i, 'res': 'x'*i, 'time': 0.}) for i in range(5)]
+    bin_data = pack_result_batch(data_list)
+    assert [pickle.loads(d) for d in unpack_result_batch(bin_data)] == [pickle.loads(d) for d in data_list]
+
+    # a single result is passed through untouched
+    assert list(unpack_result_batch(data_list[2])) == [data_list[2]]
+
+def test_jobmanager_result_batch():
+    """
+    the client collects the results of 0.2s into a single batch
+    """
+    global PORT
+    PORT += 1
+    n = 30
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs={'result_batch_linger': 0.2})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_LocalResultQueueLimit():
+    from jobmanager.jobmanager import LocalResultQueueLimit
+
+    limit = LocalResultQueueLimit(max_items=2, max_bytes=100)
+    # an empty queue takes any result
+    assert limit.acquire(1000) < 0.1
+    limit.release(1, 1000)
+
+    limit.acquire(10)
+    limit.acquire(10)
+    assert limit.items() == 2
+    assert limit.bytes() == 20
+
+    def release_later():
+        time.sleep(0.5)
+        limit.release(2, 20)
+    thr = threading.Thread(target=release_later)
+    thr.start()
+    # blocks until the thread releases the two items
+    t_wait = limit.acquire(10)
+    thr.join()
+    assert t_wait > 0.4
+    assert limit.items() == 1
+
+    limit.release(1, 10)
+
+    # the size limit blocks as well
+    limit.acquire(200)
+    def release_later():
+        time.sleep(0.5)
+        limit.release(1, 200)
+    thr = threading.Thread(target=release_later)
+    thr.start()
+    t_wait = limit.acquire(10)
+    thr.join()
+    assert t_wait > 0.4
+    assert limit.items() == 1
+    assert limit.bytes() == 10
+
+    # once closed (the forwarding thread has stopped) acquire does not block anymore
+    limit = LocalResultQueueLimit(max_items=1, poll_interval=0.1)
+    limit.acquire(10)
+    thr = threading.Thread(target=lambda: (time.sleep(0.5), limit.close()))
+    thr.start()
+    t_wait = limit.acquire(10)
+    thr.join()
+    assert 0.4 < t_wait < 2
+    assert limit.closed()
+    assert limit.acquire(10) < 0.1
+
+def test_jobmanager_local_result_q_limit():
+    """
+    at most one result may wait in the local result queue
+    """
+    global PORT
+    PORT += 1
+    n = 20
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs={'local_result_q_max_items': 1})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_result_oob():
+    from jobmanager.jobmanager import dumps_result_oob, loads_result, pack_result_batch, unpack_result_batch, RESULT_OOB_ALIGN
+    import pickle
+    import numpy as np
+
+    res = {'arg': 3, 'res': [np.arange(1000, dtype=np.float64), np.ones((7, 3), dtype=np.int8)], 'time': 0.}
+    bin_data = dumps_result_oob(res)
+    res_l = loads_result(bin_data)
+    assert res_l['arg'] == 3
+    for a, b in zip(res['res'], res_l['res']):
+        assert np.all(a == b)
+        assert a.dtype == b.dtype
+        # the array references the received data
+        assert not b.flags.owndata
+        assert b.ctypes.data % RESULT_OOB_ALIGN == (np.frombuffer(bin_data, dtype=np.uint8).ctypes.data % RESULT_OOB_ALIGN)
+
+    # plain pickles are still understood
+    assert loads_result(pickle.dumps(res))['arg'] == 3
+
+    # out-of-band pickled results inside a batch
+    data_list = [dumps_result_oob({'arg': i, 'res': np.full(i, i), 'time': 0.}) for i in range(4)]
+    for i, d in enumerate(unpack_result_batch(pack_result_batch(data_list))):
+        assert np.all(loads_result(d)['res'] == np.full(i, i))
+    # received as bytearray the arrays are writable
+    res_l = loads_result(bytearray(bin_data))
+    res_l['res'][0][:] = 0
+
+def test_result_frames():
+    from jobmanager.jobmanager import (dumps_result_frames, join_result_frames, loads_result, pack_result_frames,
+                                       unpack_result_frames, unpack_result_item, result_nbytes)
+    import pickle
+    import numpy as np
+
+    a = np.arange(1000, dtype=np.float64)
+    frames = dumps_result_frames({'arg': 1, 'res': a})
+    assert len(frames) == 2
+    # the frame references the memory of the array
+    assert np.frombuffer(frames[1], dtype=np.float64).ctypes.data == a.ctypes.data
+    assert np.all(loads_result(frames)['res'] == a)
+    assert np.all(loads_result(join_result_frames(frames))['res'] == a)
+
+    items = [frames, pickle.dumps({'arg': 2, 'res': None}), dumps_result_frames({'arg': 3, 'res': a[::2].copy()})]
+    packed = pack_result_frames(items)
+    assert len(packed) == 1 + 2 + 1 + 2
+    raw_len, bin_results = unpack_result_item(packed)
+    assert raw_len == result_nbytes(packed)
+    assert [loads_result(r)['arg'] for r in bin_results] == [1, 2, 3]
+    with pytest.raises(ValueError):
+        list(unpack_result_frames(frames))
+
+def put_frame_queue(q, n):
+    from jobmanager.jobmanager import dumps_result_frames
+    import numpy as np
+    for i in range(n):
+        q.put_frames(dumps_result_frames({'arg': i, 'res': np.full(100000, i)}))
+    q.put(b'done')
+
+def test_FrameQueue():
+    from jobmanager.jobmanager import FrameQueue, loads_result
+
+    q = FrameQueue()
+    assert q.empty()
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0.1)
+    with pytest.raises(queue.Empty):
+        q.get_nowait()
+
+    n = 5
+    p = mp.Process(target=put_frame_queue, args=(q, n))
+    p.start()
+    for i in range(n):
+        frames = q.get(timeout=TIMEOUT)
+        assert all(isinstance(f, bytearray) for f in frames)
+        res = loads_result(frames)
+        assert res['arg'] == i
+        assert (res['res'] == i).all()
+        # the arrays are writable and own buffers of their own
+        res['res'][:] = -1
+    assert q.get(timeout=TIMEOUT) == b'done'
+    p.join(TIMEOUT)
+    assert p.exitcode == 0
+    assert q.qsize() == 0
+    assert q.empty()
+
+class ArrayClient(jobmanager.JobManager_Client):
+    @staticmethod
+    def func(arg, const_arg):
+        import numpy as np
+        return np.full(10000, arg, dtype=np.float64)
+
+def start_array_client(**client_kwargs):
+    ArrayClient(server=SERVER, authkey=AUTHKEY, port=PORT, nproc=3, reconnect_tries=0, hide_progress=True,
+                **client_kwargs).start()
+
+@pytest.mark.parametrize('transport', ['manager', 'eventloop'])
+def test_jobmanager_result_transport_oob(transport):
+    global PORT
+    PORT += 1
+    n = 20
+    jm_server = run_server_with_client(n, client_sleep=0.01, server_kwargs={'transport': transport},
+                                       client_kwargs={'result_transport': 'oob', 'transport': transport})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+    PORT += 1
+    p_client = mp.Process(target=start_array_client, kwargs={'result_transport': 'oob', 'transport': transport})
+    try:
+        with jobmanager.JobManager_Server(authkey=AUTHKEY, port=PORT, fname_dump=None, hide_progress=True,
+                                          transport=transport) as jm_server:
+            jm_server.args_from_list(range(1, n))
+            jm_server.bring_him_up(no_sys_exit_on_signal=True)
+            p_client.start()
+            jm_server.join()
+        p_client.join(TIMEOUT)
+        assert p_client.exitcode == 0, "the client raised an exception"
+    except:
+        if p_client.is_alive():
+            p_client.terminate()
+        raise
+    assert len(jm_server.final_result) == n-1
+    for arg, res in jm_server.final_result:
+        assert (res == arg).all()
+        # the arrays received are writable
+        res[:] = 0
+
+def test_result_compression():
+    from jobmanager.jobmanager import compress_result, decompress_result, ResultCompressor, RESULT_COMPRESSION_CODECS
+    import pickle
+    import struct
+
+    bin_data = pickle.dumps({'arg': 0, 'res': [0.]*10000, 'time': 0.})
+    for codec in RESULT_COMPRESSION_CODECS:
+        c_data = compress_result(bin_data, codec=codec, level=1)
+        assert len(c_data) < len(bin_data)
+        assert decompress_result(c_data) == bin_data
+    # uncompressed data is passed through
+    assert decompress_result(bin_data) is bin_data
+    # a header with the wrong length is rejected
+    c_data = compress_result(bin_data)
+    c_data = c_data[:5] + struct.pack('<Q', len(bin_data)+1) + c_data[13:]
+    with pytest.raises(ValueError):
+        decompress_result(c_data)
+
+    rc = ResultCompressor(codec='zlib', probe_interval=4)
+    # small items are never compressed
+    assert rc(b'x'*10) == b'x'*10
+    # without any estimates, compress
+    c_data = rc(bin_data)
+    assert len(c_data) < len(bin_data)
+    # an (unrealistically) fast wire makes compression not pay off
+    rc.update_wire_speed(10**15, 1)
+    assert not rc.pays_off()
+    assert [rc(bin_data) is bin_data for i in range(4)] == [True, True, True, False]
+    # a slow wire does
+    rc.wire_speed = 1
+    assert rc.pays_off()
+    assert rc(bin_data) is not bin_data
+
+    # always compress, unless the compressed data is larger
+    rc = ResultCompressor(codec='zlib', adaptive=False)
+    rc.update_wire_speed(10**15, 1)
+    assert rc(bin_data) is not bin_data
+    assert rc(b'x'*10) == b'x'*10
+
+def test_jobmanager_result_compression():
+    global PORT
+    PORT += 1
+    n = 20
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs={'result_compression': 'zlib',
+                                                                           'result_compression_adaptive': False,
+                                                                           'result_batch_linger': 0.1})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_set_info_line():
+    from jobmanager.jobmanager import set_info_line, INFO_LINE_BYTES
+    info_line = progress.StringValue(num_of_bytes=INFO_LINE_BYTES)
+    set_info_line(info_line, "res_q #0")
+    assert info_line.value == b"res_q #0"
+    # a line too long for the buffer is truncated
+    set_info_line(info_line, "x"*(2*INFO_LINE_BYTES))
+    assert info_line.value == b"x"*(INFO_LINE_BYTES-1)
+
+def test_PrefetchQueue():
+    from jobmanager.jobmanager import PrefetchQueue, ContainerClosedError
+
+    pq = PrefetchQueue(nproc=2, max_depth=10)
+    # no measurements yet -> one argument per worker
+    assert pq.target_depth() == 2
+    assert pq.wait_for_space(timeout=0.1) == 2
+    pq.put('a')
+    pq.put('b')
+    assert pq.wait_for_space(timeout=0.1) == 0
+    assert pq.get() == 'a'
+    assert pq.items() == 1
+
+    # a fetch takes as long as 2 jobs -> 2 + 2*2 arguments
+    pq.update_rtt(0.2)
+    pq.job_done(0.1)
+    assert pq.target_depth() == 6
+    pq.update_rtt(100)
+    assert pq.target_depth() == 10
+
+    pq.put('c')
+    pq.finish('#CLOSED')
+    assert pq.get() == 'b'
+    assert pq.get() == 'c'
+    # every worker sees the marker
+    for i in range(3):
+        with pytest.raises(ContainerClosedError):
+            pq.get()
+
+    pq = PrefetchQueue(nproc=2, max_depth=10)
+    for a in range(4):
+        pq.put(a)
+    pq.finish()
+    assert pq.get() == 0
+    assert pq.drain() == [1, 2, 3]
+    assert pq.items() == 0
+
+def test_jobmanager_prefetch():
+    global PORT
+    PORT += 1
+    n = 30
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs={'prefetch': True})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+@pytest.mark.parametrize("client_kwargs", [{'prefetch': True},
+                                           {'worker_mode': 'thread'}])
+def test_jobmanager_prefetch_shutdown(client_kwargs):
+    """
+    the arguments prefetched by a client are put back to the job_q when the client is terminated
+    """
+    global PORT
+    PORT += 1
+    n = 60
+    with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                      port          = PORT,
+                                      const_arg     = 0.1,
+                                      fname_dump    = None,
+                                      hide_progress = True) as jm_server:
+        jm_server.args_from_list(range(1, n))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+        p_client = mp.Process(target=start_client, kwargs=dict(result_batch_max_items=1, **client_kwargs))
+        p_client.start()
+        time.sleep(1.5)
+        os.kill(p_client.pid, signal.SIGTERM)
+        p_client.join(TIMEOUT)
+        assert not p_client.is_alive(), "the client did not terminate on time!"
+        # all arguments not in the job_q have a result
+        assert jm_server.job_q.qsize() + jm_server.result_q.qsize() == n-1
+        assert jm_server.job_q.qsize() > 0
+
+        p_client = mp.Process(target=start_client, kwargs=client_kwargs)
+        p_client.start()
+        jm_server.join()
+        p_client.join(TIMEOUT)
+        assert not p_client.is_alive(), "the client did not terminate on time!"
+
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+@pytest.mark.parametrize("client_kwargs", [{'worker_mode': 'thread'},
+                                           {'worker_mode': 'hybrid', 'worker_threads': 2}])
+def test_jobmanager_worker_threads(client_kwargs):
+    global PORT
+    PORT += 1
+    n = 30
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs=client_kwargs)
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+@pytest.mark.parametrize("client_kwargs", [{'fast_start': True, 'preload_modules': ['json']},
+                                           {'fast_start': True, 'worker_mode': 'hybrid'}])
+def test_jobmanager_fast_start(client_kwargs):
+    global PORT
+    PORT += 1
+    n = 30
+    jm_server = run_server_with_client(n, client_sleep=0.01, client_kwargs=client_kwargs)
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_jobmanager_eventloop_transport():
+    global PORT
+    PORT += 1
+    n = 30
+    jm_server = run_server_with_client(n, client_sleep=0.01,
+                                       server_kwargs={'transport': 'eventloop'},
+                                       client_kwargs={'transport': 'eventloop', 'fetch_batch_size': 2})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_EventLoopServer():
+    from jobmanager.jobmanager import (EventLoopProxy, EventLoopConnection, ContainerClosedError, pack_result_frames,
+                                       dumps_result_frames, decode_result_item)
+    import numpy as np
+    import pickle
+    global PORT
+    PORT += 1
+    with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                      port          = PORT,
+                                      const_arg     = {'a': 1},
+                                      fname_dump    = None,
+                                      hide_progress = True,
+                                      transport     = 'eventloop') as jm_server:
+        jm_server.args_from_list(range(5))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+        address = (SERVER, PORT)
+        authkey = bytearray(AUTHKEY, encoding='utf8')
+
+        with pytest.raises(mp.AuthenticationError):
+            EventLoopConnection(address, bytearray(AUTHKEY + ' not the same', encoding='utf8'))
+
+        job_q = EventLoopProxy(address, authkey, 'job_q')
+        result_q = EventLoopProxy(address, authkey, 'result_q')
+        assert EventLoopProxy(address, authkey, 'const_arg').get() == {'a': 1}
+        assert job_q.get() == 0
+        assert job_q.get_many(10) == [1, 2, 3, 4]
+        with pytest.raises(queue.Empty):
+            job_q.get()
+        job_q.put(3)
+        assert job_q.get() == 3
+        result_q.put(b'data')
+        assert result_q.qsize() == 1
+        assert jm_server.result_q.get(timeout=1) == b'data'
+
+        # the frames are received as they are, not pickled
+        frames = pack_result_frames([dumps_result_frames({'arg': 1, 'res': np.arange(10000)}),
+                                     pickle.dumps({'arg': 2, 'res': None})])
+        result_q.put_frames(frames)
+        frames_r = jm_server.result_q.get(timeout=1)
+        assert [bytes(f) for f in frames_r] == [bytes(f) for f in frames]
+        raw_len, results = decode_result_item(frames_r)
+        res = results[0][1]['res']
+        assert (res == np.arange(10000)).all()
+        res[:] = 0
+
+        # many connections at once
+        proxies = [EventLoopProxy(address, authkey, 'result_q') for i in range(200)]
+        thrs = [threading.Thread(target=pr.qsize) for pr in proxies]
+        for t in thrs:
+            t.start()
+        for t in thrs:
+            t.join(TIMEOUT)
+
+        jm_server.job_q.close()
+        with pytest.raises(ContainerClosedError):
+            job_q.get()
+
 def test_jobmanager_server_signals():
     """
         start a server (no client), shutdown, check dump 
@@ -423,7 +959,7 @@ def test_shutdown_server_while_client_running():
                 data = jobmanager.JobManager_Server.static_load(f)    
         
             ac = data['job_q']
-            args_set = {binfootprint.dump(ac.data['_'+str(id_)]) for id_ in ac._not_gotten_ids}
+            args_set = {binfootprint.dump(ac.data['_'+str(id_)]) for id_ in ac._ids.ids(jobmanager.jobmanager.ARG_NOT_GOTTEN)}
             final_result = data['final_result']
         
             final_res_args = {binfootprint.dump(a[0]) for a in final_result}
@@ -944,6 +1480,992 @@ def test_ArgsContainer():
 
         ac2.clear()
 
+def test_ArgsContainer_get_many_put_many():
+    from jobmanager.jobmanager import ArgsContainer
+    from jobmanager.jobmanager import ContainerClosedError
+    import queue
+
+    path = 'argscont'
+    from shutil import rmtree
+    try:
+        rmtree(path)
+    except FileNotFoundError:
+        pass
+
+    for p in [path, None]:
+        ac = ArgsContainer(p)
+        ac.put_many('abcde')
+        assert ac.qsize() == 5
+        assert ac.put_items() == 5
+
+        # duplicates are rejected, the items before are inserted
+        try:
+            ac.put_many(['f', 'a'])
+        except ValueError:
+            pass
+        else:
+            assert False
+        assert ac.qsize() == 6
+
+        items = ac.get_many(4)
+        assert len(items) == 4
+        assert ac.qsize() == 2
+        assert ac.gotten_items() == 4
+
+        # gotten items may be reinserted in bulk
+        ac.put_many(items[:2])
+        assert ac.qsize() == 4
+
+        for item in items[2:]:
+            ac.mark(item)
+        assert ac.marked_items() == 2
+
+        # get_many returns less items if the container runs empty
+        items = ac.get_many(10)
+        assert len(items) == 4
+        try:
+            ac.get_many(10)
+        except queue.Empty:
+            pass
+        else:
+            assert False
+
+        ac.close()
+        try:
+            ac.get_many(1)
+        except ContainerClosedError:
+            pass
+        else:
+            assert False
+        ac.clear()
+
+def test_ArgsStateTable():
+    from jobmanager.jobmanager import ArgsStateTable, ARG_NOT_GOTTEN, ARG_GOTTEN, ARG_MARKED
+    import pickle
+
+    t = ArgsStateTable()
+    assert [t.add() for i in range(6)] == list(range(6))
+    assert [t.pop() for i in range(4)] == [0, 1, 2, 3]
+    t.mark(1)
+    t.mark(2)
+    # ids put back behind the cursor are handed out first
+    t.put_back(0)
+    assert t.n_not_gotten == 3
+    assert t.n_marked == 2
+    assert list(t.ids(ARG_GOTTEN)) == [3]
+    assert t.pop() == 0
+    assert t.pop() == 4
+    assert t.pop() == 5
+    with pytest.raises(KeyError):
+        t.pop()
+    assert t.state(3) == ARG_GOTTEN
+    with pytest.raises(KeyError):
+        t.state(6)
+
+    # when restored, the gotten ids are not gotten again
+    t2 = pickle.loads(pickle.dumps(t))
+    assert len(t2) == 6
+    assert t2.n_marked == 2
+    assert t2.n_not_gotten == 4
+    assert list(t2.ids(ARG_NOT_GOTTEN)) == [0, 3, 4, 5]
+    assert [t2.pop() for i in range(4)] == [0, 3, 4, 5]
+
+    # the state of an older version was given by sets of ids
+    t3 = ArgsStateTable.from_marked_ids(6, {1, 2})
+    assert list(t3.ids(ARG_MARKED)) == [1, 2]
+    assert t3.n_not_gotten == 4
+
+def test_ArgsContainer_priority():
+    from jobmanager.jobmanager import ArgsContainer, ArgsStateTable
+    import pickle
+
+    t = ArgsStateTable()
+    t.add()
+    t.add()
+    # the first priority switches to the heap, ids added before get priority 0
+    assert t.add(priority=5) == 2
+    t.add(priority=-1)
+    t.add(priority=5)
+    assert [t.pop() for i in range(3)] == [2, 4, 0]
+    # a put back id keeps its priority
+    t.put_back(4)
+    assert t.priority(4) == 5
+    assert t.pop() == 4
+    t2 = pickle.loads(pickle.dumps(t))
+    assert [t2.pop() for i in range(5)] == [2, 4, 0, 1, 3]
+
+    ac = ArgsContainer()
+    ac.cost_func = lambda item: item % 10
+    ac.put_many(range(20))
+    ac.put(20, priority=100)
+    assert ac.get_many(4) == [20, 9, 19, 8]
+    ac.put(9)
+    assert ac.get() == 9
+    ac.mark(20)
+    # restored, the gotten items are handed out again in the order of their priority
+    ac2 = pickle.loads(pickle.dumps(ac))
+    assert ac2.get_many(3) == [9, 19, 8]
+
+def test_args_from_list():
+    from jobmanager.jobmanager import ArgsContainer, hash_arg
+    global PORT
+
+    ac = ArgsContainer()
+    ac.put_many(['a', 'b'], [hash_arg('a'), hash_arg('b')])
+    # duplicates within a single call are rejected, the items before are inserted
+    with pytest.raises(ValueError):
+        ac.put_many(['c', 'd', 'c'])
+    assert ac.qsize() == 4
+
+    for nproc in [1, 2]:
+        PORT += 1
+        with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                          port          = PORT,
+                                          fname_dump    = None,
+                                          hide_progress = True,
+                                          show_statistics = False) as jm_server:
+            jm_server.args_from_list((i for i in range(1000)), nproc=nproc, chunk_size=64)
+            assert jm_server.number_of_jobs() == 1000
+            with pytest.raises(ValueError):
+                jm_server.args_from_list([1000, 999], nproc=nproc)
+            assert jm_server.number_of_jobs() == 1001
+            assert sorted(jm_server.job_q.get_many(2000)) == list(range(1001))
+            jm_server.job_q.clear()
+
+def test_ArgsContainer_sqlite():
+    from jobmanager.jobmanager import ArgsContainer, SQLiteArgsStore
+    import pickle
+
+    path = 'argscont'
+    shutil.rmtree(path, ignore_errors=True)
+
+    ac = ArgsContainer(path, backend='sqlite')
+    assert isinstance(ac.data, SQLiteArgsStore)
+    with pytest.raises(RuntimeError):
+        ArgsContainer(path, backend='sqlite')
+
+    ac.put_many(range(10))
+    ac.put('a')
+    assert ac.put_items() == 11
+    assert len(ac.data) == 22
+    with pytest.raises(ValueError):
+        ac.put(3)
+
+    items = ac.get_many(4)
+    ac.put(items[0])
+    for item in items[1:]:
+        ac.mark(item)
+    job_id, item = ac.get_job()
+    assert ac.data['_' + str(job_id)] == item
+    assert ac.qsize() == 7
+    assert ac.marked_items() == 3
+
+    ac_dump = pickle.dumps(ac)
+    ac.close_shelve()
+
+    # on reopen the not marked items are accessible again
+    ac2 = pickle.loads(ac_dump)
+    assert isinstance(ac2.data, SQLiteArgsStore)
+    assert ac2.put_items() == 11
+    assert ac2.qsize() == 8
+    assert sorted(ac2.get_many(10), key=str) == sorted([i for i in range(10) if i not in items[1:]] + ['a'], key=str)
+    ac2.clear()
+    assert not os.path.exists(path)
+
+def test_jobmanager_job_q_sqlite():
+    global PORT
+    PORT += 1
+    n = 20
+    jm_server = run_server_with_client(n, client_sleep=0.01, server_kwargs={'job_q_on_disk': True,
+                                                                            'job_q_on_disk_backend': 'sqlite'})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_args_from_iter(tmp_path):
+    global PORT
+    PORT += 1
+    n = 30
+    p_client = mp.Process(target=start_client)
+    try:
+        with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                          port          = PORT,
+                                          const_arg     = 0.01,
+                                          fname_dump    = None,
+                                          hide_progress = True) as jm_server:
+            jm_server.args_from_iter((i for i in range(1, n)), total=n-1, window=6)
+            assert jm_server.number_of_jobs() == 6
+            assert jm_server.total_number_of_jobs() == n-1
+            jm_server.bring_him_up(no_sys_exit_on_signal=True)
+            p_client.start()
+            jm_server.join()
+            assert jm_server.job_q.put_items() == n-1
+            # the marked arguments have been removed from the job_q
+            assert len(jm_server.job_q.data) == 0
+        p_client.join(TIMEOUT)
+        assert p_client.exitcode == 0, "the client raised an exception"
+    except:
+        if p_client.is_alive():
+            p_client.terminate()
+        raise
+    assert sorted(a[0] for a in jm_server.final_result) == list(range(1, n))
+
+    # resume, the arguments pulled before are skipped
+    fname = str(tmp_path / 'args_from_iter.dump')
+    done = []
+    with jobmanager.JobManager_Server(authkey=AUTHKEY, port=PORT, fname_dump=None, show_statistics=False) as jm_server:
+        jm_server.args_from_iter(range(100), window=10)
+        for job_id, item in jm_server.job_q.get_jobs(8)[:5]:
+            jm_server.job_q.mark_id(job_id)
+            done.append(item)
+        jm_server._pull_args()
+        assert jm_server.args_source_pos == 18
+        with open(fname, 'wb') as f:
+            jm_server._JobManager_Server__dump(f)
+        jm_server.job_q.clear()
+
+    with jobmanager.JobManager_Server(authkey=AUTHKEY, port=PORT, fname_dump=None, show_statistics=False) as jm_server:
+        jm_server.read_old_state(fname)
+        jm_server.args_from_iter(range(100), window=10)
+        assert jm_server.number_of_jobs() == 13
+        while jm_server.total_number_of_jobs() > jm_server.job_q.marked_items():
+            for job_id, item in jm_server.job_q.get_jobs(3):
+                jm_server.job_q.mark_id(job_id)
+                done.append(item)
+            jm_server._pull_args()
+        jm_server.job_q.clear()
+    assert sorted(done) == list(range(100))
+
+def test_ArgsContainer_leases():
+    from jobmanager.jobmanager import ArgsContainer
+
+    ac = ArgsContainer()
+    ac.lease_time = 0.2
+    ac.put_many(range(6))
+    jobs = dict(ac.get_jobs(4))
+    ids = sorted(jobs)
+    ac.mark_id(ids[0])
+    ac.put_back([ids[1]])
+    ac.fail_ids([ids[2]])
+    assert ac.expire_leases() == 0
+    time.sleep(0.3)
+    # only the lease of ids[3] is still active
+    assert ac.expire_leases() == 1
+    assert ac.n_lease_expired == 1
+    assert ac.qsize() == 4
+    # the late result is accepted, the item is not handed out again
+    ac.mark_id(ids[3])
+    assert ac.qsize() == 3
+    assert sorted(item_id for item_id, item in ac.get_jobs(10)) == [ids[1], 4, 5]
+    with pytest.raises(RuntimeWarning):
+        ac.mark_id(ids[3])
+
+def test_ArgsContainer_put_back_expired():
+    """
+    a client putting back a job whose lease has expired (or which has been marked
+    or failed by another copy meanwhile) does not raise
+    """
+    from jobmanager.jobmanager import ArgsContainer
+
+    ac = ArgsContainer()
+    ac.lease_time = 0.1
+    ac.put_many(range(3))
+    ids = sorted(item_id for item_id, item in ac.get_jobs(3))
+    time.sleep(0.2)
+    assert ac.expire_leases() == 3
+    # the lease has expired, the item is reinserted already
+    ac.put_back([ids[0]])
+    assert ac.qsize() == 3
+    # the second copies, one is marked, one failed
+    assert sorted(item_id for item_id, item in ac.get_jobs(3)) == ids
+    ac.mark_id(ids[1])
+    ac.fail_ids([ids[2]])
+    q = ac.get_queue()
+    q.put_back(ids)
+    assert (ac.qsize(), ac.marked_items(), ac.failed_items()) == (1, 1, 1)
+    assert [item_id for item_id, item in ac.get_jobs(3)] == [ids[0]]
+    ac.mark_id(ids[0])
+    assert ac.marked_items() == 2
+
+def test_ArgsContainer_fail_ids():
+    """
+    a job handed out twice is either marked or failed, the first one wins
+    """
+    import pickle
+    from jobmanager.jobmanager import ArgsContainer
+
+    ac = ArgsContainer()
+    ac.lease_time = 0.1
+    ac.put_many(range(4))
+    ids = sorted(item_id for item_id, item in ac.get_jobs(2))
+    time.sleep(0.2)
+    assert ac.expire_leases() == 2
+    # the second copies
+    assert sorted(item_id for item_id, item in ac.get_jobs(2)) == ids
+    # one copy fails, the other one succeeds afterwards
+    assert ac.fail_ids([ids[0]]) == [ids[0]]
+    with pytest.raises(RuntimeWarning):
+        ac.mark_id(ids[0])
+    # one copy succeeds, the other one fails afterwards
+    ac.mark_id(ids[1])
+    assert ac.fail_ids([ids[1]]) == []
+    assert ac.fail_ids([ids[0]]) == []
+    assert ac.marked_items() == 1
+    assert ac.failed_items() == 1
+    assert ac.qsize() == 2
+
+    # failed ids stay failed when restored and can not be put again
+    ac2 = pickle.loads(pickle.dumps(ac))
+    assert (ac2.marked_items(), ac2.failed_items(), ac2.qsize()) == (1, 1, 2)
+    with pytest.raises(ValueError):
+        ac2.put(0)
+
+    # the ids set failed are returned through the queue as well
+    q = ac2.get_queue()
+    item_id, item = q.get_job()
+    assert q.fail_ids([item_id, ids[0]]) == [item_id]
+    assert ac2.failed_items() == 2
+    ac.clear()
+    ac2.clear()
+
+def test_jobmanager_lease_time():
+    """
+    jobs handed out to a client which never returns (died) are handed out again
+    """
+    global PORT
+    PORT += 1
+    n = 10
+    p_client = mp.Process(target=start_client)
+    try:
+        with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                          port          = PORT,
+                                          const_arg     = 0.01,
+                                          fname_dump    = None,
+                                          hide_progress = True,
+                                          lease_time    = 1) as jm_server:
+            jm_server.args_from_list(range(1, n))
+            jm_server.bring_him_up(no_sys_exit_on_signal=True)
+            lost = jm_server.job_q.get_jobs(3)
+            # the client quits once the job_q is empty, so start it after the leases expired
+            threading.Timer(1.5, p_client.start).start()
+            jm_server.join()
+            assert jm_server.job_q.n_lease_expired == 3
+            # the late result of a lost job
+            with pytest.raises(RuntimeWarning):
+                jm_server.job_q.mark_id(lost[0][0])
+        p_client.join(TIMEOUT)
+        assert p_client.exitcode == 0, "the client raised an exception"
+    except:
+        if p_client.is_alive():
+            p_client.terminate()
+        raise
+    assert sorted(a[0] for a in jm_server.final_result) == list(range(1, n))
+
+def test_ArgsContainer_speculative():
+    from jobmanager.jobmanager import ArgsContainer, SpeculativeJobId
+
+    ac = ArgsContainer()
+    ac.speculative = True
+    ac.put_many(range(4))
+    jobs = ac.get_jobs(4)
+    ac.mark_id(jobs[0][0])
+    # no job time known yet
+    with pytest.raises(queue.Empty):
+        ac.get_jobs(10)
+    ac.chunk_sizer.update_job_time(0.01)
+    time.sleep(0.05)
+    ac.put_back([jobs[3][0]])
+    # the stragglers, the oldest first
+    assert ac.get_jobs(1) == [jobs[3]]
+    stragglers = ac.get_jobs(10)
+    assert stragglers == jobs[1:3]
+    # the copies handed out once more are tagged, so the client can ask whether they are done
+    assert all(isinstance(job_id, SpeculativeJobId) for job_id, item in stragglers)
+    assert ac.done_ids([job_id for job_id, item in jobs]) == [jobs[0][0]]
+    assert ac.get_queue().done_ids([jobs[0][0], jobs[1][0]]) == [jobs[0][0]]
+    # each one only once more
+    with pytest.raises(queue.Empty):
+        ac.get_job()
+    assert ac.n_speculative == 2
+    # one copy is put back, the result of the other copy is accepted
+    ac.put_back([jobs[1][0]])
+    assert ac.qsize() == 0
+    ac.mark_id(jobs[1][0])
+    with pytest.raises(RuntimeWarning):
+        ac.mark_id(jobs[1][0])
+    # both copies are put back, the item is handed out again
+    ac.put_back([jobs[2][0]])
+    ac.put_back([jobs[2][0]])
+    assert ac.qsize() == 1
+    assert ac.get_jobs(10) == [jobs[2]]
+    ac.mark_id(jobs[2][0])
+    assert ac.marked_items() == 3
+
+def test_jobmanager_speculative():
+    """
+    a job handed out to a node which never returns is calculated by an idle client
+    """
+    global PORT
+    PORT += 1
+    n = 10
+    p_client = mp.Process(target=start_client)
+    try:
+        with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                          port          = PORT,
+                                          const_arg     = 0.01,
+                                          fname_dump    = None,
+                                          hide_progress = True,
+                                          speculative   = True) as jm_server:
+            jm_server.args_from_list(range(1, n))
+            # otherwise the client may ask before any result has been received
+            jm_server.chunk_sizer.update_job_time(0.01)
+            jm_server.bring_him_up(no_sys_exit_on_signal=True)
+            straggler = jm_server.job_q.get_job()
+            p_client.start()
+            jm_server.join()
+            assert jm_server.job_q.n_speculative == 1
+            # the late result of the straggler
+            with pytest.raises(RuntimeWarning):
+                jm_server.job_q.mark_id(straggler[0])
+        p_client.join(TIMEOUT)
+        assert p_client.exitcode == 0, "the client raised an exception"
+    except:
+        if p_client.is_alive():
+            p_client.terminate()
+        raise
+    assert sorted(a[0] for a in jm_server.final_result) == list(range(1, n))
+
+def test_Journal(tmp_path):
+    from jobmanager.jobmanager import Journal
+    import pickle
+    name = str(tmp_path / 'jm')
+    j = Journal(name)
+    j.append(('a', 1))
+    assert j.rotate() == 2
+    j.append(('b', 2))
+    j.close()
+    # a crash while writing leaves a truncated record
+    with open(name + '.000002', 'ab') as f:
+        f.write(pickle.dumps(('c', 3))[:-3])
+
+    j = Journal(name)
+    assert j.segments() == [1, 2, 3]
+    j.append(('d', 4))
+    j.flush()
+    assert list(j.records()) == [('a', 1), ('b', 2), ('d', 4)]
+    assert list(j.records(start=3)) == [('d', 4)]
+    j.remove_before(3)
+    assert j.segments() == [3]
+    j.close()
+
+@pytest.mark.parametrize('job_q_kwargs', [{},
+                                          {'job_q_on_disk': True},
+                                          {'job_q_on_disk': True, 'job_q_on_disk_backend': 'sqlite', 'job_q_shards': 3}])
+def test_jobmanager_journal(tmp_path, job_q_kwargs):
+    """
+    restore the state of a server which crashed (did not shut down) from its journal
+    """
+    global PORT
+    PORT += 1
+    n = 20
+    journal = str(tmp_path / 'jm')
+    job_q_kwargs = dict(job_q_kwargs, job_q_on_disk_path=str(tmp_path))
+    p_client = mp.Process(target=start_client)
+    jm_server = jobmanager.JobManager_Server(authkey              = AUTHKEY,
+                                             port                 = PORT,
+                                             const_arg            = 0.01,
+                                             fname_dump           = None,
+                                             hide_progress        = True,
+                                             msg_interval         = 0.1,
+                                             journal              = journal,
+                                             journal_compact_size = 500,
+                                             **job_q_kwargs)
+    try:
+        jm_server.args_from_list(range(1, n))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+        p_client.start()
+        jm_server.join()
+        # the journal has been compacted
+        assert os.path.exists(journal + '.snapshot')
+        p_client.join(TIMEOUT)
+        assert p_client.exitcode == 0, "the client raised an exception"
+    except:
+        if p_client.is_alive():
+            p_client.terminate()
+        raise
+    finally:
+        # crash, the state is not dumped
+        jm_server._stop_manager()
+        jm_server.journal.close()
+
+    PORT += 1
+    with jobmanager.JobManager_Server(authkey         = AUTHKEY,
+                                      port            = PORT,
+                                      fname_dump      = None,
+                                      show_statistics = False,
+                                      journal         = journal,
+                                      **job_q_kwargs) as jm_server:
+        jm_server.read_old_state()
+        assert jm_server.job_q.put_items() == n-1
+        assert jm_server.job_q.marked_items() == n-1
+        assert sorted(a[0] for a in jm_server.final_result) == list(range(1, n))
+        jm_server.put_arg(n)
+    # a snapshot when shut down
+    with jobmanager.JobManager_Server(authkey=AUTHKEY, port=PORT, fname_dump=None, show_statistics=False,
+                                      journal=journal, **job_q_kwargs) as jm_server:
+        jm_server.read_old_state()
+        assert jm_server.number_of_jobs() == 1
+        assert len(jm_server.final_result) == n-1
+        assert jm_server.job_q.get() == n
+
+@pytest.mark.parametrize('backend', ['shelve', 'sqlite'])
+def test_ArgsContainer_put_restored(tmp_path, backend):
+    from jobmanager.jobmanager import ArgsContainer, Journal
+    import pickle
+
+    path = str(tmp_path / 'args')
+    ac = ArgsContainer(path, backend=backend)
+    ac.put_many('ab')
+    snapshot = pickle.dumps(ac)
+    ac.journal = Journal(str(tmp_path / 'jm'))
+    ac.put_many('cd')
+    ac.journal.close()
+    # written to disk but not journaled before the crash
+    ac.journal = None
+    ac.put('e')
+    ac.close_shelve()
+
+    ac = pickle.loads(snapshot)
+    assert ac.put_items() == 2
+    for record in Journal(str(tmp_path / 'jm')).records():
+        assert record[0] == 'put'
+        ac.put_restored(record[1])
+    assert ac.put_items() == 4
+    with pytest.raises(ValueError):
+        ac.put('d')
+    ac.put('e')
+    ac.put('f')
+    assert sorted(ac.get_many(6)) == list('abcdef')
+    with pytest.raises(RuntimeError):
+        ac.put_restored([(10, 'x', 0)])
+    ac.clear()
+
+def test_ShardedArgsContainer():
+    from jobmanager.jobmanager import ShardedArgsContainer, SpeculativeJobId
+    import pickle
+
+    ac = ShardedArgsContainer(4)
+    ac.put_many(range(100))
+    assert all(shard.put_items() > 0 for shard in ac.shards)
+    with pytest.raises(ValueError):
+        ac.put(7)
+    assert ac.put_items() == ac.qsize() == 100
+
+    jobs = dict(ac.get_jobs(10, start=1))
+    assert all(item_id % 4 == 1 for item_id in jobs)
+    for i in range(30):
+        job_id, item = ac.get_job()
+        jobs[job_id] = item
+    assert len(jobs) == 40
+    ac.put_back(list(jobs)[:10])
+    for job_id in list(jobs)[10:]:
+        ac.mark_id(job_id)
+    assert ac.qsize() == 70
+    assert ac.marked_items() == 30
+    assert ac.gotten_items() == 30
+
+    ac2 = pickle.loads(pickle.dumps(ac))
+    assert ac2.qsize() == 70
+    items = set(ac2.get_many(1000))
+    items |= set(ac2.get_many(1000))
+    items |= set(ac2.get_many(1000))
+    items |= set(ac2.get_many(1000))
+    assert items == set(range(100)) - {jobs[job_id] for job_id in list(jobs)[10:]}
+
+    # through the pipes of the shards
+    ac = ShardedArgsContainer(3)
+    q = ac.get_queue()
+    q.put_many(range(30))
+    items = []
+    while True:
+        try:
+            items += q.get_many(4)
+        except queue.Empty:
+            break
+    assert sorted(items) == list(range(30))
+
+    # the copies handed out once more keep their tag (see SpeculativeJobId)
+    ac = ShardedArgsContainer(3)
+    ac.speculative = True
+    ac.put_many(range(6))
+    jobs = []
+    while True:
+        try:
+            jobs += ac.get_jobs(6)
+        except queue.Empty:
+            break
+    assert len(jobs) == 6
+    ac.mark_id(jobs[0][0])
+    ac.chunk_sizer.update_job_time(0.01)
+    time.sleep(0.05)
+    stragglers = ac.get_jobs(6)
+    assert all(isinstance(job_id, SpeculativeJobId) for job_id, item in stragglers)
+    assert set(ac.done_ids([job_id for job_id, item in jobs])) == {jobs[0][0]}
+
+def test_jobmanager_job_q_shards():
+    global PORT
+    PORT += 1
+    n = 20
+    jm_server = run_server_with_client(n, client_sleep=0.01, server_kwargs={'job_q_shards': 3},
+                                       client_kwargs={'fetch_batch_size': 'auto'})
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_ArgsContainer_hash_func(tmp_path):
+    from jobmanager.jobmanager import ArgsContainer, ShardedArgsContainer, hash_arg, bf
+    import pickle
+    import hashlib
+
+    assert len(hash_arg('a')) == 64
+    assert hash_arg('a', 'blake2b') == hashlib.blake2b(bf.dump('a'), digest_size=16).digest()
+    with pytest.raises(ValueError):
+        ArgsContainer(hash_func='md5')
+
+    for path, backend in [(None, 'shelve'), (str(tmp_path / 'shelve'), 'shelve'), (str(tmp_path / 'sqlite'), 'sqlite')]:
+        ac = ArgsContainer(path, backend, hash_func='blake2b')
+        ac.put_many(range(10))
+        with pytest.raises(ValueError):
+            ac.put(3)
+        items = ac.get_many(4)
+        ac.put(items[0])
+        for item in items[1:]:
+            ac.mark(item)
+        ac.release_marked = True
+        job_id, item = ac.get_job()
+        ac.mark_id(job_id)
+        ac.put(item)
+        ac2 = pickle.loads(pickle.dumps(ac))
+        assert ac2.hash_func == 'blake2b'
+        assert ac2.qsize() == 7
+        with pytest.raises(ValueError):
+            ac2.put(0)
+        ac.close_shelve()
+        ac2.close_shelve()
+
+    # no deduplication
+    for path, backend in [(None, 'shelve'), (str(tmp_path / 'sqlite_none'), 'sqlite')]:
+        ac = ArgsContainer(path, backend, hash_func=None)
+        ac.put_many([1, 2, 1])
+        ac.put(1)
+        assert ac.qsize() == 4
+        jobs = ac.get_jobs(4)
+        assert sorted(item for item_id, item in jobs) == [1, 1, 1, 2]
+        with pytest.raises(ValueError):
+            ac.mark(1)
+        ac.mark_id(jobs[0][0])
+        ac.put_back([jobs[1][0]])
+        ac2 = pickle.loads(pickle.dumps(ac))
+        assert ac2.hash_func is None
+        assert ac2.qsize() == 3
+        ac.close_shelve()
+        ac2.close_shelve()
+
+    ac = ShardedArgsContainer(3, hash_func=None)
+    ac.put_many([0]*9)
+    assert [shard.put_items() for shard in ac.shards] == [3, 3, 3]
+    ac = ShardedArgsContainer(3, hash_func='blake2b')
+    ac.put_many(range(30))
+    with pytest.raises(ValueError):
+        ac.put(3)
+    job_id, item = ac.get_job()
+    assert ac.mark(item) == job_id
+    # digests of a user supplied hash_func which are neither bytes nor hex strings
+    import zlib
+    for hash_func in [zlib.crc32, lambda data: (len(data), zlib.crc32(data)), lambda data: 'crc' + str(zlib.crc32(data))]:
+        ac = ShardedArgsContainer(3, hash_func=hash_func)
+        ac.put_many(range(30))
+        assert sum(shard.put_items() for shard in ac.shards) == 30
+        assert min(shard.put_items() for shard in ac.shards) > 0
+        with pytest.raises(ValueError):
+            ac.put(3)
+        job_id, item = ac.get_job()
+        assert ac.mark(item) == job_id
+
+def test_ArgsContainer_release_marked(tmp_path, monkeypatch):
+    """
+    marked items are released by their id, without hashing them again
+    """
+    import jobmanager.jobmanager as jm
+
+    for path, backend in [(None, 'shelve'), (str(tmp_path / 'shelve'), 'shelve'), (str(tmp_path / 'sqlite'), 'sqlite')]:
+        ac = jm.ArgsContainer(path, backend, hash_func='blake2b')
+        ac.release_marked = True
+        ac.put_many(range(6))
+        n_hash = [0]
+        hash_arg = jm.hash_arg
+        def counting_hash_arg(*args, **kwargs):
+            n_hash[0] += 1
+            return hash_arg(*args, **kwargs)
+        monkeypatch.setattr(jm, 'hash_arg', counting_hash_arg)
+        for job_id, item in ac.get_jobs(6):
+            ac.mark_id(job_id)
+        assert n_hash[0] == 0
+        assert ac.marked_items() == 6
+        monkeypatch.undo()
+        # released items are no longer known
+        ac.put(0)
+        assert ac.qsize() == 1
+        ac.close_shelve()
+
+def test_jobmanager_job_q_hash():
+    global PORT
+    for job_q_hash in ['blake2b', None]:
+        PORT += 1
+        n = 20
+        jm_server = run_server_with_client(n, client_sleep=0.01, server_kwargs={'job_q_hash': job_q_hash})
+        final_res_args = [a[0] for a in jm_server.final_result]
+        assert len(final_res_args) == n-1
+        assert set(final_res_args) == set(range(1,n))
+
+def test_jobmanager_join_msg_interval():
+    """the results are processed as they come in, not only at the updates of the info line"""
+    global PORT
+    PORT += 1
+    n = 20
+    t0 = time.time()
+    jm_server = run_server_with_client(n, client_sleep=0.01, server_kwargs={'msg_interval': 60})
+    assert time.time() - t0 < 30
+    final_res_args = [a[0] for a in jm_server.final_result]
+    assert len(final_res_args) == n-1
+    assert set(final_res_args) == set(range(1,n))
+
+def test_ResultPipeline():
+    from jobmanager.jobmanager import ResultPipeline, pack_result_batch, compress_result
+    import pickle
+
+    items = [pickle.dumps({'arg': 0})]
+    items.append(compress_result(pack_result_batch([pickle.dumps({'arg': i}) for i in range(1, 5)])))
+    items += [pickle.dumps({'arg': i}) for i in range(5, 20)]
+
+    processed = []
+    def callback(arg, res):
+        time.sleep(0.001)
+        processed.append(arg)
+
+    pipeline = ResultPipeline(callback, decode_workers=3, callback_workers=1, max_depth=4)
+    args = []
+    for item in items:
+        pipeline.submit(item)
+        for raw_len, results in pipeline.decoded(block=pipeline.full()):
+            args += [data_dict['arg'] for bin_result, data_dict in results]
+    assert pipeline.qsizes()['decode'] <= 4
+    while pipeline.pending():
+        for raw_len, results in pipeline.decoded(block=True):
+            args += [data_dict['arg'] for bin_result, data_dict in results]
+    # decoded in order
+    assert args == list(range(20))
+    for arg in args:
+        pipeline.callback(arg, None)
+    pipeline.close()
+    # a single callback worker processes strictly in order
+    assert processed == list(range(20))
+
+    def failing_callback(arg, res):
+        raise ZeroDivisionError
+    pipeline = ResultPipeline(failing_callback, callback_workers=2)
+    pipeline.callback(1, None)
+    with pytest.raises(ZeroDivisionError):
+        pipeline.close()
+
+def test_jobmanager_result_pipeline():
+    global PORT
+    for workers in [1, 3]:
+        PORT += 1
+        n = 40
+        jm_server = run_server_with_client(n, client_sleep=0.01,
+                                           server_kwargs={'result_pipeline': True,
+                                                          'result_callback_workers': workers},
+                                           client_kwargs={'fetch_batch_size': 5})
+        final_res_args = [a[0] for a in jm_server.final_result]
+        assert len(final_res_args) == n-1
+        assert set(final_res_args) == set(range(1,n))
+        assert jm_server.result_queue_sizes() == {'result_q': 0}
+
+def test_ResultSink(tmp_path):
+    from jobmanager.jobmanager import ResultSink, ResultSinkReader
+
+    name = str(tmp_path / 'res')
+    with pytest.raises(ValueError):
+        ResultSink(name, fsync='sometimes')
+    sink = ResultSink(name, max_segment_size=1000, fsync='always')
+    for i in range(50):
+        sink.append(i, 'r{}'.format(i)*i)
+    sink.close()
+    assert len(ResultSinkReader(name).segments()) > 1
+
+    # a new segment when opened again, a result written twice is read as the last one
+    sink = ResultSink(name, fsync=None)
+    sink.append(50, 'r50')
+    sink.append(3, 'new')
+    sink.close()
+
+    reader = ResultSinkReader(name)
+    pairs = list(reader)
+    assert [arg for arg, res in pairs] == list(range(51)) + [3]
+    assert len(reader) == 51
+    assert reader[7] == 'r7'*7
+    assert reader[3] == 'new'
+    assert 50 in reader
+    assert 51 not in reader
+    assert reader.get(51) is None
+    with pytest.raises(KeyError):
+        reader[51]
+    reader.close()
+
+    # crash while writing, the truncated record is left out
+    last = reader.segments()[-1]
+    fname = '{}.{:06d}'.format(name, last)
+    with open(fname, 'r+b') as f:
+        f.truncate(os.path.getsize(fname) - 1)
+    reader = ResultSinkReader(name)
+    assert [arg for arg, res in reader][-1] == 50
+    assert reader[3] == 'r3'*3
+    reader.close()
+
+def test_jobmanager_result_sink(tmp_path):
+    from jobmanager.jobmanager import ResultSinkReader
+    global PORT
+    PORT += 1
+    n = 20
+    name = str(tmp_path / 'res')
+    jm_server = run_server_with_client(n, client_sleep=0.01, server_kwargs={'result_sink': name})
+    assert jm_server.final_result == []
+    reader = ResultSinkReader(name)
+    assert sorted(arg for arg, res in reader) == list(range(1,n))
+    assert all(a in reader for a in range(1,n))
+    reader.close()
+
+def test_reducers():
+    from jobmanager.reducers import Sum, MeanVar, MinMax, Histogram, TopK
+    import numpy as np
+    import operator
+    import pickle
+    import math
+
+    rng = np.random.default_rng(0)
+    values = [rng.normal(1e8, 1, size=(2, 3)) for i in range(1000)]
+
+    reducers = [Sum(), MeanVar(ddof=1), MinMax(), Histogram(20, (1e8-5, 1e8+5)), TopK(5, key=operator.itemgetter(0))]
+    parts = [[pickle.loads(pickle.dumps(r)) for r in reducers] for i in range(2)]
+    for i, v in enumerate(values):
+        for r in reducers:
+            r.update((v[0, 0], i) if isinstance(r, TopK) else v)
+        # the same values split into two parts
+        for r in parts[i % 2]:
+            r.update((v[0, 0], i) if isinstance(r, TopK) else v)
+    for r, r2 in zip(parts[0], parts[1]):
+        r.merge(pickle.loads(pickle.dumps(r2)))
+
+    a = np.array(values)
+    exact_sum = np.apply_along_axis(math.fsum, 0, a)
+    for s, m, mm, h, t in [reducers, parts[0]]:
+        assert np.allclose(s.result(), exact_sum, rtol=1e-15, atol=0)
+        n, mean, var = m.result()
+        assert n == 1000
+        assert np.allclose(mean, exact_sum/1000, rtol=1e-15, atol=0)
+        assert np.allclose(var, a.var(axis=0, ddof=1), rtol=1e-12)
+        assert np.array_equal(mm.result()[0], a.min(axis=0))
+        assert np.array_equal(mm.result()[1], a.max(axis=0))
+        counts, edges = h.result()
+        assert np.array_equal(counts, np.histogram(a, edges)[0])
+        assert counts.sum() + h.underflow + h.overflow == a.size
+        assert [i for x, i in t.result()] == list(np.argsort(a[:, 0, 0])[:5])
+
+    with pytest.raises(TypeError):
+        reducers[0].merge(reducers[1])
+    with pytest.raises(ValueError):
+        reducers[3].merge(Histogram(3, (0, 1)))
+    assert TopK(2, largest=True).result() == []
+
+def test_jobmanager_reducers(tmp_path):
+    from jobmanager.reducers import Sum, MeanVar, TopK
+    global PORT
+    PORT += 1
+    n = 20
+    journal = str(tmp_path / 'journal')
+    p_client = mp.Process(target=start_client)
+    with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                      port          = PORT,
+                                      const_arg     = 0.01,
+                                      fname_dump    = None,
+                                      hide_progress = True,
+                                      journal       = journal) as jm_server:
+        jm_server.add_reducer('sum', Sum(), value=lambda arg, res: arg)
+        jm_server.add_reducer('mean', MeanVar(), value=lambda arg, res: arg)
+        jm_server.add_reducer('top', TopK(3), value=lambda arg, res: arg)
+        jm_server.args_from_list(range(1, n))
+        jm_server.bring_him_up(no_sys_exit_on_signal=True)
+        p_client.start()
+        jm_server.join()
+    p_client.join(TIMEOUT)
+    assert jm_server.final_result == []
+    assert jm_server.reducers['sum'].result() == sum(range(1, n))
+    assert jm_server.reducers['mean'].result()[:2] == (n-1, n/2)
+    assert jm_server.reducers['top'].result() == [1, 2, 3]
+
+    # the reducers are restored from the checkpoint
+    PORT += 1
+    with jobmanager.JobManager_Server(authkey       = AUTHKEY,
+                                      port          = PORT,
+                                      fname_dump    = None,
+                                      hide_progress = True,
+                                      journal       = journal) as jm_server:
+        jm_server.read_old_state()
+        jm_server.add_reducer('sum', Sum(), value=lambda arg, res: arg)
+        assert jm_server.reducers['sum'].result() == sum(range(1, n))
+        assert jm_server.reducers['top'].result() == [1, 2, 3]
+
+def test_ArgsContainer_job_ids(monkeypatch):
+    from jobmanager.jobmanager import ArgsContainer
+    import jobmanager.jobmanager as jm
+
+    ac = ArgsContainer()
+    ac.put_many('abcde')
+
+    # after insertion the items are never hashed again
+    def no_dump(item):
+        assert False, "item hashed again"
+    monkeypatch.setattr(jm.bf, 'dump', no_dump)
+
+    job_id, item = ac.get_job()
+    jobs = ac.get_jobs(3)
+    assert len(jobs) == 3
+    assert ac.qsize() == 1
+    assert len(set([item] + [a for i, a in jobs]) - set('abcde')) == 0
+    assert len(set([job_id] + [i for i, a in jobs])) == 4
+
+    ac.mark_id(job_id)
+    assert ac.marked_items() == 1
+    with pytest.raises(RuntimeWarning):
+        ac.mark_id(job_id)
+    # putting back marked items is ignored
+    ac.put_back([job_id])
+    assert ac.marked_items() == 1
+    assert ac.qsize() == 1
+
+    ac.put_back([i for i, a in jobs])
+    assert ac.qsize() == 4
+    # not gotten items can neither be put back nor marked
+    with pytest.raises(ValueError):
+        ac.put_back([jobs[0][0]])
+    with pytest.raises(ValueError):
+        ac.mark_id(jobs[0][0])
+
+    rest = dict(ac.get_jobs(10))
+    assert len(rest) == 4
+    assert all(rest[i] == a for i, a in jobs)
+
 def put_from_subprocess(port):
     class MM_remote(BaseManager):
         pass
@@ -1044,7 +2566,7 @@ def test_ArgsContainer_BaseManager_in_subprocess():
             pass
 
         q = ac_inst.get_queue()
-        MM.register('get_job_q', callable=lambda: q, exposed=['put', 'get'])
+        MM.register('get_job_q', callable=lambda: q, exposed=['put', 'get', 'put_many', 'get_many'])
         m = MM(('', PORT), b'test_argscomnt')
         m.start()
 
@@ -1100,9 +2622,17 @@ def test_ArgsContainer_BaseManager_in_subprocess():
 
         assert ac_inst.qsize() == 1
 
+        acr.put_many(['f', 'g'])
+        assert ac_inst.qsize() == 3
+        items = acr.get_many(5)
+        assert sorted(items) == ['e', 'f', 'g']
+        assert ac_inst.qsize() == 0
+        acr.put_many(items)
+        assert ac_inst.qsize() == 3
+
         ac_inst.close()
         try:
-            acr.put('f')
+            acr.put('h')
         except ContainerClosedError:
             print("caught ContainerClosedError")
         else: